@@ -1,6 +1,7 @@
 """
 PDF Duplicate Finder - Main Module
 """
+import multiprocessing
 import os
 import sys
 from pathlib import Path
@@ -49,7 +50,9 @@ from script.UI.main_window import MainWindow
 from script.utils.settings import AppSettings
 from script.utils.logger import get_logger
 from script.UI.settings_dialog import SettingsDialog
-from script.utils.scanner import PDFScanner
+from script.utils.scanner import DEFAULT_OVERLAP_RATIO, PDFScanner
+from script.utils.filters import DEFAULT_EXCLUDED_DIRS
+from script.utils.similarity_graph import DEFAULT_GRAPH_FLOOR
 from PyQt6.QtCore import QThread, QObject, QTimer, QMetaObject
 from PyQt6.QtWidgets import QProgressBar, QMessageBox, QDialog
 from script.UI.progress_dialog import ScanProgressDialog
@@ -172,6 +175,10 @@ class PDFDuplicateFinder(MainWindow):
                         self._scanner.duplicates_found.disconnect()
                     if hasattr(self._scanner, 'finished'):
                         self._scanner.finished.disconnect()
+                    if hasattr(self._scanner, 'similarity_graph_ready'):
+                        self._scanner.similarity_graph_ready.disconnect()
+                    if hasattr(self._scanner, 'page_overlaps_found'):
+                        self._scanner.page_overlaps_found.disconnect()
                     if hasattr(self._scanner, 'deleteLater'):
                         self._scanner.deleteLater()
                 except Exception as e:
@@ -233,6 +240,14 @@ class PDFDuplicateFinder(MainWindow):
                 self._on_duplicates_found,
                 Qt.ConnectionType.QueuedConnection
             )
+            self._scanner.similarity_graph_ready.connect(
+                self._on_similarity_graph_ready,
+                Qt.ConnectionType.QueuedConnection
+            )
+            self._scanner.page_overlaps_found.connect(
+                self._on_page_overlaps_found,
+                Qt.ConnectionType.QueuedConnection
+            )
             self._scanner.finished.connect(
                 self._on_scan_finished,
                 Qt.ConnectionType.QueuedConnection
@@ -392,10 +407,10 @@ class PDFDuplicateFinder(MainWindow):
         
         # Update status
         if hasattr(self, 'status_bar'):
-            self.status_bar.showMessage(
-                self.tr("Found {} duplicate groups").format(len(self.last_scan_duplicates)),
-                5000
-            )
+            message = self.tr("Found {} duplicate groups").format(len(self.last_scan_duplicates))
+            if self.page_overlaps:
+                message += ", " + self.tr("{} document pairs sharing pages").format(len(self.page_overlaps))
+            self.status_bar.showMessage(message, 5000)
         
         # Update progress dialog to show completion status
         if self.progress_dialog:
@@ -409,6 +424,17 @@ class PDFDuplicateFinder(MainWindow):
         
         # Update the UI directly since we're already on the main thread
         self._update_scan_results_ui()
+        
+        # Results can be regrouped down to the floor of the scan's similarity graph
+        if hasattr(self, 'main_ui') and hasattr(self.main_ui, 'set_threshold_range'):
+            floor = self.similarity_graph.floor if self.similarity_graph is not None else None
+            self.main_ui.set_threshold_range(floor, self.similarity_threshold)
+    
+    def on_threshold_changed(self, threshold: float):
+        """Regroup the last scan at a new threshold and keep the groups for export."""
+        super().on_threshold_changed(threshold)
+        if self.similarity_graph is not None:
+            self.last_scan_duplicates = getattr(self, 'duplicate_groups', self.last_scan_duplicates)
     
     def _update_scan_results_ui(self):
         """Update the UI with the latest scan results.
@@ -567,6 +593,14 @@ class PDFDuplicateFinder(MainWindow):
                     self._on_duplicates_found,
                     Qt.ConnectionType.QueuedConnection
                 )
+                self._scanner.similarity_graph_ready.connect(
+                    self._on_similarity_graph_ready,
+                    Qt.ConnectionType.QueuedConnection
+                )
+                self._scanner.page_overlaps_found.connect(
+                    self._on_page_overlaps_found,
+                    Qt.ConnectionType.QueuedConnection
+                )
                 self._scanner.finished.connect(
                     self._on_scan_finished,
                     Qt.ConnectionType.QueuedConnection
@@ -595,9 +629,19 @@ class PDFDuplicateFinder(MainWindow):
                 'min_file_size': 1024,  # 1KB
                 'max_file_size': 1024 * 1024 * 1024,  # 1GB
                 'min_similarity': self.settings.get('comparison_threshold', 0.8),
-                'enable_text_compare': self.settings.get('enable_text_compare', True)
+                'similarity_floor': self.settings.get('scan.similarity_floor', DEFAULT_GRAPH_FLOOR),
+                'enable_text_compare': self.settings.get('enable_text_compare', True),
+                'exclude_dirs': self.settings.get('scan.exclude_dirs', list(DEFAULT_EXCLUDED_DIRS)),
+                'sniff_content': self.settings.get('scan.sniff_content', False),
+                'detect_page_overlaps': self.settings.get('scan.detect_page_overlaps', False),
+                'page_overlap_ratio': self.settings.get('scan.page_overlap_ratio', DEFAULT_OVERLAP_RATIO)
             }
             
+            # The graph and page overlaps of the new scan arrive just before it finishes
+            self.similarity_graph = None
+            self.page_overlaps = []
+            self.similarity_threshold = self._scanner.scan_parameters['min_similarity']
+            
             # Start the thread
             self.scan_thread.start()
             
@@ -938,4 +982,6 @@ def main():
         app.quit()
         
 if __name__ == "__main__":
+    # Page comparison workers are spawned; needed when running as a frozen executable
+    multiprocessing.freeze_support()
     main()
@@ -15,6 +15,8 @@ import logging
 
 # Import language manager
 from ..lang.lang_manager import SimpleLanguageManager
+from ..utils.raster_cache import get_raster_cache, render_raster
+from ..utils.document_pool import get_document_pool
 
 class PDFViewer(QMainWindow):
     """Enhanced PDF viewer with navigation and zoom capabilities."""
@@ -35,6 +37,7 @@ class PDFViewer(QMainWindow):
         self.current_page = 0
         self.zoom = 1.0
         self.file_path = None
+        self.content_hash = None
         
         # Setup UI
         self.setup_ui()
@@ -209,7 +212,7 @@ class PDFViewer(QMainWindow):
     def cleanup(self):
         """Clean up resources."""
         if hasattr(self, 'doc') and self.doc:
-            self.doc.close()
+            get_document_pool().release(self.doc)
             self.doc = None
     
     def open_file(self, file_path=None):
@@ -268,11 +271,13 @@ class PDFViewer(QMainWindow):
             
             # Open the new document with error handling for file access
             try:
-                self.doc = fitz.open(abs_path)
+                self.doc = get_document_pool().acquire(abs_path)
             except Exception as e:
                 raise RuntimeError(f"Failed to open PDF: {str(e)}")
                 
             self.file_path = abs_path
+            raster_cache = get_raster_cache()
+            self.content_hash = raster_cache.content_hash(abs_path) if raster_cache else None
             self.current_page = 0
             self.zoom = 1.0
             
@@ -311,19 +316,18 @@ class PDFViewer(QMainWindow):
             return
         
         try:
-            # Get the page
-            page = self.doc.load_page(self.current_page)
-            
-            # Calculate the zoom factor (72 DPI * zoom)
-            zoom_matrix = fitz.Matrix(self.zoom, self.zoom)
-            
-            # Render the page to a pixmap
-            pix = page.get_pixmap(matrix=zoom_matrix, alpha=False)
+            # Render the page at 72 DPI * zoom, reusing a cached raster when available
+            dpi = 72 * self.zoom
+            raster_cache = get_raster_cache()
+            if raster_cache is not None:
+                pixels = raster_cache.get_page(self.doc, self.current_page, dpi, 'rgb', self.content_hash)
+            else:
+                pixels = render_raster(self.doc, self.current_page, dpi, 'rgb')
             
-            # Copy buffer to ensure lifetime is not tied to local pix
-            buf = bytes(pix.samples)
-            fmt = QImage.Format.Format_RGBA8888 if pix.alpha else QImage.Format.Format_RGB888
-            img = QImage(buf, pix.width, pix.height, pix.stride, fmt)
+            # Copy buffer to ensure lifetime is not tied to the raster
+            buf = pixels.tobytes()
+            height, width = pixels.shape[:2]
+            img = QImage(buf, width, height, width * 3, QImage.Format.Format_RGB888)
             # Detach to own memory to prevent referencing freed buffer
             img = img.copy()
             # Keep a reference to buffer to avoid GC before copy (paranoia for some Qt builds)
@@ -340,8 +344,8 @@ class PDFViewer(QMainWindow):
                 ).format(
                     current=self.current_page + 1,
                     total=len(self.doc),
-                    width=pix.width,
-                    height=pix.height,
+                    width=width,
+                    height=height,
                     zoom=self.zoom
                 )
             )
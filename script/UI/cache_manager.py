@@ -5,7 +5,8 @@ This module provides UI components for managing the PDF hash cache,
 including viewing cache statistics, clearing cache, and configuring cache settings.
 """
 import os
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
     QGroupBox, QFormLayout, QSpinBox, QCheckBox, QLineEdit,
@@ -17,6 +18,7 @@ from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 
 from ..utils.hash_cache import HashCache
+from ..utils.raster_cache import get_raster_cache
 
 class CacheManagerDialog(QDialog):
     """
@@ -39,6 +41,7 @@ class CacheManagerDialog(QDialog):
         self.setup_ui()
         self.load_current_settings()
         self.refresh_cache_stats()
+        self.refresh_quarantine()
         
         # Auto-refresh stats every 2 seconds
         self.refresh_timer = QTimer()
@@ -64,6 +67,10 @@ class CacheManagerDialog(QDialog):
         self.operations_widget = self.create_operations_tab()
         self.tab_widget.addTab(self.operations_widget, "Operations")
         
+        # Quarantine tab
+        self.quarantine_widget = self.create_quarantine_tab()
+        self.tab_widget.addTab(self.quarantine_widget, "Quarantine")
+        
         layout.addWidget(self.tab_widget)
         
         # Buttons
@@ -71,6 +78,7 @@ class CacheManagerDialog(QDialog):
         
         self.refresh_button = QPushButton("Refresh")
         self.refresh_button.clicked.connect(self.refresh_cache_stats)
+        self.refresh_button.clicked.connect(self.refresh_quarantine)
         button_layout.addWidget(self.refresh_button)
         
         self.apply_button = QPushButton("Apply")
@@ -255,6 +263,42 @@ class CacheManagerDialog(QDialog):
         widget.setLayout(layout)
         return widget
     
+    def create_quarantine_tab(self) -> QWidget:
+        """Create the quarantine tab listing files whose extraction failed."""
+        widget = QWidget()
+        layout = QVBoxLayout()
+        
+        info_label = QLabel(
+            "Files whose text extraction timed out, crashed or ran out of memory. "
+            "Scans only compare them by file hash until they are released."
+        )
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+        
+        self.quarantine_table = QTableWidget()
+        self.quarantine_table.setColumnCount(4)
+        self.quarantine_table.setHorizontalHeaderLabels(["File", "Reason", "Failures", "Last Failure"])
+        self.quarantine_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.quarantine_table.verticalHeader().setVisible(False)
+        self.quarantine_table.setAlternatingRowColors(True)
+        self.quarantine_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.quarantine_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.quarantine_table)
+        
+        button_layout = QHBoxLayout()
+        self.release_selected_button = QPushButton("Release Selected")
+        self.release_selected_button.clicked.connect(self.release_selected_quarantine)
+        button_layout.addWidget(self.release_selected_button)
+        
+        self.release_all_button = QPushButton("Release All")
+        self.release_all_button.clicked.connect(self.release_all_quarantine)
+        button_layout.addWidget(self.release_all_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+        
+        widget.setLayout(layout)
+        return widget
+    
     def load_current_settings(self):
         """Load current cache settings."""
         if self.current_settings:
@@ -304,6 +348,7 @@ class CacheManagerDialog(QDialog):
                 ("Valid Entries", f"{stats.get('valid_entries', 0):,}"),
                 ("Memory Entries", f"{stats.get('memory_entries', 0):,}"),
                 ("Total Accesses", f"{stats.get('total_accesses', 0):,}"),
+                ("Quarantined Files", f"{stats.get('quarantined_files', 0):,}"),
                 ("Cache Size", self._format_bytes(stats.get('cache_size_bytes', 0))),
                 ("Max Cache Size", f"{stats.get('max_cache_size', 0):,} entries"),
                 ("Cache TTL", f"{stats.get('cache_ttl_days', 0)} days")
@@ -321,6 +366,53 @@ class CacheManagerDialog(QDialog):
             self.log_operation(f"Error refreshing cache stats: {e}")
             self.cache_status_label.setText("Error")
     
+    def refresh_quarantine(self):
+        """Refresh the list of quarantined files."""
+        self.quarantine_table.setRowCount(0)
+        if not self.hash_cache:
+            return
+        
+        try:
+            records = self.hash_cache.list_quarantine()
+        except Exception as e:
+            self.log_operation(f"Error listing quarantined files: {e}")
+            return
+        
+        for i, record in enumerate(records):
+            self.quarantine_table.insertRow(i)
+            path_item = QTableWidgetItem(record['file_path'])
+            path_item.setToolTip(record['file_path'])
+            path_item.setData(Qt.ItemDataRole.UserRole, record['file_hash'])
+            self.quarantine_table.setItem(i, 0, path_item)
+            self.quarantine_table.setItem(i, 1, QTableWidgetItem(record['reason']))
+            self.quarantine_table.setItem(i, 2, QTableWidgetItem(str(record['failure_count'])))
+            last_failure = datetime.fromtimestamp(record['last_failure']).strftime('%Y-%m-%d %H:%M')
+            self.quarantine_table.setItem(i, 3, QTableWidgetItem(last_failure))
+    
+    def release_selected_quarantine(self):
+        """Release the selected files from quarantine."""
+        rows = {index.row() for index in self.quarantine_table.selectedIndexes()}
+        file_hashes = [self.quarantine_table.item(row, 0).data(Qt.ItemDataRole.UserRole) for row in rows]
+        if file_hashes:
+            self._release_quarantine(file_hashes)
+    
+    def release_all_quarantine(self):
+        """Release every file from quarantine."""
+        self._release_quarantine(None)
+    
+    def _release_quarantine(self, file_hashes: Optional[List[str]]):
+        if not self.hash_cache:
+            QMessageBox.warning(self, "Error", "Hash cache is not available.")
+            return
+        try:
+            released = self.hash_cache.release_from_quarantine(file_hashes)
+            self.log_operation(f"Released {released} files from quarantine")
+        except Exception as e:
+            self.log_operation(f"Error releasing quarantined files: {e}")
+            QMessageBox.critical(self, "Error", f"Error releasing quarantined files: {e}")
+        self.refresh_quarantine()
+        self.refresh_cache_stats()
+    
     def update_cache_health(self, stats: Dict[str, Any]):
         """Update cache health indicator."""
         try:
@@ -417,9 +509,13 @@ class CacheManagerDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 if self.hash_cache and self.hash_cache.clear_cache():
+                    raster_cache = get_raster_cache()
+                    if raster_cache is not None:
+                        raster_cache.clear()
                     self.log_operation("Cache cleared successfully")
                     self.cache_cleared.emit()
                     self.refresh_cache_stats()
+                    self.refresh_quarantine()
                     QMessageBox.information(self, "Cache Cleared", "Cache has been cleared successfully.")
                 else:
                     self.log_operation("Failed to clear cache")
@@ -29,7 +29,9 @@ from .toolbar import MainToolBar as ToolBar
 from .ui import MainUI
 from .settings_dialog import SettingsDialog
 from .PDF_viewer import show_pdf_viewer
-from ..utils.scanner import PDFScanner
+from ..utils.scanner import DEFAULT_OVERLAP_RATIO, PDFScanner
+from ..utils.filters import DEFAULT_EXCLUDED_DIRS
+from ..utils.similarity_graph import DEFAULT_GRAPH_FLOOR
 
 class MainWindow(QMainWindow):
     """Base main window class with internationalization support."""
@@ -72,6 +74,11 @@ class MainWindow(QMainWindow):
         # Scanner/thread refs
         self._scanner = None
         self._scan_thread = None
+        # Similarity graph of the last scan and the threshold its results were grouped at
+        self.similarity_graph = None
+        self.similarity_threshold = 0.8
+        # Documents of the last scan sharing pages without being duplicates
+        self.page_overlaps = []
         
         # Initialize language manager
         self.language_manager = language_manager or SimpleLanguageManager(
@@ -361,6 +368,7 @@ class MainWindow(QMainWindow):
         
         # Connect UI signals to main window methods
         self.main_ui.delete_selected.connect(self.on_delete_selected)
+        self.main_ui.threshold_changed.connect(self.on_threshold_changed)
         
         # Add the main UI to the main layout
         main_layout.addWidget(self.main_ui)
@@ -976,7 +984,12 @@ class MainWindow(QMainWindow):
                 'min_file_size': 1024,  # 1KB
                 'max_file_size': 1024 * 1024 * 1024,  # 1GB
                 'min_similarity': 0.8,
-                'enable_text_compare': True
+                'similarity_floor': self.settings.get('scan.similarity_floor', DEFAULT_GRAPH_FLOOR),
+                'enable_text_compare': True,
+                'exclude_dirs': self.settings.get('scan.exclude_dirs', list(DEFAULT_EXCLUDED_DIRS)),
+                'sniff_content': self.settings.get('scan.sniff_content', False),
+                'detect_page_overlaps': self.settings.get('scan.detect_page_overlaps', False),
+                'page_overlap_ratio': self.settings.get('scan.page_overlap_ratio', DEFAULT_OVERLAP_RATIO)
             }
             logger.debug("_start_scan: Scan parameters set up successfully")
             
@@ -985,6 +998,11 @@ class MainWindow(QMainWindow):
             self._scanner.status_updated.connect(self.scan_status)
             self._scanner.progress_updated.connect(self.scan_progress)
             self._scanner.duplicates_found.connect(self._on_duplicates_found)
+            self._scanner.similarity_graph_ready.connect(self._on_similarity_graph_ready)
+            self._scanner.page_overlaps_found.connect(self._on_page_overlaps_found)
+            self.similarity_graph = None
+            self.page_overlaps = []
+            self.similarity_threshold = self._scanner.scan_parameters['min_similarity']
             self._scanner.finished.connect(self._on_scan_finished)
             logger.debug("_start_scan: Scanner signals connected successfully")
             
@@ -1028,6 +1046,47 @@ class MainWindow(QMainWindow):
         # This method should be implemented to handle displaying duplicates
         # For now, just log the finding
         
+    def _on_similarity_graph_ready(self, graph):
+        """Keep the similarity graph of the scan for regrouping.
+        
+        Args:
+            graph: SimilarityGraph of the scan
+        """
+        logger.debug(f"Similarity graph with {len(graph)} files and {graph.edge_count} edges received")
+        self.similarity_graph = graph
+    
+    def _on_page_overlaps_found(self, overlaps):
+        """Keep the documents of the scan that share pages.
+        
+        Args:
+            overlaps: PageOverlap of every pair of documents sharing pages
+        """
+        logger.info(f"{len(overlaps)} document pairs share pages")
+        for overlap in overlaps:
+            logger.info(f"Shared pages: {overlap.doc_a} ({overlap.ratio_a:.0%}) and "
+                        f"{overlap.doc_b} ({overlap.ratio_b:.0%})")
+        self.page_overlaps = overlaps
+    
+    def on_threshold_changed(self, threshold: float):
+        """Regroup the results of the last scan at a new similarity threshold.
+        
+        Args:
+            threshold: Minimum similarity score (0.0-1.0)
+        """
+        if self.similarity_graph is None:
+            return
+        try:
+            self.similarity_threshold = threshold
+            duplicates = self.similarity_graph.groups(threshold)
+            if self.similarity_graph.roots:
+                duplicates = PDFScanner.annotate_roots(duplicates, self.similarity_graph.roots)
+            logger.debug(f"Regrouped at {threshold:.2f}: {len(duplicates)} duplicate groups")
+            self.duplicate_groups = duplicates
+            self._update_duplicates_list()
+            self.main_ui.update_duplicates_tree(duplicates)
+        except Exception as e:
+            logger.error(f"Error regrouping duplicates: {e}", exc_info=True)
+    
     def _on_scan_finished(self, duplicates):
         """Handle when scan is finished.
         
@@ -1052,6 +1111,10 @@ class MainWindow(QMainWindow):
             if hasattr(self.main_ui, 'update_duplicates_tree'):
                 self.main_ui.update_duplicates_tree(duplicates)
             
+            # Results can be regrouped down to the floor of the scan's similarity graph
+            floor = self.similarity_graph.floor if self.similarity_graph is not None else None
+            self.main_ui.set_threshold_range(floor, self.similarity_threshold)
+            
             # Emit scan finished signal
             self.scan_finished.emit()
             
@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (
     QListWidget, QLabel, QFrame, QStatusBar, QTreeWidget,
     QTreeWidgetItem, QHeaderView, QSizePolicy, QMenuBar, QToolBar,
     QApplication, QTabWidget, QStackedWidget, QMenu, QPushButton, QListWidgetItem,
-    QStyle
+    QStyle, QSlider
 )
 from PyQt6.QtCore import Qt, QSize, pyqtSignal
 from PyQt6.QtGui import QAction, QIcon
@@ -20,6 +20,8 @@ class MainUI(QWidget):
     
     # Signal emitted when delete selected is requested
     delete_selected = pyqtSignal()
+    # Signal emitted with the new similarity threshold (0.0-1.0) when the slider is released
+    threshold_changed = pyqtSignal(float)
     
     def __init__(self, parent=None, language_manager=None):
         """Initialize the UI components.
@@ -142,9 +144,28 @@ class MainUI(QWidget):
         btn_collapse.setMaximumWidth(100)
         self.translation_keys['btn_collapse'] = "Collapse All"
         
+        # Similarity threshold slider, enabled once a scan provided its similarity graph
+        threshold_label = QLabel(self.tr("Similarity threshold"))
+        self.translation_keys['threshold_label'] = "Similarity threshold"
+        self.threshold_slider = QSlider(Qt.Orientation.Horizontal)
+        self.threshold_slider.setRange(50, 100)
+        self.threshold_slider.setValue(80)
+        self.threshold_slider.setMaximumWidth(200)
+        self.threshold_slider.setEnabled(False)
+        self.threshold_slider.setToolTip(self.tr("Regroup the results of the last scan without rescanning"))
+        self.threshold_value_label = QLabel("80%")
+        self.threshold_value_label.setMinimumWidth(40)
+        # Regroup once the slider is released, but show the value while dragging
+        self.threshold_slider.setTracking(False)
+        self.threshold_slider.sliderMoved.connect(self._on_threshold_slider_moved)
+        self.threshold_slider.valueChanged.connect(self._on_threshold_slider_changed)
+        
         # Add stretch to push buttons to the right
         duplicates_header_layout.addWidget(duplicates_label)
         duplicates_header_layout.addStretch()
+        duplicates_header_layout.addWidget(threshold_label)
+        duplicates_header_layout.addWidget(self.threshold_slider)
+        duplicates_header_layout.addWidget(self.threshold_value_label)
         duplicates_header_layout.addWidget(btn_expand)
         duplicates_header_layout.addWidget(btn_collapse)
         
@@ -376,6 +397,32 @@ class MainUI(QWidget):
         if hasattr(self, 'status_bar'):
             self.status_bar.showMessage(message)
     
+    def set_threshold_range(self, floor, threshold):
+        """Enable the threshold slider for results that can be regrouped.
+        
+        Args:
+            floor: Lowest threshold the results can be regrouped at (0.0-1.0), or None to disable the slider
+            threshold: Threshold of the displayed results (0.0-1.0)
+        """
+        self.threshold_slider.blockSignals(True)
+        try:
+            if floor is not None:
+                self.threshold_slider.setRange(int(round(floor * 100)), 100)
+            self.threshold_slider.setValue(int(round(threshold * 100)))
+        finally:
+            self.threshold_slider.blockSignals(False)
+        self.threshold_value_label.setText(f"{self.threshold_slider.value()}%")
+        self.threshold_slider.setEnabled(floor is not None)
+    
+    def _on_threshold_slider_moved(self, position):
+        """Show the slider position while it is dragged."""
+        self.threshold_value_label.setText(f"{position}%")
+    
+    def _on_threshold_slider_changed(self, value):
+        """Show the slider value and request a regrouping."""
+        self.threshold_value_label.setText(f"{value}%")
+        self.threshold_changed.emit(value / 100)
+    
     def update_duplicates_tree(self, duplicates):
         """Update the duplicates tree with the provided duplicate groups.
         
@@ -438,6 +485,9 @@ class MainUI(QWidget):
                             ])
                             # Store file path in UserRole for delete function
                             file_item.setData(0, Qt.ItemDataRole.UserRole, file_path)
+                            # Multi-root scans report the root each file was found under
+                            if file_info.get('root'):
+                                file_item.setToolTip(0, f"{file_path}\n{self.tr('Root')}: {file_info['root']}")
                             valid_files += 1
                         else:
                             logger.warning(f"Unknown file_info type: {type(file_info)}")
@@ -125,6 +125,8 @@ TRANSLATIONS = {
         "Modified": "Modified",
         "Similarity": "Similarity",
         "Duplicates": "Duplicates",
+        "Similarity threshold": "Similarity threshold",
+        "Regroup the results of the last scan without rescanning": "Regroup the results of the last scan without rescanning",
         "No recent files": "No recent files",
         
         # Menu items
@@ -389,6 +391,7 @@ TRANSLATIONS = {
         "scanner.stopped": "Scan stopped",
         "scanner.processing": "Processing {current} of {total}: {file}",
         "scanner.stopping": "Stopping scan...",
+        "scanner.indexing_pages": "Looking for shared pages...",
         "scan.complete": "Scan complete",
         
         "log_viewer.save_error": "Failed to save log file: {error}",
@@ -114,6 +114,8 @@ TRANSLATIONS = {
         "Size": "Dimensione",
         "Modified": "Modificato",
         "Similarity": "Somiglianza",
+        "Similarity threshold": "Soglia di somiglianza",
+        "Regroup the results of the last scan without rescanning": "Raggruppa di nuovo i risultati dell'ultima scansione senza ripeterla",
         "Duplicates": "Duplicati",
         "No recent files": "Nessun file recente",
         
@@ -379,6 +381,7 @@ TRANSLATIONS = {
         "scanner.stopped": "Scansione interrotta",
         "scanner.processing": "Elaborazione {current} di {total}: {file}",
         "scanner.stopping": "Interruzione scansione...",
+        "scanner.indexing_pages": "Ricerca di pagine condivise...",
         "scan.complete": "Scansione completata",
         
         "log_viewer.save_error": "Impossibile salvare il file di log: {error}",
@@ -5,9 +5,10 @@ from typing import List, Dict, Optional, Callable, Tuple
 from pathlib import Path
 from datetime import datetime
 
-from .text_processor import TextProcessor, TextExtractionOptions
-from .filters import FileFilter, FilterBuilder
-from .pdf_comparator import PDFComparator, PDFComparisonResult
+from .filters import FileFilter, FilterBuilder, FilterRules
+from .file_walker import FileWalker
+from .pdf_comparator import PDFComparator, PDFComparisonResult, find_duplicate_pairs
+from .hash_cache import HashCache
 
 logger = logging.getLogger('PDFDuplicateFinder')
 
@@ -17,93 +18,90 @@ class AdvancedPDFScanner:
     def __init__(self, 
                  comparison_threshold: float = 0.9,
                  text_similarity_threshold: float = 0.85,
-                 enable_text_comparison: bool = True):
-        """Initialize the advanced PDF scanner."""
-        self.comparator = PDFComparator()
-        self.text_processor = TextProcessor()
+                 enable_text_comparison: bool = True,
+                 hash_cache: Optional[HashCache] = None):
+        """Initialize the advanced PDF scanner.
+        
+        Files are compared through text signatures extracted once per file
+        by the comparator.
+        
+        Args:
+            hash_cache: Cache to persist pair scores in (defaults to the one configured in settings)
+        """
+        self.comparator = PDFComparator(hash_cache=hash_cache)
+        self.text_processor = self.comparator.text_processor
         self.comparison_threshold = comparison_threshold
         self.text_similarity_threshold = text_similarity_threshold
         self.enable_text_comparison = enable_text_comparison
         self.file_filters: List[FileFilter] = []
+        self.excluded_dirs: List[str] = []
+        self._rules: Optional[FilterRules] = None
         
     def add_file_filter(self, file_filter: FileFilter) -> None:
         """Add a file filter."""
         self.file_filters.append(file_filter)
+        self._rules = None
+        
+    def exclude_dirs(self, *patterns: str) -> None:
+        """Never descend into directories whose name matches any of the globs."""
+        self.excluded_dirs.extend(patterns)
+        self._rules = None
         
     def clear_filters(self) -> None:
         """Remove all file filters."""
         self.file_filters = []
+        self.excluded_dirs = []
+        self._rules = None
+        
+    def _compiled_rules(self) -> FilterRules:
+        """Compile all filters into a single rule set, once per filter change."""
+        if self._rules is None:
+            rules = FilterRules.from_filters(self.file_filters)
+            for pattern in self.excluded_dirs:
+                rules.add_prune(pattern)
+            self._rules = rules
+        return self._rules
         
     def _apply_filters(self, filepath: str) -> bool:
         """Check if file passes all filters."""
         if not self.file_filters:
             return True
-        return all(f.matches(filepath) for f in self.file_filters)
+        return self._compiled_rules()(filepath)
     
     def scan_directory(self, directory: str, recursive: bool = True) -> List[Tuple[str, str, float]]:
         """Scan directory for duplicate PDFs with text comparison."""
         if not os.path.isdir(directory):
             raise ValueError(f"Directory not found: {directory}")
             
-        # Get all PDF files
-        pdf_files = []
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith('.pdf'):
-                    file_path = os.path.join(root, file)
-                    if self._apply_filters(file_path):
-                        pdf_files.append(file_path)
-            if not recursive:
-                break
+        # Get all PDF files, evaluating the filters on each directory entry
+        walker = FileWalker([directory], recursive=recursive, rules=self._compiled_rules())
+        pdf_files = [found.path for found in walker.collect()]
                 
         # Find duplicates
         return self.find_duplicates(pdf_files)
     
     def find_duplicates(self, file_paths: List[str]) -> List[Tuple[str, str, float]]:
         """Find duplicate PDFs with text comparison."""
-        duplicates = []
-        processed = set()
-        
-        for i, file1 in enumerate(file_paths):
-            if file1 in processed:
-                continue
-                
-            group = [file1]
-            
-            for file2 in file_paths[i+1:]:
-                if file2 in processed:
-                    continue
-                    
-                # Compare files
-                result = self.compare_files(file1, file2)
-                if result.similarity >= self.comparison_threshold:
-                    group.append(file2)
-                    processed.add(file2)
-            
-            # Add all pairs in the group
-            if len(group) > 1:
-                for j in range(len(group)):
-                    for k in range(j+1, len(group)):
-                        result = self.compare_files(group[j], group[k])
-                        duplicates.append((group[j], group[k], result.similarity))
-                
-                processed.add(file1)
-        
+        self.comparator.similarity_cache.prefetch(file_paths)
+        duplicates = find_duplicate_pairs(file_paths, lambda f1, f2: self.compare_files(f1, f2, flush=False).similarity,
+                                          self.comparison_threshold)
+        self.comparator.similarity_cache.flush()
         return duplicates
     
-    def compare_files(self, file1: str, file2: str) -> PDFComparisonResult:
-        """Compare two PDF files with both content and text analysis."""
+    def compare_files(self, file1: str, file2: str, flush: bool = True) -> PDFComparisonResult:
+        """Compare two PDF files with both content and text analysis.
+        
+        Args:
+            file1: Path to the first PDF file
+            file2: Path to the second PDF file
+            flush: See PDFComparator.compare_files
+        """
         # Basic file comparison first
-        result = self.comparator.compare_files(file1, file2)
+        result = self.comparator.compare_files(file1, file2, flush=flush)
         
         # Add text comparison if enabled
         if self.enable_text_comparison:
-            text1 = self.text_processor.extract_text(file1)
-            text2 = self.text_processor.extract_text(file2)
-            text_sim = self.text_processor.compare_texts(text1, text2)
-            
-            # Update the similarity score with text comparison
-            result.similarity = (result.similarity + text_sim) / 2
-            result.text_similarity = text_sim
+            # Update the similarity score with the text similarity the comparator estimated
+            result.similarity = (result.similarity + result.text_similarity) / 2
         
         return result
@@ -10,6 +10,7 @@ from PyQt6.QtCore import Qt, QTimer
 import send2trash
 # Import language manager
 from ..lang.lang_manager import SimpleLanguageManager
+from .document_pool import get_document_pool
 
 logger = logging.getLogger('PDFDuplicateFinder')
 
@@ -188,6 +189,11 @@ def delete_files(file_paths, parent=None, use_recycle_bin=True, max_retries=3, r
         return 0, 0  # User cancelled
     
     permanently = not dialog.move_to_trash()
+    
+    # Pooled documents would keep the files locked
+    for path in existing_files:
+        get_document_pool().discard(path)
+    
     success = 0
     failed = len(non_existent)  # Count non-existent files as failed
     
@@ -0,0 +1,164 @@
+"""
+Pool of open PyMuPDF documents.
+
+Opening a PDF parses its xref table and page tree. The scanner, the hash
+cache, the comparator and the viewer often work on the same files one after
+another, so instead of opening and closing a document in every call they
+lease a handle from this pool and hand it back when done.
+
+A handle is leased to one caller at a time, so a document is never used by
+two threads at once; concurrent users of the same file get separate handles.
+Idle handles are kept in LRU order within a count and size budget and are
+discarded as soon as the file's size or modification time changes.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+import fitz  # PyMuPDF
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DOCUMENTS = 16
+DEFAULT_MAX_SIZE_MB = 256
+
+# (absolute path, file size, modification time in ns)
+DocumentKey = Tuple[str, int, int]
+
+
+def _document_key(file_path: str) -> DocumentKey:
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+
+class DocumentPool:
+    """LRU pool of idle fitz.Document handles with exclusive leases."""
+
+    def __init__(self, max_documents: int = DEFAULT_MAX_DOCUMENTS, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the pool.
+
+        Args:
+            max_documents: Maximum number of idle documents kept open
+            max_size_mb: Maximum total file size of the idle documents, a proxy
+                for the memory their parsed structures take
+        """
+        self.max_documents = max(0, int(max_documents))
+        self.max_bytes = max(0, int(max_size_mb)) * 1024 * 1024
+
+        self._lock = threading.Lock()
+        # id(doc) -> (key, doc), least recently used first
+        self._idle: 'OrderedDict[int, Tuple[DocumentKey, fitz.Document]]' = OrderedDict()
+        self._leased: Dict[int, DocumentKey] = {}
+        self._idle_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def acquire(self, file_path: str) -> 'fitz.Document':
+        """Lease a document, reusing an idle handle of the same file version if any.
+
+        The document must be handed back with release() and not be closed by
+        the caller.
+
+        Raises:
+            Whatever fitz.open raises for unreadable files
+        """
+        key = _document_key(file_path)
+        stale = []
+        doc = None
+        with self._lock:
+            # Most recently used first; older versions of the file are dropped
+            for token, (idle_key, idle_doc) in reversed(list(self._idle.items())):
+                if idle_key[0] != key[0] or (idle_key == key and doc is not None):
+                    continue
+                del self._idle[token]
+                self._idle_bytes -= idle_key[1]
+                if idle_key == key:
+                    doc = idle_doc
+                else:
+                    stale.append(idle_doc)
+        for stale_doc in stale:
+            stale_doc.close()
+
+        if doc is None:
+            doc = fitz.open(key[0])
+        with self._lock:
+            self._leased[id(doc)] = key
+        return doc
+
+    def release(self, doc: 'fitz.Document') -> None:
+        """Hand a leased document back; it is closed if its file changed meanwhile."""
+        with self._lock:
+            key = self._leased.pop(id(doc), None)
+        if key is None or doc.is_closed:
+            return
+        try:
+            current = _document_key(key[0])
+        except OSError:
+            current = None
+        if current != key or self.max_documents == 0 or key[1] > self.max_bytes:
+            doc.close()
+            return
+
+        evicted = []
+        with self._lock:
+            self._idle[id(doc)] = (key, doc)
+            self._idle_bytes += key[1]
+            while len(self._idle) > self.max_documents or self._idle_bytes > self.max_bytes:
+                _, (old_key, old_doc) = self._idle.popitem(last=False)
+                self._idle_bytes -= old_key[1]
+                evicted.append(old_doc)
+        for old_doc in evicted:
+            old_doc.close()
+
+    @contextmanager
+    def open(self, file_path: str) -> Iterator['fitz.Document']:
+        """Lease a document for the duration of a with block."""
+        doc = self.acquire(file_path)
+        try:
+            yield doc
+        finally:
+            self.release(doc)
+
+    def discard(self, file_path: str) -> None:
+        """Close the idle handles of a file, e.g. before it is deleted or moved.
+
+        Open handles keep files locked on Windows.
+        """
+        path = os.path.abspath(file_path)
+        with self._lock:
+            tokens = [token for token, (key, _) in self._idle.items() if key[0] == path]
+            discarded = [self._idle.pop(token) for token in tokens]
+            self._idle_bytes -= sum(key[1] for key, _ in discarded)
+        for _, doc in discarded:
+            doc.close()
+
+    def clear(self) -> None:
+        """Close every idle document; leased ones are closed when released."""
+        with self._lock:
+            idle = [doc for _, doc in self._idle.values()]
+            self._idle.clear()
+            self._idle_bytes = 0
+        for doc in idle:
+            doc.close()
+
+
+_default_document_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_document_pool() -> DocumentPool:
+    """Return the process-wide document pool configured in settings."""
+    global _default_document_pool
+    with _default_pool_lock:
+        if _default_document_pool is None:
+            _default_document_pool = DocumentPool(
+                max_documents=settings.get('document_pool.max_documents', DEFAULT_MAX_DOCUMENTS),
+                max_size_mb=settings.get('document_pool.max_size_mb', DEFAULT_MAX_SIZE_MB))
+    return _default_document_pool
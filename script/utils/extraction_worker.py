@@ -0,0 +1,308 @@
+"""
+Sandboxed PDF extraction in recyclable worker processes.
+
+Malformed PDFs can make MuPDF loop or allocate without bound. A thread that
+exceeds its timeout cannot be stopped and keeps eating CPU and memory, so text
+extraction runs in separate worker processes instead:
+
+- every task has a wall-clock timeout, after which the worker is killed;
+- each worker caps its address space (RLIMIT_AS, POSIX only) so runaway
+  allocations fail inside the worker (MemoryError, or a MuPDF allocation
+  error) instead of growing the application;
+- a worker that crashed, timed out or ran max_tasks tasks is replaced by a
+  fresh process on the next task.
+
+Failures are reported as ExtractionFailure with a machine-readable reason.
+"""
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import queue
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import fitz  # PyMuPDF
+
+from .settings import settings
+from .text_signature import TextSignature, build_text_signature
+from .tokenizer import Tokenizer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_MEMORY_LIMIT_MB = 1024
+DEFAULT_MAX_TASKS = 200
+
+# Seconds a new worker may take to start; not counted against task timeouts
+STARTUP_TIMEOUT = 60.0
+
+# Seconds a worker gets to exit cleanly before it is killed
+SHUTDOWN_GRACE = 2.0
+
+
+class ExtractionFailure(RuntimeError):
+    """An extraction task did not complete.
+
+    Attributes:
+        reason: 'timeout', 'crash', 'memory' or 'error', or 'unavailable' if
+            no worker process could be started (not the file's fault)
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _text_signature(file_path: str, **params) -> TextSignature:
+    with fitz.open(file_path) as doc:
+        return build_text_signature(doc, **params)
+
+
+@dataclass(frozen=True)
+class TextDigest:
+    """Processed text of a document, summarized without keeping it whole.
+
+    Attributes:
+        text_hash: MD5 of the processed text (its words joined by spaces)
+        words: The distinct words of the text, in order of first appearance,
+            joined by spaces
+        page_count: Pages in the document
+    """
+    text_hash: str
+    words: str
+    page_count: int
+
+
+def _text_digest(file_path: str, remove_punctuation: bool = True, lowercase: bool = True,
+                 min_word_length: int = 3) -> TextDigest:
+    tokenizer = Tokenizer(min_word_length=min_word_length, lowercase=lowercase)
+    digest = hashlib.md5()
+    words: Dict[str, None] = {}
+    separator = b""
+    with fitz.open(file_path) as doc:
+        # Only one page of text is held at a time
+        for page in doc:
+            text = page.get_text("text")
+            if remove_punctuation:
+                tokens = list(tokenizer.tokens(text))
+            else:
+                tokens = [w for w in (text.lower() if lowercase else text).split() if len(w) >= min_word_length]
+            if tokens:
+                digest.update(separator + " ".join(tokens).encode('utf-8'))
+                separator = b" "
+                words.update(dict.fromkeys(tokens))
+        return TextDigest(text_hash=digest.hexdigest(), words=" ".join(words), page_count=len(doc))
+
+
+_TASKS: Dict[str, Callable[..., Any]] = {
+    'signature': _text_signature,
+    'digest': _text_digest,
+}
+
+# MuPDF reports failed allocations as RuntimeError (e.g. "code=2: calloc (4104 x 1 bytes) failed")
+_ALLOCATION_FAILURE = re.compile(r'\b(?:m|c|re)alloc \(.*\) failed|\bout of memory\b', re.IGNORECASE)
+
+
+def _is_memory_error(error: Exception, file_path: str = '') -> bool:
+    """Whether an exception means the worker ran out of memory.
+    
+    The path of the file is left out of the message, so that a file named
+    e.g. realloc_notes.pdf does not look like an allocation failure.
+    """
+    if isinstance(error, MemoryError):
+        return True
+    message = str(error)
+    if file_path:
+        message = message.replace(file_path, '')
+    return _ALLOCATION_FAILURE.search(message) is not None
+
+
+def _limit_memory(memory_limit_mb: int) -> None:
+    """Cap the address space of this process at its current size plus the limit."""
+    if resource is None or not memory_limit_mb:
+        return
+    try:
+        import psutil
+        limit = psutil.Process().memory_info().vms + memory_limit_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except Exception as e:
+        logger.warning(f"_limit_memory: Could not cap worker memory: {e}")
+
+
+def _worker_main(conn, memory_limit_mb: int) -> None:
+    """Worker process loop: run (kind, path, params) tasks until None or EOF."""
+    _limit_memory(memory_limit_mb)
+    conn.send(('ready', None))
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        kind, file_path, params = task
+        try:
+            conn.send(('ok', _TASKS[kind](file_path, **params)))
+        except Exception as e:
+            if _is_memory_error(e, file_path):
+                conn.send(('memory', f"Memory limit exceeded reading {file_path}: {type(e).__name__}: {e}"))
+            else:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class ExtractionWorker:
+    """One worker process, started on demand and replaced after failures."""
+
+    def __init__(self, memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB, max_tasks: int = DEFAULT_MAX_TASKS):
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks = max_tasks
+        self.process = None
+        self._conn = None
+        self._tasks = 0
+
+    def _start(self) -> None:
+        ctx = multiprocessing.get_context('spawn')
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, self.memory_limit_mb),
+                                   daemon=True, name="pdf-extraction")
+        self.process.start()
+        child_conn.close()
+        self._tasks = 0
+        try:
+            if self._conn.poll(STARTUP_TIMEOUT):
+                self._conn.recv()
+                return
+        except (EOFError, OSError):
+            pass
+        self.stop(kill=True)
+        raise ExtractionFailure('unavailable', "Extraction worker failed to start")
+
+    def stop(self, kill: bool = False) -> None:
+        """Stop the worker process; kill it if it does not exit in time."""
+        if self.process is None:
+            return
+        if not kill:
+            try:
+                self._conn.send(None)
+                self.process.join(SHUTDOWN_GRACE)
+            except (OSError, ValueError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
+        self.process = None
+        self._conn = None
+
+    def run(self, kind: str, file_path: str, timeout: float, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Run one task in the worker process.
+
+        Raises:
+            ExtractionFailure: On timeout, crash, memory exhaustion or any error
+        """
+        if self.process is not None and (not self.process.is_alive() or self._tasks >= self.max_tasks):
+            self.stop()
+        if self.process is None:
+            self._start()
+        self._tasks += 1
+
+        try:
+            self._conn.send((kind, file_path, params or {}))
+            if not self._conn.poll(timeout):
+                self.stop(kill=True)
+                raise ExtractionFailure('timeout', f"Extraction of {file_path} timed out after {timeout} seconds")
+            status, result = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self.stop(kill=True)
+            raise ExtractionFailure('crash', f"Extraction worker died reading {file_path}: {e}")
+
+        if status == 'ok':
+            return result
+        if status == 'memory':
+            # The worker's heap may be fragmented or exhausted; start afresh
+            self.stop()
+        raise ExtractionFailure(status, result)
+
+
+class ExtractionPool:
+    """Thread-safe set of extraction workers; each task gets a worker of its own."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+                 max_tasks: int = DEFAULT_MAX_TASKS):
+        """
+        Initialize the pool; processes are started when first needed.
+
+        Args:
+            workers: Maximum number of worker processes
+            memory_limit_mb: Address space each worker may add to its startup size
+            max_tasks: Tasks after which a worker process is recycled
+        """
+        self.size = max(1, int(workers))
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks = max_tasks
+        self._idle: 'queue.Queue[ExtractionWorker]' = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> ExtractionWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = ExtractionWorker(self.memory_limit_mb, self.max_tasks)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run(self, kind: str, file_path: str, timeout: float, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Run a task on the next free worker. See ExtractionWorker.run."""
+        worker = self._acquire()
+        try:
+            return worker.run(kind, file_path, timeout, params)
+        finally:
+            self._idle.put(worker)
+
+    def text_signature(self, file_path: str, timeout: float = 30.0, **params) -> TextSignature:
+        """Stream the text of a PDF into a signature. See text_signature.build_text_signature."""
+        return self.run('signature', file_path, timeout, params)
+
+    def text_digest(self, file_path: str, timeout: float = 30.0, **params) -> TextDigest:
+        """Stream the processed text of a PDF into its hash and word set. See TextDigest."""
+        return self.run('digest', file_path, timeout, params)
+
+    def close(self) -> None:
+        """Stop every worker process."""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+
+_default_extraction_pool: Optional[ExtractionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide extraction pool configured in settings."""
+    global _default_extraction_pool
+    with _default_pool_lock:
+        if _default_extraction_pool is None:
+            _default_extraction_pool = ExtractionPool(
+                workers=settings.get('extraction.workers', DEFAULT_WORKERS),
+                memory_limit_mb=settings.get('extraction.memory_limit_mb', DEFAULT_MEMORY_LIMIT_MB),
+                max_tasks=settings.get('extraction.max_tasks_per_worker', DEFAULT_MAX_TASKS))
+            atexit.register(_default_extraction_pool.close)
+    return _default_extraction_pool
@@ -0,0 +1,420 @@
+"""
+File Walker Module
+
+This module provides multi-root PDF discovery for the scanners. Scan roots are
+normalized and de-duplicated (nested or overlapping roots are collapsed into
+their outermost ancestor), roots living on different devices are walked in
+parallel while roots sharing a device are walked one after another, and every
+file is reported exactly once together with the root it was found under.
+
+Files without a ``.pdf`` extension can optionally be recognized by sniffing
+the ``%PDF-`` header in their first kilobyte. Sniffing runs in batches on a
+thread pool during the walk and its results are cached by (device, inode,
+mtime) so that unchanged files are never read twice.
+"""
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .filters import FilterRules
+
+logger = logging.getLogger(__name__)
+
+# Sentinel placed on the result queue when a device worker has finished
+_DONE = object()
+
+# PDF header marker; the specification allows it anywhere in the first 1024 bytes
+PDF_MAGIC = b'%PDF-'
+SNIFF_BYTES = 1024
+
+SniffKey = Tuple[int, int, float]  # (device, inode, mtime)
+
+
+def sniff_pdf_header(file_path: str) -> bool:
+    """Check whether a file starts like a PDF, reading at most 1 KiB."""
+    try:
+        with open(file_path, 'rb') as f:
+            return PDF_MAGIC in f.read(SNIFF_BYTES)
+    except OSError as e:
+        logger.debug(f"sniff_pdf_header: Cannot read {file_path}: {e}")
+        return False
+
+
+class SniffCache:
+    """
+    Cache of header sniffing results keyed by (device, inode, mtime).
+
+    Results are kept in memory for the lifetime of the process and, when a
+    backend such as HashCache is given, persisted across runs. The backend
+    must provide ``get_sniff_results(keys)`` and ``store_sniff_results(results)``.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._results: Dict[SniffKey, bool] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, keys: List[SniffKey]) -> Dict[SniffKey, bool]:
+        """Return the cached results for the given keys."""
+        with self._lock:
+            found = {key: self._results[key] for key in keys if key in self._results}
+        missing = [key for key in keys if key not in found]
+        if missing and self.backend is not None:
+            try:
+                stored = self.backend.get_sniff_results(missing)
+            except Exception as e:
+                logger.warning(f"SniffCache: Backend lookup failed: {e}")
+                stored = {}
+            if stored:
+                with self._lock:
+                    self._results.update(stored)
+                found.update(stored)
+        return found
+
+    def store(self, results: Dict[SniffKey, bool]) -> None:
+        """Remember sniffing results."""
+        if not results:
+            return
+        with self._lock:
+            self._results.update(results)
+        if self.backend is not None:
+            try:
+                self.backend.store_sniff_results(results)
+            except Exception as e:
+                logger.warning(f"SniffCache: Backend store failed: {e}")
+
+
+# Process-wide cache used when the caller does not supply one
+_default_sniff_cache = SniffCache()
+
+
+@dataclass
+class DiscoveredFile:
+    """A PDF file found during discovery."""
+    path: str
+    root: str
+    size: int
+    modified_time: float
+
+
+def _root_key(path: str) -> str:
+    """Return a comparison key for a normalized root path."""
+    return os.path.normcase(path)
+
+
+def _is_within(path_key: str, root_key: str) -> bool:
+    """Check whether ``path_key`` equals or lies below ``root_key``."""
+    if path_key == root_key:
+        return True
+    prefix = root_key if root_key.endswith(os.sep) else root_key + os.sep
+    return path_key.startswith(prefix)
+
+
+def normalize_roots(roots: Iterable[str], recursive: bool = True) -> List[str]:
+    """Normalize scan roots and drop duplicates and nested roots.
+
+    Roots are resolved to absolute real paths so that symlinked or relative
+    spellings of the same directory collapse together. For recursive scans a
+    root lying inside another root is dropped, since the outer walk already
+    covers it. Order of first appearance is preserved.
+
+    Args:
+        roots: Directories selected by the user
+        recursive: Whether the scan descends into subdirectories
+
+    Returns:
+        List of normalized, non-overlapping root directories
+    """
+    resolved: List[str] = []
+    seen: Set[str] = set()
+    for root in roots:
+        if not root:
+            continue
+        path = os.path.realpath(os.path.abspath(os.path.expanduser(str(root))))
+        key = _root_key(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        resolved.append(path)
+
+    if not recursive:
+        return resolved
+
+    keys = {path: _root_key(path) for path in resolved}
+    normalized = []
+    for path in resolved:
+        nested = any(
+            other != path and _is_within(keys[path], keys[other])
+            for other in resolved
+        )
+        if nested:
+            logger.info(f"normalize_roots: Skipping {path}, already covered by another root")
+            continue
+        normalized.append(path)
+    return normalized
+
+
+class FileWalker:
+    """
+    Walks one or more scan roots and yields each PDF file once.
+
+    Features:
+    - Root normalization with nested/overlapping root removal
+    - One walker thread per storage device, sequential walks within a device
+    - Hard-link and symlink de-duplication by (device, inode)
+    - Size limits and filter rules checked against the stat cached by ``os.scandir``
+    - Excluded directories pruned before they are descended into
+    """
+
+    def __init__(self,
+                 roots: Iterable[str],
+                 recursive: bool = True,
+                 min_file_size: int = 0,
+                 max_file_size: Optional[int] = None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 max_workers: Optional[int] = None,
+                 rules: Optional[FilterRules] = None,
+                 sniff_content: bool = False,
+                 sniff_cache: Optional[SniffCache] = None,
+                 sniff_batch_size: int = 64):
+        """
+        Initialize the walker.
+
+        Args:
+            roots: Directories to scan
+            recursive: Whether to descend into subdirectories
+            min_file_size: Minimum file size in bytes
+            max_file_size: Maximum file size in bytes (None for no limit)
+            should_stop: Optional callable polled to cancel the walk
+            max_workers: Maximum number of device walkers running in parallel
+            rules: Optional compiled include/exclude rules and directory prunes
+            sniff_content: Also accept files without a .pdf extension whose
+                header identifies them as PDF
+            sniff_cache: Cache for sniffing results (defaults to a process-wide cache)
+            sniff_batch_size: Number of files sniffed together on the thread pool
+        """
+        self.recursive = recursive
+        self.min_file_size = min_file_size
+        self.max_file_size = max_file_size
+        self.should_stop = should_stop or (lambda: False)
+        self.rules = rules
+        self.sniff_content = sniff_content
+        self.sniff_cache = sniff_cache or _default_sniff_cache
+        self.sniff_batch_size = max(1, sniff_batch_size)
+        self._sniff_executor: Optional[ThreadPoolExecutor] = None
+        self.max_workers = max_workers or min(4, os.cpu_count() or 2)
+        self.roots = [root for root in normalize_roots(roots, recursive) if os.path.isdir(root)]
+
+        self._seen: Set[Tuple[int, int]] = set()
+        self._seen_lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def _group_roots_by_device(self) -> List[List[str]]:
+        """Group roots by the device they live on."""
+        groups: Dict[int, List[str]] = {}
+        for root in self.roots:
+            try:
+                device = os.stat(root).st_dev
+            except OSError as e:
+                logger.warning(f"FileWalker: Cannot stat root {root}: {e}")
+                continue
+            groups.setdefault(device, []).append(root)
+        return list(groups.values())
+
+    def _claim(self, entry: os.DirEntry, stat: os.stat_result, root_device: int) -> bool:
+        """Return True the first time a physical file is seen."""
+        inode = stat.st_ino or entry.inode()
+        if not inode:
+            return True
+        # Stat results cached by scandir carry no device number on Windows
+        key = (stat.st_dev or root_device, inode)
+        with self._seen_lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+        return True
+
+    def _accept_file(self, entry: os.DirEntry, stat: os.stat_result) -> bool:
+        """Check whether a directory entry is within the size limits and rules."""
+        if stat.st_size < self.min_file_size:
+            return False
+        if self.max_file_size is not None and stat.st_size > self.max_file_size:
+            return False
+        if self.rules is not None and not self.rules.matches_stat(entry.name, stat):
+            return False
+        return True
+
+    def _should_descend(self, entry: os.DirEntry) -> bool:
+        """Check whether a subdirectory should be walked."""
+        if not self.recursive:
+            return False
+        return self.rules is None or self.rules.should_descend(entry.name)
+
+    def _sniff_key(self, entry: os.DirEntry, stat: os.stat_result, root_device: int) -> Optional[SniffKey]:
+        """Build the (device, inode, mtime) cache key for an entry."""
+        inode = stat.st_ino or entry.inode()
+        if not inode:
+            return None
+        # Stat results cached by scandir carry no device number on Windows
+        return (stat.st_dev or root_device, inode, stat.st_mtime)
+
+    def _sniff_batch(self, batch: List[Tuple[os.DirEntry, os.stat_result, Optional[SniffKey]]]) -> List[bool]:
+        """Sniff a batch of files, consulting and updating the cache."""
+        keys = [key for _, _, key in batch if key is not None]
+        cached = self.sniff_cache.lookup(keys) if keys else {}
+        todo = [i for i, (_, _, key) in enumerate(batch) if key is None or key not in cached]
+
+        results = [cached.get(key, False) if key is not None else False for _, _, key in batch]
+        if todo:
+            paths = [batch[i][0].path for i in todo]
+            if self._sniff_executor is not None and len(paths) > 1:
+                sniffed = list(self._sniff_executor.map(sniff_pdf_header, paths))
+            else:
+                sniffed = [sniff_pdf_header(path) for path in paths]
+            fresh = {}
+            for i, is_pdf in zip(todo, sniffed):
+                results[i] = is_pdf
+                key = batch[i][2]
+                if key is not None:
+                    fresh[key] = is_pdf
+            self.sniff_cache.store(fresh)
+        return results
+
+    def _flush_sniffed(self, pending: list, root: str, root_device: int) -> Iterator[DiscoveredFile]:
+        """Sniff pending candidates and yield the ones that are PDFs."""
+        for (entry, stat, _), is_pdf in zip(pending, self._sniff_batch(pending)):
+            if is_pdf and self._claim(entry, stat, root_device):
+                yield self._discovered(entry, stat, root)
+        pending.clear()
+
+    @staticmethod
+    def _discovered(entry: os.DirEntry, stat: os.stat_result, root: str) -> DiscoveredFile:
+        return DiscoveredFile(
+            path=os.path.normpath(entry.path),
+            root=root,
+            size=stat.st_size,
+            modified_time=stat.st_mtime
+        )
+
+    def _walk_root(self, root: str) -> Iterator[DiscoveredFile]:
+        """Walk a single root with ``os.scandir``."""
+        try:
+            root_device = os.stat(root).st_dev
+        except OSError:
+            root_device = 0
+        pending: list = []
+        stack = [root]
+        while stack:
+            if self.should_stop():
+                return
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self._should_descend(entry):
+                                    stack.append(entry.path)
+                                continue
+                            if not entry.is_file():
+                                continue
+                            is_pdf_name = entry.name.lower().endswith('.pdf')
+                            if not is_pdf_name and not self.sniff_content:
+                                continue
+                            stat = entry.stat()
+                            if not self._accept_file(entry, stat):
+                                continue
+                            if not is_pdf_name:
+                                pending.append((entry, stat, self._sniff_key(entry, stat, root_device)))
+                                continue
+                            if not self._claim(entry, stat, root_device):
+                                continue
+                            yield self._discovered(entry, stat, root)
+                        except OSError as e:
+                            logger.warning(f"FileWalker: Error accessing {entry.path}: {e}")
+            except OSError as e:
+                logger.warning(f"FileWalker: Cannot read directory {directory}: {e}")
+            if len(pending) >= self.sniff_batch_size:
+                yield from self._flush_sniffed(pending, root, root_device)
+        if pending and not self.should_stop():
+            yield from self._flush_sniffed(pending, root, root_device)
+
+    def _put(self, results: 'queue.Queue', item: object) -> bool:
+        """Put an item on the result queue unless the consumer went away."""
+        while not self._closed.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _walk_device(self, roots: List[str], results: 'queue.Queue') -> None:
+        """Walk all roots of one device sequentially, feeding the result queue."""
+        try:
+            for root in roots:
+                for found in self._walk_root(root):
+                    if not self._put(results, found):
+                        return
+        except Exception as e:
+            logger.error(f"FileWalker: Error walking {roots}: {e}", exc_info=True)
+        finally:
+            self._put(results, _DONE)
+
+    def walk(self) -> Iterator[DiscoveredFile]:
+        """Yield every PDF under the configured roots exactly once."""
+        if self.sniff_content:
+            self._sniff_executor = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 2) * 2))
+        try:
+            yield from self._walk_devices()
+        finally:
+            if self._sniff_executor is not None:
+                self._sniff_executor.shutdown(wait=False)
+                self._sniff_executor = None
+
+    def _walk_devices(self) -> Iterator[DiscoveredFile]:
+        """Walk device groups, in parallel when roots span several devices."""
+        device_groups = self._group_roots_by_device()
+        if not device_groups:
+            return
+        if len(device_groups) == 1:
+            for root in device_groups[0]:
+                yield from self._walk_root(root)
+            return
+
+        # Bounded queue so fast walkers cannot run arbitrarily far ahead of the consumer
+        results: 'queue.Queue' = queue.Queue(maxsize=1024)
+        pending = list(device_groups)
+        active = 0
+
+        def start_next() -> None:
+            nonlocal active
+            roots = pending.pop(0)
+            threading.Thread(target=self._walk_device, args=(roots, results), daemon=True).start()
+            active += 1
+
+        self._closed.clear()
+        while pending and active < self.max_workers:
+            start_next()
+
+        try:
+            while active:
+                item = results.get()
+                if item is _DONE:
+                    active -= 1
+                    if pending:
+                        start_next()
+                    continue
+                yield item
+        finally:
+            self._closed.set()
+
+    def collect(self) -> List[DiscoveredFile]:
+        """Walk all roots and return the discovered files sorted by path."""
+        files = list(self.walk())
+        files.sort(key=lambda f: f.path)
+        return files
@@ -1,9 +1,22 @@
 """File filtering system for PDF comparison."""
 import os
 import re
+import fnmatch
+import logging
 from datetime import datetime
-from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional, Union
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Pattern
+
+logger = logging.getLogger(__name__)
+
+# Directory names that never hold documents worth scanning
+DEFAULT_EXCLUDED_DIRS = ('.git', '.svn', '.hg')
+
+
+def _compile_glob(pattern: str) -> Pattern:
+    """Compile a shell-style glob into a case-insensitive regex."""
+    return re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+
 
 @dataclass
 class FileFilter:
@@ -13,61 +26,186 @@ class FileFilter:
     modified_after: Optional[datetime] = None
     modified_before: Optional[datetime] = None
     name_pattern: Optional[str] = None
-    
+    _rules: Optional['FilterRules'] = field(default=None, init=False, repr=False, compare=False)
+
+    def compile(self) -> 'FilterRules':
+        """Return the compiled rules for this filter (compiled on first use)."""
+        if self._rules is None:
+            self._rules = FilterRules.from_filters([self])
+        return self._rules
+
     def matches(self, filepath: str) -> bool:
         """Check if file matches all filter conditions."""
+        return self.compile()(filepath)
+
+
+@dataclass
+class FilterRules:
+    """
+    Compiled include/exclude rules evaluated once per file.
+
+    All conditions are combined with AND semantics, patterns are compiled once
+    and file conditions are checked against an already available stat result,
+    so the walker can evaluate them on each ``os.DirEntry`` without extra
+    system calls. Directory prunes stop the walker from descending into
+    matching subtrees at all.
+    """
+    min_size: Optional[int] = None  # in bytes
+    max_size: Optional[int] = None
+    modified_after: Optional[float] = None  # POSIX timestamp
+    modified_before: Optional[float] = None
+    name_patterns: List[Pattern] = field(default_factory=list)  # all must match
+    exclude_patterns: List[Pattern] = field(default_factory=list)  # none may match
+    prune_patterns: List[Pattern] = field(default_factory=list)  # directory names
+    invalid: bool = False  # set when a pattern failed to compile; matches nothing
+
+    @classmethod
+    def from_filters(cls, filters: Iterable[FileFilter]) -> 'FilterRules':
+        """Merge a chain of FileFilter objects into one compiled rule set."""
+        rules = cls()
+        for f in filters:
+            rules.add_size(f.min_size, f.max_size)
+            rules.add_modified(f.modified_after, f.modified_before)
+            if f.name_pattern is not None:
+                rules.add_regex(f.name_pattern)
+        return rules
+
+    def add_size(self, min_size: Optional[int] = None, max_size: Optional[int] = None) -> None:
+        """Narrow the accepted size range."""
+        if min_size is not None:
+            self.min_size = min_size if self.min_size is None else max(self.min_size, min_size)
+        if max_size is not None:
+            self.max_size = max_size if self.max_size is None else min(self.max_size, max_size)
+
+    def add_modified(self, after: Optional[datetime] = None, before: Optional[datetime] = None) -> None:
+        """Narrow the accepted modification date range."""
+        if after is not None:
+            ts = after.timestamp()
+            self.modified_after = ts if self.modified_after is None else max(self.modified_after, ts)
+        if before is not None:
+            ts = before.timestamp()
+            self.modified_before = ts if self.modified_before is None else min(self.modified_before, ts)
+
+    def _compile(self, pattern: str, glob: bool) -> Optional[Pattern]:
         try:
-            stat = os.stat(filepath)
-            
-            if self.min_size is not None and stat.st_size < self.min_size:
-                return False
-                
-            if self.max_size is not None and stat.st_size > self.max_size:
-                return False
-                
-            mtime = datetime.fromtimestamp(stat.st_mtime)
-            
-            if self.modified_after is not None and mtime < self.modified_after:
+            return _compile_glob(pattern) if glob else re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            logger.warning(f"Invalid filter pattern {pattern!r}: {e}")
+            self.invalid = True
+            return None
+
+    def add_regex(self, pattern: str) -> None:
+        """Require file names to match a regular expression (searched, case-insensitive)."""
+        compiled = self._compile(pattern, glob=False)
+        if compiled is not None:
+            self.name_patterns.append(compiled)
+
+    def add_glob(self, pattern: str) -> None:
+        """Require file names to match a shell-style glob."""
+        compiled = self._compile(pattern, glob=True)
+        if compiled is not None:
+            self.name_patterns.append(compiled)
+
+    def add_exclude(self, pattern: str) -> None:
+        """Reject file names matching a shell-style glob."""
+        compiled = self._compile(pattern, glob=True)
+        if compiled is not None:
+            self.exclude_patterns.append(compiled)
+
+    def add_prune(self, pattern: str) -> None:
+        """Never descend into directories whose name matches a shell-style glob."""
+        compiled = self._compile(pattern, glob=True)
+        if compiled is not None:
+            self.prune_patterns.append(compiled)
+
+    def matches_stat(self, name: str, stat: os.stat_result) -> bool:
+        """Check a file name and its stat result against all file conditions."""
+        if self.invalid:
+            return False
+        size = stat.st_size
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        mtime = stat.st_mtime
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        for pattern in self.name_patterns:
+            if not pattern.search(name):
                 return False
-                
-            if self.modified_before is not None and mtime > self.modified_before:
+        for pattern in self.exclude_patterns:
+            if pattern.match(name):
                 return False
-                
-            if self.name_pattern is not None:
-                filename = os.path.basename(filepath)
-                if not re.search(self.name_pattern, filename, re.IGNORECASE):
-                    return False
-                    
-            return True
-            
-        except (OSError, re.error):
+        return True
+
+    def matches_entry(self, entry: os.DirEntry) -> bool:
+        """Check a directory entry using the stat cached by ``os.scandir``."""
+        try:
+            return self.matches_stat(entry.name, entry.stat())
+        except OSError:
+            return False
+
+    def should_descend(self, dirname: str) -> bool:
+        """Check whether the walker may descend into a directory with this name."""
+        return not any(pattern.match(dirname) for pattern in self.prune_patterns)
+
+    def __call__(self, filepath: str) -> bool:
+        """Check a path, stat-ing it once."""
+        try:
+            return self.matches_stat(os.path.basename(filepath), os.stat(filepath))
+        except OSError:
             return False
 
 class FilterBuilder:
     """Builder for creating file filters."""
-    
+
     def __init__(self):
         self._filters: List[FileFilter] = []
-    
+        self._globs: List[str] = []
+        self._excludes: List[str] = []
+        self._prunes: List[str] = []
+
     def with_size(self, min_size: Optional[int] = None, max_size: Optional[int] = None) -> 'FilterBuilder':
         """Add size-based filtering."""
         self._filters.append(FileFilter(min_size=min_size, max_size=max_size))
         return self
-    
-    def with_modified_date(self, 
-                         after: Optional[datetime] = None, 
+
+    def with_modified_date(self,
+                         after: Optional[datetime] = None,
                          before: Optional[datetime] = None) -> 'FilterBuilder':
         """Add modification date filtering."""
         self._filters.append(FileFilter(modified_after=after, modified_before=before))
         return self
-    
+
     def with_name_pattern(self, pattern: str) -> 'FilterBuilder':
         """Add filename pattern filtering using regex."""
         self._filters.append(FileFilter(name_pattern=pattern))
         return self
-    
-    def build(self) -> Callable[[str], bool]:
-        """Build the filter function."""
-        def filter_func(filepath: str) -> bool:
-            return all(f.matches(filepath) for f in self._filters)
-        return filter_func
+
+    def with_glob(self, pattern: str) -> 'FilterBuilder':
+        """Add filename filtering using a shell-style glob such as ``*report*.pdf``."""
+        self._globs.append(pattern)
+        return self
+
+    def excluding(self, pattern: str) -> 'FilterBuilder':
+        """Exclude files whose name matches a shell-style glob."""
+        self._excludes.append(pattern)
+        return self
+
+    def excluding_dirs(self, *patterns: str) -> 'FilterBuilder':
+        """Prune directories whose name matches any of the given globs."""
+        self._prunes.extend(patterns)
+        return self
+
+    def build(self) -> FilterRules:
+        """Build the compiled filter; the result is callable with a file path."""
+        rules = FilterRules.from_filters(self._filters)
+        for pattern in self._globs:
+            rules.add_glob(pattern)
+        for pattern in self._excludes:
+            rules.add_exclude(pattern)
+        for pattern in self._prunes:
+            rules.add_prune(pattern)
+        return rules
@@ -11,10 +11,11 @@ import concurrent.futures
 from PyQt6.QtCore import QObject, pyqtSignal as Signal, QThreadPool, QRunnable, pyqtSlot as Slot, Qt
 from PyQt6.QtWidgets import QProgressDialog, QMessageBox, QApplication
 
-from app_qt.pdf_utils import (
+from .pdf_utils import (
     get_pdf_info, calculate_file_hash, extract_first_page_image,
     calculate_image_hash, find_duplicates
 )
+from .file_walker import FileWalker
 from ..lang.lang_manager import SimpleLanguageManager
 
 logger = logging.getLogger('PDFDuplicateFinder')
@@ -46,19 +47,13 @@ class ScanWorker(QRunnable):
         Run the scanning process.
         """
         try:
-            # Step 1: Find all PDF files
-            pdf_files = []
-            for directory in self.directories:
-                if self._is_cancelled:
-                    return
-                    
-                for root, _, files in os.walk(directory):
-                    if self._is_cancelled:
-                        return
-                        
-                    for file in files:
-                        if file.lower().endswith('.pdf'):
-                            pdf_files.append(os.path.join(root, file))
+            # Step 1: Find all PDF files, walking overlapping roots only once
+            walker = FileWalker(self.directories, should_stop=lambda: self._is_cancelled)
+            discovered = walker.collect()
+            if self._is_cancelled:
+                return
+            pdf_files = [found.path for found in discovered]
+            file_roots = {found.path: found.root for found in discovered}
             
             if not pdf_files:
                 self.signals.error.emit(self.tr("scan.no_pdf_files", "No PDF files found in the selected directories."))
@@ -92,6 +87,7 @@ class ScanWorker(QRunnable):
                             continue
                             
                         file_hash = calculate_file_hash(file_path)
+                        file_info['root'] = file_roots.get(file_path, '')
                         
                         # Create a temporary directory for extracted images if it doesn't exist
                         if self.temp_dir is None or not os.path.isdir(self.temp_dir):
@@ -145,7 +141,8 @@ class ScanWorker(QRunnable):
                     'size': file_info.get('size', 0),
                     'md5': file_info.get('md5', ''),
                     'modified': file_info.get('modified', 0),
-                    'filename': file_info.get('filename', '')
+                    'filename': file_info.get('filename', ''),
+                    'root': file_info.get('root', '')
                 }
                 
                 # If we have an image hash, include it in the file data
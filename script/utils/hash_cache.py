@@ -16,10 +16,22 @@ from dataclasses import dataclass, asdict
 import threading
 from contextlib import contextmanager
 
+import numpy as np
+
 from .text_processor import TextProcessor, TextExtractionOptions
+from .similarity_graph import DEFAULT_GRAPH_FLOOR, SimilarityGraph
+from .structure_hash import STRUCTURE_HASH_PREFIX, calculate_structure_hash
+from .extraction_worker import ExtractionFailure
 
 logger = logging.getLogger(__name__)
 
+# Extraction failures that put a file in quarantine. Ordinary errors
+# (encrypted or damaged files) fail fast and are cheap to retry.
+QUARANTINE_REASONS = ('timeout', 'crash', 'memory')
+
+# text_hash of documents without extractable text (e.g. scans)
+EMPTY_TEXT_HASH = hashlib.md5(b"").hexdigest()
+
 @dataclass
 class CacheEntry:
     """Represents a cached PDF file entry."""
@@ -28,7 +40,7 @@ class CacheEntry:
     file_size: int
     modified_time: float
     text_hash: str
-    text_content: str
+    text_content: str  # distinct words of the processed text
     page_count: int
     cache_time: float
     access_count: int
@@ -138,6 +150,111 @@ class HashCache:
                 CREATE INDEX IF NOT EXISTS idx_cache_time ON pdf_cache(cache_time)
             ''')
             
+            # Header sniffing results for files without a .pdf extension
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pdf_sniff (
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    modified_time REAL NOT NULL,
+                    is_pdf INTEGER NOT NULL,
+                    PRIMARY KEY (device, inode)
+                )
+            ''')
+            
+            # Perceptual hashes keyed by file content, stored as packed bits
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS perceptual_hashes (
+                    content_hash TEXT NOT NULL,
+                    hash_size INTEGER NOT NULL,
+                    algorithm TEXT NOT NULL,
+                    hash_bits BLOB NOT NULL,
+                    rows INTEGER NOT NULL,
+                    bit_count INTEGER NOT NULL,
+                    cache_time REAL NOT NULL,
+                    PRIMARY KEY (content_hash, hash_size, algorithm)
+                )
+            ''')
+            
+            # Per-page text and image digests, indexed for page -> document lookups
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS page_fingerprints (
+                    content_hash TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    text_digest TEXT,
+                    image_digest TEXT,
+                    cache_time REAL NOT NULL,
+                    PRIMARY KEY (content_hash, page)
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_page_text_digest ON page_fingerprints(text_digest)
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_page_image_digest ON page_fingerprints(image_digest)
+            ''')
+            
+            # Digests of embedded image streams (scans), indexed for partial matches
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS image_digests (
+                    content_hash TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    cache_time REAL NOT NULL,
+                    PRIMARY KEY (content_hash, page, digest)
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_image_digest ON image_digests(digest)
+            ''')
+            
+            # Normalized structural hashes keyed by file hash (SHA-256)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS structure_hashes (
+                    file_hash TEXT PRIMARY KEY,
+                    structure_hash TEXT NOT NULL,
+                    cache_time REAL NOT NULL
+                )
+            ''')
+            
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_structure_hash ON structure_hashes(structure_hash)
+            ''')
+            
+            # Verified similarity of two files (by file hash, SHA-256, in sorted
+            # order) for one comparison method and parameter set
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS pair_similarities (
+                    hash_a TEXT NOT NULL,
+                    hash_b TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    info TEXT,
+                    cache_time REAL NOT NULL,
+                    PRIMARY KEY (hash_a, hash_b, method, params)
+                )
+            ''')
+            
+            # Files whose extraction timed out, crashed or ran out of memory,
+            # keyed by file hash (SHA-256), size and modification time so that
+            # renamed copies stay quarantined and edited files are retried
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS quarantine (
+                    file_hash TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    modified_time REAL NOT NULL,
+                    file_path TEXT NOT NULL,
+                    reason TEXT NOT NULL,
+                    failure_count INTEGER NOT NULL,
+                    first_failure REAL NOT NULL,
+                    last_failure REAL NOT NULL,
+                    PRIMARY KEY (file_hash, file_size, modified_time)
+                )
+            ''')
+            
             conn.commit()
     
     @contextmanager
@@ -289,6 +406,10 @@ class HashCache:
             
         Returns:
             CacheEntry with file information
+            
+        Raises:
+            ValueError: If the file cannot be read
+            ExtractionFailure: If the extraction worker could not be started
         """
         # Check if we have a valid cached entry
         if not force_reprocess:
@@ -312,19 +433,33 @@ class HashCache:
         except OSError as e:
             raise ValueError(f"Could not access file {file_path}: {e}")
         
-        # Extract text content
-        try:
-            text_content = self.text_processor.extract_text(file_path)
-            text_hash = self._calculate_text_hash(text_content)
-            
-            # Get page count with timeout
-            page_count = self._get_page_count_with_timeout(file_path)
-                
-        except Exception as e:
-            logger.error(f"Error processing PDF content for {file_path}: {e}")
-            text_content = ""
-            text_hash = ""
-            page_count = 0
+        text_content = ""
+        text_hash = ""
+        page_count = 0
+        
+        quarantined = self.get_quarantine_entry(file_hash, file_size, modified_time)
+        if quarantined:
+            # Hash-only tier: the file is still found by exact hash comparison
+            logger.info(f"cache_file: {file_path} is quarantined ({quarantined['reason']}), "
+                        f"caching its hash only")
+        else:
+            # Hash the text and collect its words page by page, with the page count
+            try:
+                digest = self.text_processor.extract_text_digest(file_path, raise_failures=True)
+                if digest is not None:
+                    text_hash, text_content, page_count = digest.text_hash, digest.words, digest.page_count
+                    
+            except ExtractionFailure as e:
+                if e.reason == 'unavailable':
+                    # Nothing is known about the file, don't cache it as textless
+                    raise
+                logger.warning(f"cache_file: Extraction failed for {file_path} ({e.reason}): {e}")
+                text_content, text_hash = "", ""
+                if e.reason in QUARANTINE_REASONS:
+                    self.quarantine_file(file_path, file_hash, file_size, modified_time, e.reason)
+            except Exception as e:
+                logger.error(f"Error processing PDF content for {file_path}: {e}")
+                text_content, text_hash = "", ""
         
         # Create cache entry
         current_time = datetime.now().timestamp()
@@ -405,6 +540,26 @@ class HashCache:
                 'DELETE FROM pdf_cache WHERE cache_time < ?',
                 (cutoff_time,)
             )
+            conn.execute(
+                'DELETE FROM perceptual_hashes WHERE cache_time < ?',
+                (cutoff_time,)
+            )
+            conn.execute(
+                'DELETE FROM page_fingerprints WHERE cache_time < ?',
+                (cutoff_time,)
+            )
+            conn.execute(
+                'DELETE FROM structure_hashes WHERE cache_time < ?',
+                (cutoff_time,)
+            )
+            conn.execute(
+                'DELETE FROM image_digests WHERE cache_time < ?',
+                (cutoff_time,)
+            )
+            conn.execute(
+                'DELETE FROM pair_similarities WHERE cache_time < ?',
+                (cutoff_time,)
+            )
             
             # Remove excess entries if over size limit
             result = conn.execute('SELECT COUNT(*) FROM pdf_cache').fetchone()
@@ -434,6 +589,13 @@ class HashCache:
         
         with self._get_connection() as conn:
             conn.execute('DELETE FROM pdf_cache')
+            conn.execute('DELETE FROM pdf_sniff')
+            conn.execute('DELETE FROM perceptual_hashes')
+            conn.execute('DELETE FROM page_fingerprints')
+            conn.execute('DELETE FROM structure_hashes')
+            conn.execute('DELETE FROM image_digests')
+            conn.execute('DELETE FROM pair_similarities')
+            conn.execute('DELETE FROM quarantine')
             conn.commit()
         
         logger.info("Cache cleared")
@@ -451,6 +613,18 @@ class HashCache:
             result = conn.execute('SELECT SUM(access_count) FROM pdf_cache').fetchone()
             total_accesses = result[0] or 0
             
+            result = conn.execute('SELECT COUNT(*) FROM perceptual_hashes').fetchone()
+            perceptual_count = result[0]
+            
+            result = conn.execute('SELECT COUNT(DISTINCT content_hash) FROM page_fingerprints').fetchone()
+            page_index_count = result[0]
+            
+            result = conn.execute('SELECT COUNT(*) FROM pair_similarities').fetchone()
+            pair_count = result[0]
+            
+            result = conn.execute('SELECT COUNT(*) FROM quarantine').fetchone()
+            quarantine_count = result[0]
+            
             # Get cache size on disk
             db_size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
         
@@ -462,12 +636,323 @@ class HashCache:
             'valid_entries': valid_count,
             'memory_entries': memory_count,
             'total_accesses': total_accesses,
+            'perceptual_hash_entries': perceptual_count,
+            'page_index_documents': page_index_count,
+            'pair_similarities': pair_count,
+            'quarantined_files': quarantine_count,
             'cache_size_bytes': db_size,
             'cache_dir': str(self.cache_dir),
             'max_cache_size': self.max_cache_size,
             'cache_ttl_days': self.cache_ttl.days
         }
     
+    def get_quarantine_entry(self, file_hash: str, file_size: int,
+                             modified_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Look up the quarantine record of a file version.
+        
+        Args:
+            file_hash: SHA-256 of the file
+            file_size: File size in bytes
+            modified_time: Modification time as returned by os.stat
+            
+        Returns:
+            The record as a dictionary, or None if the file is not quarantined
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    'SELECT * FROM quarantine WHERE file_hash = ? AND file_size = ? AND modified_time = ?',
+                    (file_hash, file_size, modified_time)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"get_quarantine_entry: Quarantine lookup failed: {e}")
+            return None
+        return dict(row) if row else None
+    
+    def is_quarantined(self, file_path: str, file_hash: Optional[str] = None) -> bool:
+        """
+        Check whether a file is in quarantine.
+        
+        Args:
+            file_path: Path to the PDF file
+            file_hash: SHA-256 of the file, if already known
+            
+        Returns:
+            True if the current version of the file is quarantined
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        file_hash = file_hash or self._calculate_file_hash(file_path)
+        return bool(file_hash) and self.get_quarantine_entry(file_hash, stat.st_size, stat.st_mtime) is not None
+    
+    def get_quarantined(self, file_hashes: List[str]) -> Dict[str, List[Tuple[int, float]]]:
+        """
+        Look up quarantine records in bulk.
+        
+        Args:
+            file_hashes: File hashes (SHA-256) of the files
+            
+        Returns:
+            Dictionary mapping file hash to the (size, modification time) of
+            its quarantined versions; hashes without a record are left out
+        """
+        results: Dict[str, List[Tuple[int, float]]] = {}
+        wanted = list({h for h in file_hashes if h})
+        if not wanted:
+            return results
+        
+        try:
+            with self._get_connection() as conn:
+                for i in range(0, len(wanted), 500):
+                    chunk = wanted[i:i + 500]
+                    rows = conn.execute(
+                        f'SELECT file_hash, file_size, modified_time FROM quarantine '
+                        f'WHERE file_hash IN ({",".join("?" * len(chunk))})',
+                        chunk
+                    ).fetchall()
+                    for row in rows:
+                        results.setdefault(row['file_hash'], []).append((row['file_size'], row['modified_time']))
+        except Exception as e:
+            logger.warning(f"get_quarantined: Quarantine lookup failed: {e}")
+        return results
+    
+    def quarantine_file(self, file_path: str, file_hash: str, file_size: int,
+                        modified_time: float, reason: str) -> None:
+        """
+        Record an extraction failure; repeated failures increase the failure count.
+        
+        Args:
+            file_path: Path the file was found under
+            file_hash: SHA-256 of the file
+            file_size: File size in bytes
+            modified_time: Modification time as returned by os.stat
+            reason: Failure reason ('timeout', 'crash' or 'memory')
+        """
+        now = datetime.now().timestamp()
+        with self._get_connection() as conn:
+            conn.execute('''
+                INSERT INTO quarantine
+                (file_hash, file_size, modified_time, file_path, reason,
+                 failure_count, first_failure, last_failure)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (file_hash, file_size, modified_time) DO UPDATE SET
+                    file_path = excluded.file_path,
+                    reason = excluded.reason,
+                    failure_count = failure_count + 1,
+                    last_failure = excluded.last_failure
+            ''', (file_hash, file_size, modified_time, file_path, reason, now, now))
+            conn.commit()
+        logger.warning(f"quarantine_file: Quarantined {file_path} ({reason})")
+    
+    def list_quarantine(self) -> List[Dict[str, Any]]:
+        """Return every quarantine record, most recent failure first."""
+        with self._get_connection() as conn:
+            rows = conn.execute('SELECT * FROM quarantine ORDER BY last_failure DESC').fetchall()
+        return [dict(row) for row in rows]
+    
+    def release_from_quarantine(self, file_hashes: Optional[List[str]] = None) -> int:
+        """
+        Remove files from quarantine so that the next scan extracts them again.
+        
+        Args:
+            file_hashes: SHA-256 hashes of the files to release; None releases all
+            
+        Returns:
+            Number of records removed
+        """
+        with self._get_connection() as conn:
+            if file_hashes is None:
+                file_hashes = [row[0] for row in conn.execute('SELECT DISTINCT file_hash FROM quarantine')]
+            records = [(file_hash,) for file_hash in file_hashes]
+            removed = sum(conn.execute('DELETE FROM quarantine WHERE file_hash = ?', record).rowcount
+                          for record in records)
+            # Drop their hash-only cache entries so the next scan extracts them
+            conn.executemany("DELETE FROM pdf_cache WHERE file_hash = ? AND text_hash = ''", records)
+            conn.commit()
+        
+        released = set(file_hashes)
+        with self.lock:
+            for path in [p for p, e in self.memory_cache.items()
+                         if e.file_hash in released and not e.text_hash]:
+                del self.memory_cache[path]
+                self.memory_cache_order.remove(path)
+        return removed
+    
+    def get_sniff_results(self, keys: List[Tuple[int, int, float]]) -> Dict[Tuple[int, int, float], bool]:
+        """
+        Look up cached PDF header sniffing results.
+        
+        Args:
+            keys: List of (device, inode, modified_time) tuples
+            
+        Returns:
+            Dictionary mapping each key with a still valid result to whether it is a PDF
+        """
+        results = {}
+        if not keys:
+            return results
+        
+        wanted = {(device, inode): (device, inode, mtime) for device, inode, mtime in keys}
+        inodes = list({inode for _, inode, _ in keys})
+        with self._get_connection() as conn:
+            # Stay well below SQLite's host parameter limit
+            for i in range(0, len(inodes), 500):
+                chunk = inodes[i:i + 500]
+                rows = conn.execute(
+                    f'SELECT device, inode, modified_time, is_pdf FROM pdf_sniff '
+                    f'WHERE inode IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    key = wanted.get((row['device'], row['inode']))
+                    if key is not None and key[2] == row['modified_time']:
+                        results[key] = bool(row['is_pdf'])
+        return results
+    
+    def store_sniff_results(self, results: Dict[Tuple[int, int, float], bool]) -> None:
+        """
+        Persist PDF header sniffing results.
+        
+        Args:
+            results: Dictionary mapping (device, inode, modified_time) to whether it is a PDF
+        """
+        if not results:
+            return
+        with self._get_connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO pdf_sniff (device, inode, modified_time, is_pdf) VALUES (?, ?, ?, ?)',
+                [(device, inode, mtime, int(is_pdf)) for (device, inode, mtime), is_pdf in results.items()]
+            )
+            conn.commit()
+    
+    def get_perceptual_hashes(self, content_hashes: List[str], hash_size: int,
+                              algorithm: str) -> Dict[str, np.ndarray]:
+        """
+        Look up cached perceptual hashes in bulk.
+        
+        Args:
+            content_hashes: Content hashes (MD5) of the files
+            hash_size: Hash size the perceptual hashes were computed with
+            algorithm: Name of the hashing algorithm
+            
+        Returns:
+            Dictionary mapping content hash to a boolean array; single-row hashes
+            are returned flat, multi-row hashes with shape (rows, bits)
+        """
+        results = {}
+        wanted = list({h for h in content_hashes if h})
+        if not wanted:
+            return results
+        
+        with self._get_connection() as conn:
+            # Stay well below SQLite's host parameter limit
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                rows = conn.execute(
+                    f'SELECT content_hash, hash_bits, rows, bit_count FROM perceptual_hashes '
+                    f'WHERE hash_size = ? AND algorithm = ? '
+                    f'AND content_hash IN ({",".join("?" * len(chunk))})',
+                    [hash_size, algorithm] + chunk
+                ).fetchall()
+                for row in rows:
+                    bits = np.unpackbits(np.frombuffer(row['hash_bits'], dtype=np.uint8))
+                    bits = bits[:row['rows'] * row['bit_count']].astype(bool)
+                    if row['rows'] > 1:
+                        bits = bits.reshape(row['rows'], row['bit_count'])
+                    results[row['content_hash']] = bits
+        return results
+    
+    def store_perceptual_hashes(self, hashes: Dict[str, np.ndarray], hash_size: int,
+                                algorithm: str) -> None:
+        """
+        Persist perceptual hashes as packed bit BLOBs.
+        
+        Args:
+            hashes: Dictionary mapping content hash to a boolean array (1-D or rows x bits)
+            hash_size: Hash size the perceptual hashes were computed with
+            algorithm: Name of the hashing algorithm
+        """
+        if not hashes:
+            return
+        now = datetime.now().timestamp()
+        records = []
+        for content_hash, bits in hashes.items():
+            if not content_hash or bits is None:
+                continue
+            bits = np.atleast_2d(np.asarray(bits, dtype=bool))
+            records.append((
+                content_hash, hash_size, algorithm,
+                np.packbits(bits.ravel()).tobytes(),
+                bits.shape[0], bits.shape[1], now
+            ))
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO perceptual_hashes
+                (content_hash, hash_size, algorithm, hash_bits, rows, bit_count, cache_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', records)
+            conn.commit()
+    
+    def get_page_fingerprints(self, content_hashes: List[str]
+                              ) -> Dict[str, List[Tuple[int, Optional[str], Optional[str]]]]:
+        """
+        Look up cached per-page fingerprints in bulk.
+        
+        Args:
+            content_hashes: Content hashes (MD5) of the files
+            
+        Returns:
+            Dictionary mapping content hash to (page, text digest, image digest)
+            tuples ordered by page
+        """
+        results: Dict[str, List[Tuple[int, Optional[str], Optional[str]]]] = {}
+        wanted = list({h for h in content_hashes if h})
+        if not wanted:
+            return results
+        
+        with self._get_connection() as conn:
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                rows = conn.execute(
+                    f'SELECT content_hash, page, text_digest, image_digest FROM page_fingerprints '
+                    f'WHERE content_hash IN ({",".join("?" * len(chunk))}) ORDER BY content_hash, page',
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    results.setdefault(row['content_hash'], []).append(
+                        (row['page'], row['text_digest'], row['image_digest'])
+                    )
+        return results
+    
+    def store_page_fingerprints(self, fingerprints: Dict[str, List[Tuple[int, Optional[str], Optional[str]]]]) -> None:
+        """
+        Persist per-page fingerprints, replacing any previous rows of the same files.
+        
+        Args:
+            fingerprints: Dictionary mapping content hash to (page, text digest,
+                image digest) tuples; digests are None for blank pages
+        """
+        if not fingerprints:
+            return
+        now = datetime.now().timestamp()
+        with self._get_connection() as conn:
+            conn.executemany(
+                'DELETE FROM page_fingerprints WHERE content_hash = ?',
+                [(content_hash,) for content_hash in fingerprints]
+            )
+            conn.executemany('''
+                INSERT INTO page_fingerprints (content_hash, page, text_digest, image_digest, cache_time)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (content_hash, page, text_digest, image_digest, now)
+                for content_hash, pages in fingerprints.items()
+                for page, text_digest, image_digest in pages
+            ])
+            conn.commit()
+    
     def find_duplicates_by_hash(self, file_paths: List[str]) -> Dict[str, List[str]]:
         """
         Find duplicate files by their hash values.
@@ -478,109 +963,393 @@ class HashCache:
         Returns:
             Dictionary mapping hash to list of file paths with that hash
         """
-        hash_groups = {}
-        
         for file_path in file_paths:
             try:
-                entry = self.cache_file(file_path)
-                if entry.file_hash:
-                    if entry.file_hash not in hash_groups:
-                        hash_groups[entry.file_hash] = []
-                    hash_groups[entry.file_hash].append(file_path)
+                self.cache_file(file_path)
             except Exception as e:
                 logger.error(f"Error processing {file_path}: {e}")
                 continue
         
-        # Filter out groups with only one file
-        return {hash_val: files for hash_val, files in hash_groups.items() if len(files) > 1}
+        return self._group_cached_paths('file_hash', file_paths)
     
-    def find_duplicates_by_content(self, file_paths: List[str], 
-                                 similarity_threshold: float = 0.9) -> Dict[str, List[str]]:
+    def find_exact_duplicates(self, file_paths: List[str]) -> Dict[str, List[str]]:
         """
-        Find duplicate files by text content similarity.
+        Group files with the same processed text, or the same bytes if they have no text.
+        
+        This is an exact tier answered by grouped queries on the indexed
+        text_hash and file_hash columns, with no pairwise comparison. Only
+        files already cached by cache_file are grouped.
         
         Args:
-            file_paths: List of file paths to check
-            similarity_threshold: Minimum similarity score (0.0-1.0)
+            file_paths: List of file paths to check, in scan order
             
         Returns:
-            Dictionary mapping representative file to list of similar files
+            Dictionary mapping 'text:<text hash>' or 'file:<file hash>' to the
+            files sharing it, in the order of file_paths
+        """
+        groups = {f"text:{text_hash}": files
+                  for text_hash, files in self._group_cached_paths('text_hash', file_paths).items()}
+        groups.update({f"file:{file_hash}": files
+                       for file_hash, files in self._group_cached_paths('file_hash', file_paths,
+                                                                        without_text=True).items()})
+        logger.debug(f"find_exact_duplicates: {len(groups)} groups, "
+                     f"{sum(len(files) for files in groups.values())} files")
+        return groups
+    
+    def _group_cached_paths(self, column: str, file_paths: List[str],
+                            without_text: bool = False) -> Dict[str, List[str]]:
         """
-        content_groups = {}
-        processed = set()
+        Group cached files by the value of a hash column with one SQL query.
         
-        for i, file_path in enumerate(file_paths):
-            if file_path in processed:
-                continue
-                
-            try:
-                entry = self.cache_file(file_path)
-                if not entry.text_hash:
-                    continue
-                
-                group = [file_path]
-                
-                for other_path in file_paths[i+1:]:
-                    if other_path in processed:
-                        continue
-                        
-                    try:
-                        other_entry = self.cache_file(other_path)
-                        if not other_entry.text_hash:
-                            continue
-                        
-                        # Compare text content
-                        similarity = self.text_processor.compare_texts(
-                            entry.text_content, 
-                            other_entry.text_content
-                        )
-                        
-                        if similarity >= similarity_threshold:
-                            group.append(other_path)
-                            processed.add(other_path)
-                            
-                    except Exception as e:
-                        logger.error(f"Error comparing {file_path} with {other_path}: {e}")
-                        continue
-                
-                if len(group) > 1:
-                    # Use first file as representative
-                    content_groups[file_path] = group
-                    processed.add(file_path)
-                    
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
+        Args:
+            column: 'file_hash' or 'text_hash'
+            file_paths: Files to group; other cache entries are ignored
+            without_text: Only group files whose text could not be extracted
+            
+        Returns:
+            Dictionary mapping column value to the files sharing it (two or
+            more), in the order of file_paths
+        """
+        if column not in ('file_hash', 'text_hash'):
+            raise ValueError(f"Cannot group by {column}")
+        if without_text:
+            text_filter = "AND c.text_hash IN ('', :empty)"
+        elif column == 'text_hash':
+            # Documents without text must not be grouped by their (empty) text
+            text_filter = "AND c.text_hash NOT IN ('', :empty)"
+        else:
+            text_filter = ""
+        
+        groups: Dict[str, List[str]] = {}
+        with self._get_connection() as conn:
+            conn.execute('CREATE TEMP TABLE scan_paths (file_path TEXT PRIMARY KEY, position INTEGER NOT NULL)')
+            conn.executemany('INSERT OR IGNORE INTO scan_paths (file_path, position) VALUES (?, ?)',
+                             ((file_path, i) for i, file_path in enumerate(file_paths)))
+            rows = conn.execute(f'''
+                WITH scanned AS (
+                    SELECT c.{column} AS value, c.file_path, s.position
+                    FROM pdf_cache c JOIN scan_paths s ON s.file_path = c.file_path
+                    WHERE c.{column} != '' {text_filter}
+                )
+                SELECT value, file_path FROM scanned
+                WHERE value IN (SELECT value FROM scanned GROUP BY value HAVING COUNT(*) > 1)
+                ORDER BY value, position
+            ''', {'empty': EMPTY_TEXT_HASH}).fetchall()
+        for value, file_path in rows:
+            groups.setdefault(value, []).append(file_path)
+        return groups
+    
+    def get_image_digests(self, content_hashes: List[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """
+        Look up cached embedded image stream digests in bulk.
+        
+        Args:
+            content_hashes: Content hashes (MD5) of the files
+            
+        Returns:
+            Dictionary mapping content hash to (page, digest) tuples ordered by page
+        """
+        results: Dict[str, List[Tuple[int, str]]] = {}
+        wanted = list({h for h in content_hashes if h})
+        if not wanted:
+            return results
+        
+        with self._get_connection() as conn:
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                rows = conn.execute(
+                    f'SELECT content_hash, page, digest FROM image_digests '
+                    f'WHERE content_hash IN ({",".join("?" * len(chunk))}) ORDER BY content_hash, page',
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    results.setdefault(row['content_hash'], []).append((row['page'], row['digest']))
+        return results
+    
+    def store_image_digests(self, digests: Dict[str, List[Tuple[int, str]]]) -> None:
+        """
+        Persist embedded image stream digests, replacing previous rows of the same files.
+        
+        Args:
+            digests: Dictionary mapping content hash to (page, digest) tuples
+        """
+        if not digests:
+            return
+        now = datetime.now().timestamp()
+        with self._get_connection() as conn:
+            conn.executemany(
+                'DELETE FROM image_digests WHERE content_hash = ?',
+                [(content_hash,) for content_hash in digests]
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO image_digests (content_hash, page, digest, cache_time) VALUES (?, ?, ?, ?)',
+                [(content_hash, page, digest, now)
+                 for content_hash, rows in digests.items() for page, digest in rows]
+            )
+            conn.commit()
+    
+    def get_pair_similarities(self, file_hashes: List[str], method: str, params: str
+                              ) -> Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, Any]]]]:
+        """
+        Look up every cached score between two files of a set.
+        
+        Args:
+            file_hashes: File hashes (SHA-256) of the files
+            method: Name of the comparison
+            params: Canonical form of the comparison parameters
+            
+        Returns:
+            Dictionary mapping (hash_a, hash_b), hash_a < hash_b, to (score, info)
+        """
+        if not file_hashes:
+            return {}
+        scores = {}
+        with self._get_connection() as conn:
+            conn.execute('CREATE TEMP TABLE scan_hashes (file_hash TEXT PRIMARY KEY)')
+            conn.executemany('INSERT OR IGNORE INTO scan_hashes (file_hash) VALUES (?)',
+                             ((file_hash,) for file_hash in file_hashes))
+            rows = conn.execute('''
+                SELECT p.hash_a, p.hash_b, p.score, p.info FROM pair_similarities p
+                JOIN scan_hashes a ON a.file_hash = p.hash_a
+                JOIN scan_hashes b ON b.file_hash = p.hash_b
+                WHERE p.method = ? AND p.params = ?
+            ''', (method, params)).fetchall()
+        for hash_a, hash_b, score, info in rows:
+            scores[(hash_a, hash_b)] = (score, json.loads(info) if info else None)
+        return scores
+    
+    def store_pair_similarities(self, scores: Dict[Tuple[str, str], Tuple[float, Optional[Dict[str, Any]]]],
+                                method: str, params: str) -> None:
+        """
+        Store pair scores in one transaction.
+        
+        Args:
+            scores: Dictionary mapping (hash_a, hash_b), hash_a < hash_b, to (score, info)
+            method: Name of the comparison
+            params: Canonical form of the comparison parameters
+        """
+        if not scores:
+            return
+        now = datetime.now().timestamp()
+        records = [(hash_a, hash_b, method, params, score, json.dumps(info) if info else None, now)
+                   for (hash_a, hash_b), (score, info) in scores.items()]
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO pair_similarities
+                (hash_a, hash_b, method, params, score, info, cache_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', records)
+            conn.commit()
+    
+    def get_structure_hashes(self, file_hashes: List[str]) -> Dict[str, str]:
+        """
+        Look up cached structural hashes in bulk.
+        
+        Args:
+            file_hashes: File hashes (SHA-256) of the files
+            
+        Returns:
+            Dictionary mapping file hash to structural hash; hashes of older
+            versions of the canonical form are left out
+        """
+        results = {}
+        wanted = list({h for h in file_hashes if h})
+        if not wanted:
+            return results
+        
+        with self._get_connection() as conn:
+            for i in range(0, len(wanted), 500):
+                chunk = wanted[i:i + 500]
+                rows = conn.execute(
+                    f'SELECT file_hash, structure_hash FROM structure_hashes '
+                    f'WHERE file_hash IN ({",".join("?" * len(chunk))})',
+                    chunk
+                ).fetchall()
+                results.update((row['file_hash'], row['structure_hash']) for row in rows
+                               if row['structure_hash'].startswith(STRUCTURE_HASH_PREFIX))
+        return results
+    
+    def store_structure_hashes(self, hashes: Dict[str, str]) -> None:
+        """
+        Persist structural hashes.
+        
+        Args:
+            hashes: Dictionary mapping file hash (SHA-256) to structural hash
+        """
+        records = [(file_hash, structure, datetime.now().timestamp())
+                   for file_hash, structure in hashes.items() if file_hash and structure]
+        if not records:
+            return
+        with self._get_connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO structure_hashes (file_hash, structure_hash, cache_time) VALUES (?, ?, ?)',
+                records
+            )
+            conn.commit()
+    
+    def get_file_hashes(self, file_paths: List[str]) -> Dict[str, str]:
+        """
+        Get the file hash (SHA-256) of files, from the cache for unchanged files.
+        
+        Args:
+            file_paths: List of file paths
+            
+        Returns:
+            Dictionary mapping file path to file hash; unreadable files are left out
+        """
+        file_hashes = {}
+        for file_path in file_paths:
+            entry = self.get_cached_entry(file_path)
+            file_hash = entry.file_hash if entry else self._calculate_file_hash(file_path)
+            if file_hash:
+                file_hashes[file_path] = file_hash
+        return file_hashes
+    
+    def find_identical_files(self, file_paths: List[str],
+                             file_hashes: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+        """
+        Group byte-identical files by their file hash without opening them as PDFs.
+        
+        Args:
+            file_paths: List of file paths to check, in scan order
+            file_hashes: File hashes from get_file_hashes (computed when omitted)
+            
+        Returns:
+            Dictionary mapping file hash to the files sharing it (two or more),
+            in the order of file_paths
+        """
+        if file_hashes is None:
+            file_hashes = self.get_file_hashes(file_paths)
+        groups: Dict[str, List[str]] = {}
+        for file_path in file_paths:
+            file_hash = file_hashes.get(file_path)
+            if file_hash:
+                groups.setdefault(file_hash, []).append(file_path)
+        return {file_hash: files for file_hash, files in groups.items() if len(files) > 1}
+    
+    def find_duplicates_by_structure(self, file_paths: List[str],
+                                     file_hashes: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+        """
+        Find files with the same normalized structure (re-saved or metadata-only edits).
+        
+        This is an exact tier that needs no text extraction: files are only
+        hashed and, unless cached, walked once through their xrefs.
+        
+        Args:
+            file_paths: List of file paths to check
+            file_hashes: File hashes from get_file_hashes (computed when omitted)
+            
+        Returns:
+            Dictionary mapping structural hash to list of file paths with that hash
+        """
+        if file_hashes is None:
+            file_hashes = self.get_file_hashes(file_paths)
+        walked = {}
+        quarantined = {}
+        versions = self.get_quarantined(list(file_hashes.values()))
+        for file_path in file_paths:
+            file_hash = file_hashes.get(file_path)
+            if not file_hash:
                 continue
+            if file_hash in versions and self._is_quarantined_version(file_path, versions[file_hash]):
+                # Not opened at all; byte-identical copies are still grouped
+                quarantined[file_path] = file_hash
+            else:
+                walked[file_path] = file_hash
         
-        return content_groups
+        structures = self.get_structure_hashes(list(walked.values()))
+        new_structures = {}
+        for file_path, file_hash in walked.items():
+            if file_hash not in structures:
+                structure = calculate_structure_hash(file_path)
+                if structure:
+                    structures[file_hash] = new_structures[file_hash] = structure
+        self.store_structure_hashes(new_structures)
+        
+        structure_groups: Dict[str, List[str]] = {}
+        for file_path, file_hash in walked.items():
+            structure = structures.get(file_hash)
+            if structure:
+                structure_groups.setdefault(structure, []).append(file_path)
+        for file_path, file_hash in quarantined.items():
+            structure_groups.setdefault(f"file:{file_hash}", []).append(file_path)
+        
+        logger.debug(f"Structural hashes: {len(new_structures)} computed, "
+                     f"{len(walked) - len(new_structures)} cached")
+        return {structure: files for structure, files in structure_groups.items() if len(files) > 1}
+    
+    @staticmethod
+    def _is_quarantined_version(file_path: str, versions: List[Tuple[int, float]]) -> bool:
+        """Whether the current size and modification time of a file are among quarantined versions."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime) in versions
     
-    def _get_page_count_with_timeout(self, file_path: str, timeout: float = 10.0) -> int:
-        """Get page count from PDF with timeout protection."""
-        result_container = {'count': 0, 'error': None}
+    def find_similarity_edges(self, file_paths: List[str],
+                              floor: float = DEFAULT_GRAPH_FLOOR) -> List[Tuple[str, str, float]]:
+        """
+        Score every pair of files whose text similarity reaches a floor.
+        
+        The word set of each file is built once. Files are visited by word
+        count, so a file is only compared with files whose word counts allow
+        a Jaccard similarity of at least the floor.
         
-        def count_worker():
+        Args:
+            file_paths: List of file paths to check
+            floor: Minimum similarity score (0.0-1.0) of the returned pairs
+            
+        Returns:
+            (file1, file2, similarity) for every pair at or above the floor,
+            file1 coming first in file_paths
+        """
+        word_sets = []
+        for position, file_path in enumerate(file_paths):
             try:
-                import fitz
-                with fitz.open(file_path) as doc:
-                    result_container['count'] = len(doc)
+                entry = self.cache_file(file_path)
             except Exception as e:
-                result_container['error'] = e
-        
-        # Start counting thread
-        count_thread = threading.Thread(target=count_worker)
-        count_thread.daemon = True
-        count_thread.start()
+                logger.error(f"find_similarity_edges: Error processing {file_path}: {e}")
+                continue
+            words = frozenset(entry.text_content.split()) if entry.text_hash else frozenset()
+            if words:
+                word_sets.append((len(words), position, file_path, words))
+        word_sets.sort(key=lambda item: (item[0], item[1]))
         
-        # Wait for completion with timeout
-        count_thread.join(timeout=timeout)
+        edges = []
+        for i, (size, position, file_path, words) in enumerate(word_sets):
+            for other_size, other_position, other_path, other_words in word_sets[i + 1:]:
+                # |A & B| / |A | B| <= |A| / |B| for |A| <= |B|
+                if size < floor * other_size:
+                    break
+                common = len(words & other_words)
+                similarity = common / (size + other_size - common)
+                if similarity >= floor:
+                    if position < other_position:
+                        edges.append((file_path, other_path, similarity))
+                    else:
+                        edges.append((other_path, file_path, similarity))
         
-        if count_thread.is_alive():
-            # Thread is still running, timeout occurred
-            logger.warning(f"Page count timed out for {file_path} after {timeout} seconds")
-            return 0  # Return 0 as fallback
+        logger.debug(f"find_similarity_edges: {len(edges)} pairs of {len(word_sets)} files at or above {floor}")
+        return edges
+    
+    def find_duplicates_by_content(self, file_paths: List[str], 
+                                 similarity_threshold: float = 0.9) -> Dict[str, List[str]]:
+        """
+        Find duplicate files by text content similarity.
         
-        if result_container['error']:
-            logger.warning(f"Error getting page count for {file_path}: {result_container['error']}")
-            return 0  # Return 0 as fallback
+        Every file of a group is similar to the group's first file.
         
-        return result_container['count']
+        Args:
+            file_paths: List of file paths to check
+            similarity_threshold: Minimum similarity score (0.0-1.0)
+            
+        Returns:
+            Dictionary mapping representative file to list of similar files
+        """
+        graph = SimilarityGraph(floor=similarity_threshold)
+        for file_path in file_paths:
+            graph.add_node(file_path)
+        for file1, file2, similarity in self.find_similarity_edges(file_paths, similarity_threshold):
+            graph.add_edge(file1, file2, similarity)
+        return {group[0]: group for group in graph.groups(similarity_threshold)}
@@ -0,0 +1,335 @@
+"""
+Page-level fingerprint index.
+
+Every page of a document is reduced to a few exact digests (normalized text,
+low-resolution image). An inverted index maps each digest to the documents and
+pages it occurs in, so documents sharing pages - merged packets, excerpts,
+re-assembled scans - are found by walking the postings of shared digests
+instead of comparing every pair of documents.
+
+Scanned pages are additionally keyed by the digests of their embedded image
+streams, read raw (still JPEG/JBIG2/CCITT encoded) so no page is rasterized.
+"""
+import hashlib
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .document_pool import get_document_pool
+from .hash_cache import HashCache
+from .pdf_utils import (calculate_file_hash, compute_fingerprints, fingerprint_raster_size,
+                        render_page_gray)
+
+logger = logging.getLogger(__name__)
+
+# Hash size of the per-page image digests
+PAGE_HASH_SIZE = 8
+
+# Pages with less normalized text than this get no text digest; running
+# headers or lone page numbers would otherwise link unrelated documents
+MIN_PAGE_TEXT = 32
+
+# Rasters whose standard deviation is below this are considered blank
+BLANK_PAGE_STDDEV = 1.0
+
+# Embedded images smaller than this (in pixels) are logos or ornaments rather
+# than scans and get no stream digest
+MIN_SCAN_IMAGE_PIXELS = 200_000
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+@dataclass
+class PageFingerprint:
+    """Exact digests of one page; None when the page has no usable content."""
+    page: int
+    text_digest: Optional[str] = None
+    image_digest: Optional[str] = None
+    stream_digests: List[str] = field(default_factory=list)
+
+    def keys(self) -> List[str]:
+        """Return the index keys of this page."""
+        keys = []
+        if self.text_digest:
+            keys.append(f"t:{self.text_digest}")
+        if self.image_digest:
+            keys.append(f"i:{self.image_digest}")
+        keys.extend(f"x:{digest}" for digest in self.stream_digests)
+        return keys
+
+
+@dataclass
+class PageOverlap:
+    """Pages two documents have in common.
+
+    Attributes:
+        doc_a: First document
+        doc_b: Second document
+        shared_a: Number of pages of ``doc_a`` also found in ``doc_b``
+        shared_b: Number of pages of ``doc_b`` also found in ``doc_a``
+        ratio_a: Fraction of the indexed pages of ``doc_a`` found in ``doc_b``
+        ratio_b: Fraction of the indexed pages of ``doc_b`` found in ``doc_a``
+    """
+    doc_a: str
+    doc_b: str
+    shared_a: int
+    shared_b: int
+    ratio_a: float
+    ratio_b: float
+
+    @property
+    def relation(self) -> str:
+        """'identical', 'subset' (a within b), 'superset' (b within a) or 'overlap'."""
+        if self.ratio_a >= 1.0 and self.ratio_b >= 1.0:
+            return 'identical'
+        if self.ratio_a >= 1.0:
+            return 'subset'
+        if self.ratio_b >= 1.0:
+            return 'superset'
+        return 'overlap'
+
+
+def normalize_page_text(text: str) -> str:
+    """Lower-case text and collapse whitespace so re-flowed pages digest alike."""
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def page_stream_digests(doc: 'fitz.Document', page: 'fitz.Page',
+                        seen: Optional[Dict[int, Optional[str]]] = None) -> List[str]:
+    """Digest the raw image streams of the scan-sized images drawn on a page.
+
+    Each digest covers the still-encoded stream bytes and the image dimensions,
+    so the same scan embedded in two documents matches without decoding it.
+
+    Args:
+        doc: Open document
+        page: Page of ``doc``
+        seen: Optional xref -> digest memo shared across the pages of ``doc``
+
+    Returns:
+        Sorted, unique digests
+    """
+    if seen is None:
+        seen = {}
+    digests = set()
+    for xref, _, width, height, *_ in page.get_images(full=True):
+        if xref not in seen:
+            if width * height < MIN_SCAN_IMAGE_PIXELS:
+                seen[xref] = None
+            else:
+                raw = doc.xref_stream_raw(xref) or b""
+                seen[xref] = f"{hashlib.sha1(raw).hexdigest()}:{width}x{height}"
+        if seen[xref]:
+            digests.add(seen[xref])
+    return sorted(digests)
+
+
+def image_stream_digests(pdf_path: str) -> List[List[str]]:
+    """Return the embedded scan image digests of every page, in page order."""
+    try:
+        with get_document_pool().open(pdf_path) as doc:
+            seen: Dict[int, Optional[str]] = {}
+            return [page_stream_digests(doc, page, seen) for page in doc]
+    except Exception as e:
+        logger.warning(f"image_stream_digests: Could not read {pdf_path}: {e}")
+        return []
+
+
+def compute_page_fingerprints(pdf_path: str, hash_size: int = PAGE_HASH_SIZE) -> List[PageFingerprint]:
+    """Compute text, image and embedded scan digests of every page in one document open.
+
+    Args:
+        pdf_path: Path to the PDF file
+        hash_size: Size of the perceptual hashes making up the image digest
+
+    Returns:
+        One PageFingerprint per page (empty if the document cannot be opened)
+    """
+    fingerprints = []
+    try:
+        with get_document_pool().open(pdf_path) as doc:
+            width, height = fingerprint_raster_size(hash_size)
+            seen: Dict[int, Optional[str]] = {}
+            for page in doc:
+                fingerprint = PageFingerprint(page=page.number,
+                                              stream_digests=page_stream_digests(doc, page, seen))
+
+                text = normalize_page_text(page.get_text())
+                if len(text) >= MIN_PAGE_TEXT:
+                    fingerprint.text_digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+                gray = render_page_gray(page, width, height)
+                if gray.std() >= BLANK_PAGE_STDDEV:
+                    hashes = compute_fingerprints(gray, hash_size)
+                    bits = np.concatenate([hashes['dhash'], hashes['phash']])
+                    fingerprint.image_digest = np.packbits(bits).tobytes().hex()
+
+                fingerprints.append(fingerprint)
+    except Exception as e:
+        logger.warning(f"compute_page_fingerprints: Could not fingerprint {pdf_path}: {e}")
+        return []
+    return fingerprints
+
+
+class PageIndex:
+    """Inverted index from page digests to the documents and pages containing them."""
+
+    def __init__(self, max_postings: Optional[int] = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            max_postings: Ignore digests found in more than this many documents
+                (boilerplate pages such as "intentionally left blank")
+        """
+        self.max_postings = max_postings
+        self._postings: Dict[str, Set[Tuple[str, int]]] = defaultdict(set)
+        self._page_counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._page_counts)
+
+    def add_document(self, doc_id: str, pages: Iterable[Tuple[int, Iterable[str]]]) -> None:
+        """Index a document given (page number, digest keys) pairs.
+
+        Only pages with at least one key count towards the document's size.
+        """
+        if doc_id in self._page_counts:
+            self.remove_document(doc_id)
+        count = 0
+        for page, keys in pages:
+            keys = list(keys)
+            if not keys:
+                continue
+            count += 1
+            for key in keys:
+                self._postings[key].add((doc_id, page))
+        self._page_counts[doc_id] = count
+
+    def add_fingerprints(self, doc_id: str, fingerprints: Iterable[PageFingerprint]) -> None:
+        """Index a document from its page fingerprints."""
+        self.add_document(doc_id, ((fp.page, fp.keys()) for fp in fingerprints))
+
+    def remove_document(self, doc_id: str) -> None:
+        """Drop a document from the index."""
+        self._page_counts.pop(doc_id, None)
+        for key in list(self._postings):
+            postings = self._postings[key]
+            postings.difference_update({p for p in postings if p[0] == doc_id})
+            if not postings:
+                del self._postings[key]
+
+    def documents_with(self, key: str) -> Set[str]:
+        """Return the documents containing a page with the given digest key."""
+        return {doc_id for doc_id, _ in self._postings.get(key, ())}
+
+    def overlaps(self, min_ratio: float = 0.0) -> List[PageOverlap]:
+        """Report every pair of documents sharing at least one page.
+
+        Only the postings of digests found in two or more documents are
+        visited, so the cost depends on the number of shared pages rather
+        than on the number of document pairs.
+
+        Args:
+            min_ratio: Skip pairs where neither document has at least this
+                fraction of its pages in the other
+
+        Returns:
+            Overlaps sorted by the larger containment ratio, highest first
+        """
+        # (doc, other) -> pages of doc also present in other
+        matched: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        for postings in self._postings.values():
+            docs = {doc_id for doc_id, _ in postings}
+            if len(docs) < 2:
+                continue
+            if self.max_postings is not None and len(docs) > self.max_postings:
+                continue
+            for doc_id, page in postings:
+                for other in docs:
+                    if other != doc_id:
+                        matched[(doc_id, other)].add(page)
+
+        results = []
+        for (doc_a, doc_b), pages_a in matched.items():
+            if doc_a > doc_b:
+                continue
+            pages_b = matched.get((doc_b, doc_a), set())
+            ratio_a = len(pages_a) / max(1, self._page_counts.get(doc_a, 0))
+            ratio_b = len(pages_b) / max(1, self._page_counts.get(doc_b, 0))
+            if max(ratio_a, ratio_b) < min_ratio:
+                continue
+            results.append(PageOverlap(doc_a, doc_b, len(pages_a), len(pages_b),
+                                       min(ratio_a, 1.0), min(ratio_b, 1.0)))
+        results.sort(key=lambda o: max(o.ratio_a, o.ratio_b), reverse=True)
+        return results
+
+
+def build_page_index(pdf_files: List[str], hash_cache: Optional[HashCache] = None,
+                     max_postings: Optional[int] = None,
+                     progress_callback: Optional[Callable[[str], bool]] = None) -> PageIndex:
+    """Fingerprint the pages of many PDFs and index them.
+
+    Fingerprints are looked up in the hash cache by file content first and
+    only missing files are opened; new fingerprints are stored in one batch.
+
+    Args:
+        pdf_files: Paths of the PDF files to index; the paths are the document ids
+        hash_cache: Cache to persist page fingerprints in (optional)
+        max_postings: See PageIndex
+        progress_callback: Receives status messages; returning False cancels
+
+    Returns:
+        The populated PageIndex
+    """
+    index = PageIndex(max_postings=max_postings)
+    md5_by_path = {path: calculate_file_hash(path) for path in pdf_files}
+
+    cached: Dict[str, List[PageFingerprint]] = {}
+    if hash_cache is not None:
+        try:
+            md5s = list(md5_by_path.values())
+            streams = hash_cache.get_image_digests(md5s)
+            for md5, rows in hash_cache.get_page_fingerprints(md5s).items():
+                by_page = {row[0]: PageFingerprint(*row) for row in rows}
+                for page, digest in streams.get(md5, []):
+                    if page in by_page:
+                        by_page[page].stream_digests.append(digest)
+                cached[md5] = list(by_page.values())
+        except Exception as e:
+            logger.warning(f"build_page_index: Page fingerprint cache lookup failed: {e}")
+
+    new_fingerprints: Dict[str, List[PageFingerprint]] = {}
+    for i, path in enumerate(pdf_files, 1):
+        md5 = md5_by_path[path]
+        if md5 in cached:
+            fingerprints = cached[md5]
+        else:
+            if progress_callback and progress_callback(f"Indexing pages ({i}/{len(pdf_files)})") is False:
+                break
+            fingerprints = compute_page_fingerprints(path)
+            if md5 and fingerprints:
+                new_fingerprints[md5] = cached[md5] = fingerprints
+        index.add_fingerprints(path, fingerprints)
+
+    if hash_cache is not None and new_fingerprints:
+        try:
+            hash_cache.store_page_fingerprints({
+                md5: [(fp.page, fp.text_digest, fp.image_digest) for fp in fps]
+                for md5, fps in new_fingerprints.items()
+            })
+            hash_cache.store_image_digests({
+                md5: [(fp.page, digest) for fp in fps for digest in fp.stream_digests]
+                for md5, fps in new_fingerprints.items()
+            })
+        except Exception as e:
+            logger.warning(f"build_page_index: Could not store page fingerprints: {e}")
+
+    logger.info(f"build_page_index: Indexed {len(index)} documents, "
+                f"{len(new_fingerprints)} fingerprinted, {len(pdf_files) - len(new_fingerprints)} from cache")
+    return index
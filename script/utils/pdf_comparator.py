@@ -1,9 +1,20 @@
-"""PDF comparison functionality."""
+"""PDF comparison functionality.
+
+Every file is summarized once by a text signature (see text_signature); pairs
+are then scored with signature math only.
+"""
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from .text_processor import TextProcessor, TextExtractionOptions
+from .text_signature import TextSignature
 from .filters import FilterBuilder
+from .hash_cache import HashCache
+from .pdf_utils import get_default_hash_cache
+from .similarity_cache import SimilarityCache
+
+# Part of the cached score parameters; bump when text_similarity changes
+TEXT_SIMILARITY_VERSION = 2
 
 @dataclass
 class PDFComparisonResult:
@@ -17,31 +28,83 @@ class PDFComparisonResult:
 class PDFComparator:
     """Handles PDF comparison with text and metadata."""
     
-    def __init__(self, text_options: Optional[TextExtractionOptions] = None):
-        self.text_processor = TextProcessor(text_options or TextExtractionOptions())
+    def __init__(self, text_options: Optional[TextExtractionOptions] = None,
+                 hash_cache: Optional[HashCache] = None):
+        """
+        Initialize the comparator.
+        
+        Args:
+            text_options: Text extraction options (defaults to the ones configured in settings)
+            hash_cache: Cache to persist pair scores in (defaults to the one configured in settings)
+        """
+        options = text_options or TextExtractionOptions.from_settings()
+        self.text_processor = TextProcessor(options)
+        self.similarity_cache = SimilarityCache(
+            hash_cache if hash_cache is not None else get_default_hash_cache(),
+            'text_jaccard',
+            {'version': TEXT_SIMILARITY_VERSION, 'min_word_length': options.min_word_length,
+             'num_perm': options.num_perm, 'sample_pages': options.sample_pages,
+             'max_tokens': options.max_tokens}
+        )
+        # path -> ((size, mtime), signature or None if the text could not be read)
+        self._signatures: Dict[str, Tuple[Tuple[int, int], Optional[TextSignature]]] = {}
+    
+    def signature(self, file_path: str) -> Optional[TextSignature]:
+        """Return the text signature of a PDF file, extracted once per file version."""
+        try:
+            stat = os.stat(file_path)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            return None
+        memo = self._signatures.get(file_path)
+        if memo is None or memo[0] != stamp:
+            memo = self._signatures[file_path] = (stamp, self.text_processor.extract_signature(file_path))
+        return memo[1]
+    
+    def text_similarity(self, file1: str, file2: str) -> float:
+        """Return the estimated text similarity of two PDF files, from the pair cache if known."""
+        cached = self.similarity_cache.get(file1, file2)
+        if cached is not None:
+            return cached[0]
+        sig1 = self.signature(file1)
+        sig2 = self.signature(file2)
+        if sig1 is None or sig2 is None:
+            # The text could not be read, try again next time
+            return 0.0
+        text_sim = sig1.jaccard(sig2)
+        self.similarity_cache.put(file1, file2, text_sim)
+        return text_sim
     
-    def compare_files(self, file1: str, file2: str) -> PDFComparisonResult:
-        """Compare two PDF files."""
+    def compare_files(self, file1: str, file2: str, flush: bool = True) -> PDFComparisonResult:
+        """Compare two PDF files.
+        
+        Args:
+            file1: Path to the first PDF file
+            file2: Path to the second PDF file
+            flush: Write new pair scores to the cache now; batch callers pass
+                False and flush similarity_cache once at the end
+        """
         # Get file sizes
         size1 = os.path.getsize(file1)
         size2 = os.path.getsize(file2)
         size_diff = abs(size1 - size2) / max(size1, size2) if max(size1, size2) > 0 else 0
         
         # Compare text content
-        text1 = self.text_processor.extract_text(file1)
-        text2 = self.text_processor.extract_text(file2)
-        text_sim = self.text_processor.compare_texts(text1, text2)
+        text_sim = self.text_similarity(file1, file2)
         
         # Combine metrics (simple average for now, could be weighted)
         similarity = (text_sim + (1 - size_diff)) / 2
         
-        return PDFComparisonResult(
+        result = PDFComparisonResult(
             file1=file1,
             file2=file2,
             similarity=similarity,
             text_similarity=text_sim,
             size_diff=size_diff
         )
+        if flush:
+            self.similarity_cache.flush()
+        return result
     
     def find_duplicates(self, 
                        files: List[str], 
@@ -61,32 +124,60 @@ class PDFComparator:
         # Apply file filter if provided
         if file_filter is not None:
             files = [f for f in files if file_filter(f)]
+        
+        # Scores of pairs verified by earlier runs are loaded at once
+        self.similarity_cache.prefetch(files)
+        duplicates = find_duplicate_pairs(files, lambda f1, f2: self.compare_files(f1, f2, flush=False).similarity,
+                                          similarity_threshold)
+        self.similarity_cache.flush()
+        return duplicates
+
+
+def find_duplicate_pairs(files: List[str], score: Callable[[str, str], float],
+                         threshold: float) -> List[Tuple[str, str, float]]:
+    """
+    Group files with the first file they match and list the pairs of every group.
+    
+    Each pair is scored at most once.
+    
+    Args:
+        files: List of file paths
+        score: Returns the similarity (0.0-1.0) of two files
+        threshold: Minimum similarity to join a group
+        
+    Returns:
+        List of tuples (file1, file2, similarity) for all pairs within the groups
+    """
+    scores: Dict[Tuple[str, str], float] = {}
+    
+    def pair_score(file1: str, file2: str) -> float:
+        if (file1, file2) not in scores:
+            scores[(file1, file2)] = score(file1, file2)
+        return scores[(file1, file2)]
+    
+    duplicates = []
+    processed = set()
+    
+    for i, file1 in enumerate(files):
+        if file1 in processed:
+            continue
             
-        duplicates = []
-        processed = set()
+        group = [file1]
         
-        for i, file1 in enumerate(files):
-            if file1 in processed:
+        for file2 in files[i+1:]:
+            if file2 in processed:
                 continue
                 
-            group = [file1]
-            
-            for file2 in files[i+1:]:
-                if file2 in processed:
-                    continue
-                    
-                result = self.compare_files(file1, file2)
-                if result.similarity >= similarity_threshold:
-                    group.append(file2)
-                    processed.add(file2)
-            
-            if len(group) > 1:
-                # Add all pairs in the group
-                for j in range(len(group)):
-                    for k in range(j+1, len(group)):
-                        result = self.compare_files(group[j], group[k])
-                        duplicates.append((group[j], group[k], result.similarity))
-                
-                processed.add(file1)
+            if pair_score(file1, file2) >= threshold:
+                group.append(file2)
+                processed.add(file2)
         
-        return duplicates
+        if len(group) > 1:
+            # Add all pairs in the group
+            for j in range(len(group)):
+                for k in range(j+1, len(group)):
+                    duplicates.append((group[j], group[k], pair_score(group[j], group[k])))
+            
+            processed.add(file1)
+    
+    return duplicates
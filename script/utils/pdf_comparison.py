@@ -7,18 +7,209 @@ This module provides functionality to compare PDFs using different methods:
 """
 
 import logging
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, Iterable, Iterator, List
 
 import fitz  # PyMuPDF
 import numpy as np
 import cv2
-from wand.image import Image as WandImage
+
+from .document_pool import get_document_pool
+from .hash_cache import HashCache
+from .page_index import image_stream_digests
+from .pdf_utils import get_default_hash_cache
+from .raster_cache import RasterCache, get_raster_cache, render_raster
+from .similarity_cache import SimilarityCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+_worker_raster_caches: Dict[Tuple[str, int], RasterCache] = {}
+
+
+# Local statistics windows of the SSIM variants
+SSIM_WINDOWS = ('gaussian', 'box', 'integral')
+GAUSSIAN_WINDOW = 11
+GAUSSIAN_SIGMA = 1.5
+BOX_WINDOW = 7
+
+# SSIM stabilizers for a 0..255 data range
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# Rows of the SSIM map computed per pass, bounding the float32 working set
+SSIM_STRIP_ROWS = 256
+
+# Part of the cached pair result parameters; bump when compare_pdfs scores change
+COMPARISON_VERSION = 1
+
+# Pages inspected for text and images when classifying a document
+TYPE_SAMPLE_PAGES = 5
+
+# Pages whose aspect ratios differ by more than this fraction are never
+# compared visually (A4 vs Letter differ by about 0.09)
+ASPECT_TOLERANCE = 0.1
+
+
+def render_gray(doc: 'fitz.Document', page_num: int, dpi: int,
+                raster_cache: Optional[RasterCache] = None, content_hash: Optional[str] = None) -> np.ndarray:
+    """Render a page as a uint8 grayscale array [H,W], through the raster cache if given.
+    
+    PyMuPDF rasterizes straight to gray and the result is a view on the
+    pixmap samples, so no color conversion or copy is made.
+    """
+    if raster_cache is not None:
+        return raster_cache.get_page(doc, page_num, dpi, 'gray', content_hash)
+    return render_raster(doc, page_num, dpi, 'gray')
+
+
+def _window_mean(img: np.ndarray, window: str) -> np.ndarray:
+    """Local means of a float32 image over the SSIM window.
+    
+    'gaussian' and 'box' keep the image size (reflected borders); 'integral'
+    computes box means from a summed-area table over full windows only, so
+    its output is (BOX_WINDOW - 1) pixels smaller in each direction.
+    """
+    if window == 'gaussian':
+        return cv2.GaussianBlur(img, (GAUSSIAN_WINDOW, GAUSSIAN_WINDOW), GAUSSIAN_SIGMA)
+    if window == 'box':
+        return cv2.boxFilter(img, -1, (BOX_WINDOW, BOX_WINDOW))
+    if window == 'integral':
+        k = BOX_WINDOW
+        sums = cv2.integral(img, sdepth=cv2.CV_64F)
+        means = sums[k:, k:] - sums[:-k, k:]
+        means -= sums[k:, :-k]
+        means += sums[:-k, :-k]
+        return (means / (k * k)).astype(np.float32)
+    raise ValueError(f"Unknown SSIM window: {window}")
+
+
+def _ssim_map(img1: np.ndarray, img2: np.ndarray, window: str) -> np.ndarray:
+    """SSIM map of two uint8 images, fused into a handful of float32 buffers.
+    
+    Intermediate statistics are filtered and combined in place, so besides
+    the two float32 inputs only four more buffers of the same size exist at
+    any time.
+    """
+    x = img1.astype(np.float32)
+    y = img2.astype(np.float32)
+    mu_x = _window_mean(x, window)
+    mu_y = _window_mean(y, window)
+    s_xy = _window_mean(np.multiply(x, y), window)
+    np.multiply(x, x, out=x)
+    s_xx = _window_mean(x, window)
+    del x
+    np.multiply(y, y, out=y)
+    s_yy = _window_mean(y, window)
+    del y
+    
+    # Numerator (2 mu_x mu_y + C1)(2 cov + C2), accumulated in s_xy
+    mu_xy = mu_x * mu_y
+    s_xy -= mu_xy
+    s_xy *= 2
+    s_xy += SSIM_C2
+    mu_xy *= 2
+    mu_xy += SSIM_C1
+    s_xy *= mu_xy
+    del mu_xy
+    
+    # Denominator (mu_x^2 + mu_y^2 + C1)(var_x + var_y + C2), accumulated in s_xx;
+    # the operation order mirrors the numerator so identical images give exactly 1
+    np.multiply(mu_x, mu_x, out=mu_x)
+    np.multiply(mu_y, mu_y, out=mu_y)
+    s_xx -= mu_x
+    s_yy -= mu_y
+    s_xx += s_yy
+    s_xx += SSIM_C2
+    mu_x += mu_y
+    mu_x += SSIM_C1
+    s_xx *= mu_x
+    
+    s_xy /= s_xx
+    return s_xy
+
+
+def ssim(img1: np.ndarray, img2: np.ndarray, window: str = 'gaussian',
+         strip_rows: int = SSIM_STRIP_ROWS) -> float:
+    """Mean SSIM of two uint8 grayscale images of the same shape.
+    
+    The images are processed in horizontal strips overlapping by the window
+    radius, so the float32 working set is bounded by the strip size instead of
+    the page size; the result equals that of a whole-image pass.
+    
+    Args:
+        img1: Grayscale image uint8 [H,W]
+        img2: Grayscale image uint8 [H,W]
+        window: One of SSIM_WINDOWS
+        strip_rows: Rows of the SSIM map computed per strip
+        
+    Returns:
+        Mean of the SSIM map
+    """
+    if window == 'integral':
+        # Only full windows are evaluated, no border is needed
+        pad, halo = 0, BOX_WINDOW - 1
+    else:
+        # Reflect the borders once (uint8) as the filters would for the whole image
+        pad = (GAUSSIAN_WINDOW if window == 'gaussian' else BOX_WINDOW) // 2
+        halo = 2 * pad
+        img1 = cv2.copyMakeBorder(img1, pad, pad, pad, pad, cv2.BORDER_REFLECT_101)
+        img2 = cv2.copyMakeBorder(img2, pad, pad, pad, pad, cv2.BORDER_REFLECT_101)
+    
+    rows = img1.shape[0] - halo
+    if rows <= 0 or img1.shape[1] <= halo:
+        raise ValueError("Image is smaller than the SSIM window")
+    
+    total, count = 0.0, 0
+    for start in range(0, rows, strip_rows):
+        stop = min(start + strip_rows, rows) + halo
+        ssim_map = _ssim_map(img1[start:stop], img2[start:stop], window)
+        if pad:
+            ssim_map = ssim_map[pad:-pad, pad:-pad]
+        total += float(ssim_map.sum(dtype=np.float64))
+        count += ssim_map.size
+    return total / count
+
+
+def _render_to_shared(file_path: str, page_num: int, dpi: int, shm_name: str,
+                      content_hash: Optional[str] = None,
+                      cache_config: Optional[Tuple[str, int]] = None) -> Tuple[int, int]:
+    """Worker task: render a page into a shared memory block allocated by the parent.
+    
+    Args:
+        cache_config: (directory, size limit in MB) of the parent's raster cache
+    
+    Returns:
+        The (height, width) of the raster written at the start of the block
+    """
+    raster_cache = None
+    if cache_config is not None:
+        if cache_config not in _worker_raster_caches:
+            _worker_raster_caches[cache_config] = RasterCache(*cache_config)
+        raster_cache = _worker_raster_caches[cache_config]
+    
+    # Each worker process keeps its own pool, so documents stay open across tasks
+    with get_document_pool().open(file_path) as doc:
+        gray = render_gray(doc, page_num, dpi, raster_cache, content_hash)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        if gray.nbytes > shm.size:
+            raise ValueError(f"Page {page_num} of {file_path} does not fit its shared buffer")
+        np.ndarray(gray.shape, dtype=np.uint8, buffer=shm.buf)[:] = gray
+    finally:
+        shm.close()
+    return gray.shape
+
+
 class PDFType(Enum):
     """Enum representing the type of PDF."""
     UNKNOWN = "unknown"
@@ -26,18 +217,125 @@ class PDFType(Enum):
     SEARCHABLE = "searchable"
     MIXED = "mixed"
 
+
+@dataclass(frozen=True)
+class DocumentSignature:
+    """Cheap geometric summary of a document, read without rendering or text layout.
+    
+    Attributes:
+        page_count: Number of pages
+        pages: (width, height, rotation) of every page, width and height as displayed
+        has_text: Text found on one of the first TYPE_SAMPLE_PAGES pages
+        has_images: Images found on one of the first TYPE_SAMPLE_PAGES pages
+    """
+    page_count: int
+    pages: Tuple[Tuple[float, float, int], ...]
+    has_text: bool
+    has_images: bool
+    
+    @property
+    def pdf_type(self) -> PDFType:
+        if self.has_text and self.has_images:
+            return PDFType.MIXED
+        if self.has_text:
+            return PDFType.SEARCHABLE
+        if self.has_images:
+            return PDFType.SCANNED
+        return PDFType.UNKNOWN
+    
+    def visual_mismatch(self, other: 'DocumentSignature',
+                        tolerance: float = ASPECT_TOLERANCE) -> Optional[str]:
+        """Return why the two documents cannot look alike page by page, or None."""
+        if self.page_count != other.page_count:
+            return "Page counts differ"
+        for (w1, h1, _), (w2, h2, _) in zip(self.pages, other.pages):
+            aspect1 = w1 / h1 if h1 else 0.0
+            aspect2 = w2 / h2 if h2 else 0.0
+            if abs(aspect1 - aspect2) > tolerance * max(aspect1, aspect2):
+                return "Page shapes differ"
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _cached_signature(file_path: str, size: int, mtime_ns: int) -> Optional[DocumentSignature]:
+    with get_document_pool().open(file_path) as doc:
+        pages = []
+        has_text = has_images = False
+        for page in doc:
+            rect = page.rect
+            pages.append((round(rect.width, 1), round(rect.height, 1), page.rotation))
+            if page.number < TYPE_SAMPLE_PAGES and not (has_text and has_images):
+                has_text = has_text or bool(page.get_text("text").strip())
+                has_images = has_images or bool(page.get_images(full=True))
+        return DocumentSignature(len(pages), tuple(pages), has_text, has_images)
+
+
+def document_signature(file_path: str) -> Optional[DocumentSignature]:
+    """Return the signature of a PDF, computed in one open and memoized by size and mtime.
+    
+    Returns:
+        The signature, or None if the file cannot be read
+    """
+    try:
+        stat = os.stat(file_path)
+        return _cached_signature(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    except Exception as e:
+        logger.error(f"Error reading signature of {file_path}: {e}")
+        return None
+
+
 class PDFComparator:
     """Class for comparing PDF documents using different methods."""
     
-    def __init__(self, dpi: int = 200, threshold: float = 0.95):
+    def __init__(self, dpi: int = 200, threshold: float = 0.95,
+                 coarse_dpi: int = 50, borderline_margin: float = 0.05,
+                 workers: Optional[int] = None, parallel_min_pages: int = 8,
+                 raster_cache: Optional[RasterCache] = None, ssim_window: str = 'gaussian',
+                 hash_cache: Optional[HashCache] = None):
         """Initialize the PDF comparator.
         
         Args:
             dpi: DPI to use for image conversion
             threshold: Similarity threshold (0-1) for considering pages as similar
+            coarse_dpi: DPI of the thumbnails every page pair is compared at first
+            borderline_margin: Pages whose thumbnail similarity is within this
+                distance of ``threshold`` are compared again at ``dpi``
+            workers: Render worker processes (defaults to the CPU count; 1 disables them)
+            parallel_min_pages: Documents with fewer pages are compared in-process
+            raster_cache: Cache of rendered pages (defaults to the one configured in settings)
+            ssim_window: SSIM local window: 'gaussian' (11x11, sigma 1.5), 'box' (7x7)
+                or 'integral' (7x7 box from a summed-area table)
+            hash_cache: Cache to persist pair results in (defaults to the one configured in settings)
         """
+        if ssim_window not in SSIM_WINDOWS:
+            raise ValueError(f"ssim_window must be one of {SSIM_WINDOWS}")
         self.dpi = dpi
         self.threshold = threshold
+        self.coarse_dpi = min(coarse_dpi, dpi)
+        self.borderline_margin = borderline_margin
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.parallel_min_pages = parallel_min_pages
+        self.raster_cache = raster_cache if raster_cache is not None else get_raster_cache()
+        self.ssim_window = ssim_window
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.similarity_cache = SimilarityCache(
+            hash_cache if hash_cache is not None else get_default_hash_cache(),
+            'compare_pdfs',
+            {'version': COMPARISON_VERSION, 'dpi': dpi, 'threshold': threshold, 'coarse_dpi': self.coarse_dpi,
+             'borderline_margin': borderline_margin, 'ssim_window': ssim_window}
+        )
+    
+    def close(self) -> None:
+        """Shut down the render worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+    
+    def __enter__(self) -> 'PDFComparator':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
     
     def detect_pdf_type(self, file_path: str) -> PDFType:
         """Detect if a PDF is scanned, searchable, or mixed.
@@ -48,43 +346,16 @@ class PDFComparator:
         Returns:
             PDFType indicating the type of PDF
         """
-        try:
-            doc = fitz.open(file_path)
-            has_text = False
-            has_images = False
-            
-            for page_num in range(min(5, len(doc))):  # Check first 5 pages or all if fewer
-                page = doc.load_page(page_num)
-                text = page.get_text("text")
-                image_list = page.get_images(full=True)
-                
-                if text.strip():
-                    has_text = True
-                if image_list:
-                    has_images = True
-                
-                # Early exit if we've found both
-                if has_text and has_images:
-                    break
-            
-            doc.close()
-            
-            if has_text and has_images:
-                return PDFType.MIXED
-            elif has_text:
-                return PDFType.SEARCHABLE
-            elif has_images:
-                return PDFType.SCANNED
-            else:
-                return PDFType.UNKNOWN
-                
-        except Exception as e:
-            logger.error(f"Error detecting PDF type for {file_path}: {e}")
-            return PDFType.UNKNOWN
+        signature = document_signature(file_path)
+        return signature.pdf_type if signature is not None else PDFType.UNKNOWN
     
     def compare_pdfs(self, file1: str, file2: str) -> Dict[str, Any]:
         """Compare two PDF files using the appropriate method.
         
+        Both documents are first summarized by their cached signatures, which
+        pick the comparison method and reject pairs that cannot match visually
+        (different page counts or page shapes) without rendering anything.
+        
         Args:
             file1: Path to the first PDF file
             file2: Path to the second PDF file
@@ -92,9 +363,52 @@ class PDFComparator:
         Returns:
             Dictionary containing comparison results
         """
-        # Detect PDF types
-        type1 = self.detect_pdf_type(file1)
-        type2 = self.detect_pdf_type(file2)
+        sig1 = document_signature(file1)
+        sig2 = document_signature(file2)
+        type1 = sig1.pdf_type if sig1 is not None else PDFType.UNKNOWN
+        type2 = sig2.pdf_type if sig2 is not None else PDFType.UNKNOWN
+        visual = not (type1 == PDFType.SEARCHABLE and type2 == PDFType.SEARCHABLE)
+        
+        # Documents whose pages cannot line up are rejected before any rendering
+        if visual and sig1 is not None and sig2 is not None:
+            mismatch = sig1.visual_mismatch(sig2)
+            if mismatch:
+                return {
+                    "similarity": 0.0,
+                    "match": False,
+                    "method": "signature",
+                    "message": mismatch,
+                    "details": {"file1_pages": sig1.page_count, "file2_pages": sig2.page_count}
+                }
+        
+        cached = self.similarity_cache.get(file1, file2)
+        if cached is not None:
+            score, info = cached
+            info = info or {}
+            return {
+                "similarity": score,
+                "match": score >= self.threshold,
+                "method": info.get("method", "cache"),
+                "message": info.get("message", ""),
+                "details": {"cached": True}
+            }
+        
+        result = self._compare_by_type(file1, file2, type1, type2)
+        # Failed comparisons (errors, unreadable text) are retried next time
+        if not result.get("failed"):
+            self.similarity_cache.put(file1, file2, result["similarity"],
+                                      {"method": result["method"], "message": result["message"]})
+            self.similarity_cache.flush()
+        return result
+    
+    def _compare_by_type(self, file1: str, file2: str, type1: PDFType, type2: PDFType) -> Dict[str, Any]:
+        """Compare two PDF files with the method suited to their types."""
+        # Documents built from the same scans match on their raw image streams
+        if type1 == PDFType.SCANNED and type2 == PDFType.SCANNED:
+            result = self._compare_pdfs_as_image_streams(file1, file2)
+            if result is not None:
+                logger.info(f"Embedded scans of {file1} and {file2} are identical")
+                return result
         
         # If either PDF is scanned or mixed, use image comparison
         if type1 in (PDFType.SCANNED, PDFType.MIXED) or type2 in (PDFType.SCANNED, PDFType.MIXED):
@@ -109,9 +423,39 @@ class PDFComparator:
             logger.warning(f"Unknown PDF types, falling back to image comparison for {file1} and {file2}")
             return self._compare_pdfs_as_images(file1, file2)
     
+    def _compare_pdfs_as_image_streams(self, file1: str, file2: str) -> Optional[Dict[str, Any]]:
+        """Compare two scanned PDFs by the digests of their embedded image streams.
+        
+        No page is rasterized. Only a conclusive result is returned: every page
+        of both documents carries the same scans.
+        
+        Args:
+            file1: Path to the first PDF file
+            file2: Path to the second PDF file
+            
+        Returns:
+            Dictionary containing comparison results, or None to fall back to rendering
+        """
+        pages1 = image_stream_digests(file1)
+        pages2 = image_stream_digests(file2)
+        if not pages1 or pages1 != pages2 or not all(pages1):
+            return None
+        return {
+            "similarity": 1.0,
+            "match": True,
+            "method": "image_stream",
+            "message": "Embedded scans are identical",
+            "details": {"pages": len(pages1), "images": sum(len(page) for page in pages1)}
+        }
+    
     def _compare_pdfs_as_images(self, file1: str, file2: str) -> Dict[str, Any]:
         """Compare two PDFs by converting them to images and comparing visually.
         
+        Pages are compared coarse-to-fine: every page pair is first compared
+        as low-DPI thumbnails, and only pairs whose similarity is borderline
+        are rendered again at full resolution. The comparison stops as soon as
+        the average similarity can no longer reach the threshold.
+        
         Args:
             file1: Path to the first PDF file
             file2: Path to the second PDF file
@@ -120,70 +464,56 @@ class PDFComparator:
             Dictionary containing comparison results
         """
         try:
-            # Open both PDFs
-            doc1 = fitz.open(file1)
-            doc2 = fitz.open(file2)
-            
-            # Check if page counts match
-            if len(doc1) != len(doc2):
-                return {
-                    "similarity": 0.0,
-                    "match": False,
-                    "method": "image",
-                    "message": "Page counts differ",
-                    "details": {"file1_pages": len(doc1), "file2_pages": len(doc2)}
-                }
-            
-            # Compare each page
-            similarities = []
-            for page_num in range(len(doc1)):
-                # Render pages to pixmaps
-                pix1 = doc1.load_page(page_num).get_pixmap(dpi=self.dpi)
-                pix2 = doc2.load_page(page_num).get_pixmap(dpi=self.dpi)
-
-                # Convert pixmap samples to numpy arrays (H, W, C)
-                arr1 = np.frombuffer(pix1.samples, dtype=np.uint8)
-                arr1 = arr1.reshape(pix1.height, pix1.width, pix1.n)
-                arr2 = np.frombuffer(pix2.samples, dtype=np.uint8)
-                arr2 = arr2.reshape(pix2.height, pix2.width, pix2.n)
-
-                # Ensure RGB by taking first 3 channels when available
-                if arr1.shape[2] >= 3:
-                    arr1 = arr1[..., :3]
-                if arr2.shape[2] >= 3:
-                    arr2 = arr2[..., :3]
-
-                # Convert to grayscale using luminosity method
-                img1_array = np.dot(arr1[..., :3].astype(np.float32), [0.2989, 0.5870, 0.1140])
-                img2_array = np.dot(arr2[..., :3].astype(np.float32), [0.2989, 0.5870, 0.1140])
-
-                # Resize to the smaller common shape if different sizes
-                if img1_array.shape != img2_array.shape:
-                    min_height = min(img1_array.shape[0], img2_array.shape[0])
-                    min_width = min(img1_array.shape[1], img2_array.shape[1])
-                    img1_array = cv2.resize(img1_array, (min_width, min_height), interpolation=cv2.INTER_AREA)
-                    img2_array = cv2.resize(img2_array, (min_width, min_height), interpolation=cv2.INTER_AREA)
-
-                # Convert to uint8 for SSIM with fixed data_range
-                img1_array = np.clip(img1_array, 0, 255).astype(np.uint8)
-                img2_array = np.clip(img2_array, 0, 255).astype(np.uint8)
+            # Lease both PDFs from the shared document pool
+            pool = get_document_pool()
+            with pool.open(file1) as doc1, pool.open(file2) as doc2:
+                # Check if page counts match
+                if len(doc1) != len(doc2):
+                    return {
+                        "similarity": 0.0,
+                        "match": False,
+                        "method": "image",
+                        "message": "Page counts differ",
+                        "details": {"file1_pages": len(doc1), "file2_pages": len(doc2)}
+                    }
+                
+                # Compare each page
+                page_count = len(doc1)
+                hashes = tuple(self.raster_cache.content_hash(f) if self.raster_cache else None
+                               for f in (file1, file2))
+                similarities = []
+                refined_pages = []
+                early_exit = False
+                coarse = self._iter_page_similarities((file1, file2), (doc1, doc2), hashes,
+                                                      range(page_count), self.coarse_dpi)
+                for page_num, similarity in coarse:
+                    # Borderline thumbnails are settled at full resolution
+                    if self.coarse_dpi < self.dpi and abs(similarity - self.threshold) < self.borderline_margin:
+                        similarity = self._page_similarity((doc1, doc2), hashes, page_num, self.dpi)
+                        refined_pages.append(page_num)
+                    similarities.append(similarity)
                 
-                # Calculate SSIM via OpenCV/NumPy implementation
-                similarity = self._ssim(img1_array, img2_array)
-                similarities.append(similarity)
+                    # Even if every remaining page were identical the average could not reach the threshold
+                    best_possible = (sum(similarities) + (page_count - len(similarities))) / page_count
+                    if best_possible < self.threshold:
+                        early_exit = page_num + 1 < page_count
+                        break
+                coarse.close()
             
-            # Calculate average similarity
+            # Calculate average similarity (over the compared pages after an early exit,
+            # which is always below the threshold)
             avg_similarity = sum(similarities) / len(similarities) if similarities else 0.0
             
-            doc1.close()
-            doc2.close()
-            
             return {
                 "similarity": avg_similarity,
                 "match": avg_similarity >= self.threshold,
                 "method": "image",
                 "message": "Comparison completed" if avg_similarity >= self.threshold else "Significant differences found",
-                "details": {"page_similarities": similarities}
+                "details": {
+                    "page_similarities": similarities,
+                    "refined_pages": refined_pages,
+                    "early_exit": early_exit
+                }
             }
             
         except Exception as e:
@@ -193,9 +523,109 @@ class PDFComparator:
                 "match": False,
                 "method": "image",
                 "message": f"Error during comparison: {str(e)}",
+                "failed": True,
                 "details": {}
             }
     
+    def _iter_page_similarities(self, files: Tuple[str, str], docs: Tuple['fitz.Document', 'fitz.Document'],
+                                hashes: Tuple[Optional[str], Optional[str]], pages: Iterable[int],
+                                dpi: int) -> Iterator[Tuple[int, float]]:
+        """Yield (page number, SSIM) for each page, in page order.
+        
+        Large documents are rendered by a pool of worker processes a few pages
+        ahead of the consumer; closing the iterator cancels the pages not yet
+        rendered.
+        """
+        pages = list(pages)
+        if self.workers <= 1 or len(pages) < self.parallel_min_pages:
+            for page_num in pages:
+                yield page_num, self._page_similarity(docs, hashes, page_num, dpi)
+            return
+        
+        if self._pool is None:
+            # Spawned workers do not inherit the GUI's threads and locks
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        
+        in_flight: 'deque[Tuple[int, List[Tuple[Future, shared_memory.SharedMemory]]]]' = deque()
+        pending = iter(pages)
+        try:
+            while True:
+                # Keep every worker busy with a couple of page pairs queued
+                while len(in_flight) < 2 * self.workers:
+                    page_num = next(pending, None)
+                    if page_num is None:
+                        break
+                    in_flight.append((page_num, [
+                        self._submit_render(path, doc, content_hash, page_num, dpi)
+                        for path, doc, content_hash in zip(files, docs, hashes)
+                    ]))
+                if not in_flight:
+                    return
+                
+                page_num, renders = in_flight.popleft()
+                try:
+                    img1_array, img2_array = (
+                        np.ndarray(future.result(), dtype=np.uint8, buffer=shm.buf)
+                        for future, shm in renders
+                    )
+                    similarity = self._similarity(img1_array, img2_array)
+                    del img1_array, img2_array
+                finally:
+                    self._release(renders)
+                yield page_num, similarity
+        finally:
+            for _, renders in in_flight:
+                self._release(renders)
+    
+    def _submit_render(self, file_path: str, doc: 'fitz.Document', content_hash: Optional[str],
+                       page_num: int, dpi: int) -> Tuple[Future, shared_memory.SharedMemory]:
+        """Allocate a shared buffer large enough for the page and queue its rendering."""
+        rect = doc.load_page(page_num).rect
+        zoom = dpi / 72
+        size = (math.ceil(rect.width * zoom) + 2) * (math.ceil(rect.height * zoom) + 2)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        cache_config = None
+        if self.raster_cache is not None:
+            cache_config = (str(self.raster_cache.cache_dir), self.raster_cache.max_size_mb)
+        try:
+            return self._pool.submit(_render_to_shared, file_path, page_num, dpi, shm.name,
+                                     content_hash, cache_config), shm
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+    
+    @staticmethod
+    def _release(renders: List[Tuple[Future, shared_memory.SharedMemory]]) -> None:
+        """Free the shared buffers of a page pair once no worker writes to them."""
+        for future, shm in renders:
+            if not future.cancel():
+                try:
+                    future.exception()  # wait for a running render to finish
+                except Exception:
+                    pass
+            shm.close()
+            shm.unlink()
+    
+    def _page_similarity(self, docs: Tuple['fitz.Document', 'fitz.Document'],
+                         hashes: Tuple[Optional[str], Optional[str]], page_num: int, dpi: int) -> float:
+        """Render one page of both documents at ``dpi`` and return their SSIM."""
+        return self._similarity(*(render_gray(doc, page_num, dpi, self.raster_cache, content_hash)
+                                  for doc, content_hash in zip(docs, hashes)))
+    
+    def _similarity(self, img1_array: np.ndarray, img2_array: np.ndarray) -> float:
+        """Return the SSIM of two grayscale rasters, resized to a common shape if needed."""
+        # Resize to the smaller common shape if different sizes
+        if img1_array.shape != img2_array.shape:
+            min_height = min(img1_array.shape[0], img2_array.shape[0])
+            min_width = min(img1_array.shape[1], img2_array.shape[1])
+            img1_array = cv2.resize(img1_array, (min_width, min_height), interpolation=cv2.INTER_AREA)
+            img2_array = cv2.resize(img2_array, (min_width, min_height), interpolation=cv2.INTER_AREA)
+        
+        # Calculate SSIM via OpenCV/NumPy implementation
+        return self._ssim(img1_array, img2_array)
+    
     def _compare_pdfs_as_text(self, file1: str, file2: str) -> Dict[str, Any]:
         """Compare two searchable PDFs by extracting and comparing their text content.
         
@@ -217,6 +647,7 @@ class PDFComparator:
                     "match": False,
                     "method": "text",
                     "message": "Could not extract text from one or both PDFs",
+                    "failed": True,
                     "details": {"file1_text_length": len(text1) if text1 else 0, 
                               "file2_text_length": len(text2) if text2 else 0}
                 }
@@ -253,6 +684,7 @@ class PDFComparator:
                 "match": False,
                 "method": "text",
                 "message": f"Error during text comparison: {str(e)}",
+                "failed": True,
                 "details": {}
             }
     
@@ -266,11 +698,10 @@ class PDFComparator:
             Extracted text as a string
         """
         try:
-            doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text() + "\n"
-            doc.close()
+            with get_document_pool().open(file_path) as doc:
+                text = ""
+                for page in doc:
+                    text += page.get_text() + "\n"
             return text.strip()
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
@@ -291,29 +722,7 @@ class PDFComparator:
                 img1 = cv2.resize(img1, (w, h), interpolation=cv2.INTER_AREA)
                 img2 = cv2.resize(img2, (w, h), interpolation=cv2.INTER_AREA)
 
-            # Convert to float32 and normalize to [0,1]
-            img1 = img1.astype(np.float32) / 255.0
-            img2 = img2.astype(np.float32) / 255.0
-
-            C1 = (0.01) ** 2
-            C2 = (0.03) ** 2
-
-            # Gaussian kernel window
-            win_size = 11
-            sigma = 1.5
-            mu1 = cv2.GaussianBlur(img1, (win_size, win_size), sigma)
-            mu2 = cv2.GaussianBlur(img2, (win_size, win_size), sigma)
-
-            mu1_sq = mu1 * mu1
-            mu2_sq = mu2 * mu2
-            mu1_mu2 = mu1 * mu2
-
-            sigma1_sq = cv2.GaussianBlur(img1 * img1, (win_size, win_size), sigma) - mu1_sq
-            sigma2_sq = cv2.GaussianBlur(img2 * img2, (win_size, win_size), sigma) - mu2_sq
-            sigma12 = cv2.GaussianBlur(img1 * img2, (win_size, win_size), sigma) - mu1_mu2
-
-            ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / ((mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2) + 1e-12)
-            val = float(ssim_map.mean())
+            val = ssim(img1, img2, self.ssim_window)
 
             # Clamp to [0,1]
             if val < 0:
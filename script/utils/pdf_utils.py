@@ -4,23 +4,72 @@ import logging
 import tempfile
 import time
 import io
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional, TYPE_CHECKING
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
-from wand.image import Image as WandImage
 import fitz  # PyMuPDF
 from tqdm import tqdm
 from ..lang.lang_manager import SimpleLanguageManager
 from .settings import settings
+from .file_walker import FileWalker, sniff_pdf_header
+from .hash_cache import HashCache
+from .raster_cache import get_raster_cache, render_raster
+from .document_pool import get_document_pool
 
 # Set up logger (child of the configured 'PDFDuplicateFinder' logger)
 logger = logging.getLogger(f"PDFDuplicateFinder.{__name__}")
 
+# Wand/ImageMagick is only needed by the compatibility hash mode and the
+# Ghostscript backend; the default hashing path renders with PyMuPDF alone
+try:
+    from wand.image import Image as WandImage
+except ImportError as e:
+    WandImage = None
+    logger.debug(f"Wand unavailable, compatibility hashing disabled: {e}")
+
 # For type hints
 if TYPE_CHECKING:
     from wand.image import Image as WandImageType
 
+# Names under which first-page dHashes are persisted in the hash cache. The
+# two modes produce slightly different bits and must never be mixed.
+PHASH_ALGORITHM = 'dhash'  # Wand pipeline ('compat' mode)
+FAST_PHASH_ALGORITHM = 'dhash_np'  # direct PyMuPDF -> NumPy ('fast' mode)
+
+# Each hash cell is averaged from FAST_HASH_OVERSAMPLE x FAST_HASH_OVERSAMPLE
+# rendered pixels, which is enough to smooth out text anti-aliasing
+FAST_HASH_OVERSAMPLE = 4
+
+# The DCT pHash keeps the lowest hash_size x hash_size frequencies of a
+# (PHASH_FACTOR * hash_size)-square grid
+PHASH_FACTOR = 4
+
+# Page sampling strategies for multi-page document fingerprints
+PAGE_SAMPLING_STRATEGIES = ('first', 'ends', 'even')
+
+# Hash cache names of the fingerprints produced in each hash mode
+FINGERPRINT_ALGORITHMS = {
+    'fast': {'ahash': 'ahash_np', 'dhash': FAST_PHASH_ALGORITHM, 'phash': 'phash_dct'},
+    'compat': {'dhash': PHASH_ALGORITHM},
+}
+
+_default_hash_cache: Optional[HashCache] = None
+
+def get_default_hash_cache() -> Optional[HashCache]:
+    """Return the shared hash cache configured in settings, or None if disabled."""
+    global _default_hash_cache
+    if not settings.get('enable_hash_cache', True):
+        return None
+    if _default_hash_cache is None:
+        try:
+            _default_hash_cache = HashCache(cache_dir=settings.get('cache_dir', None))
+        except Exception as e:
+            logger.warning(f"Hash cache unavailable, perceptual hashes will not be cached: {e}")
+            return None
+    return _default_hash_cache if _default_hash_cache.is_available() else None
+
 class ProgressTracker:
     """Helper class to track and report progress."""
     def __init__(self, total_steps: int = 100):
@@ -75,28 +124,26 @@ def extract_first_page_pdf(pdf_path: str, progress_callback: callable = None) ->
     Optional paths in settings:
       - 'pdf.ghostscript_path': path to Ghostscript executable (if needed)
     """
-    def try_pymupdf() -> Optional[WandImageType]:
+    def try_pymupdf() -> Optional['WandImageType']:
         """Try to extract first page using PyMuPDF."""
         try:
-            # Open the PDF document
-            doc = fitz.open(pdf_path)
+            # Lease the PDF document from the shared pool
+            doc = get_document_pool().acquire(pdf_path)
             if len(doc) == 0:
                 return None
                 
-            # Get the first page
-            page = doc[0]
-            
-            # Calculate zoom factor for better quality (2x resolution)
-            zoom = 2.0
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # Render page to a pixmap
-            pix = page.get_pixmap(matrix=mat, alpha=False)
+            # Render the first page at 2x resolution (144 DPI), reusing a cached raster
+            raster_cache = get_raster_cache()
+            if raster_cache is not None:
+                pixels = raster_cache.get_page(doc, 0, 144, 'rgb', raster_cache.content_hash(pdf_path))
+            else:
+                pixels = render_raster(doc, 0, 144, 'rgb')
+            height, width = pixels.shape[:2]
             
             # Create a new Wand image with the same dimensions
-            with WandImage(width=pix.width, height=pix.height) as img:
+            with WandImage(width=width, height=height) as img:
                 # Import the pixel data directly
-                img.import_pixels(0, 0, pix.width, pix.height, 'RGB', 'char', pix.samples)
+                img.import_pixels(0, 0, width, height, 'RGB', 'char', pixels.tobytes())
                 return img.clone()
                 
         except Exception as e:
@@ -104,9 +151,9 @@ def extract_first_page_pdf(pdf_path: str, progress_callback: callable = None) ->
             return None
         finally:
             if 'doc' in locals():
-                doc.close()
+                get_document_pool().release(doc)
     
-    def try_wand() -> Optional[WandImageType]:
+    def try_wand() -> Optional['WandImageType']:
         """Try to extract first page using Wand/Ghostscript."""
         try:
             # Use Wand to read the first page of the PDF
@@ -176,12 +223,305 @@ def calculate_hash(image: 'WandImageType', hash_size: int = 8) -> np.ndarray:
         logger.error(f"Error calculating hash: {e}")
         return np.zeros(hash_size * hash_size, dtype=bool)
 
+def get_hash_mode() -> str:
+    """Return the configured first-page hash mode.
+
+    Settings key 'pdf.hash_mode':
+      - 'fast' (default): render straight to the hash grid with PyMuPDF and hash with NumPy
+      - 'compat': the Wand pipeline, reproducing hashes computed by earlier versions
+
+    'pdf.backend' only selects the renderer of the compatibility pipeline,
+    which is also the fallback when PyMuPDF cannot render a page.
+    """
+    mode = str(settings.get('pdf.hash_mode', 'fast') or 'fast').lower()
+    return 'compat' if mode == 'compat' else 'fast'
+
+def get_phash_algorithm(mode: Optional[str] = None) -> str:
+    """Return the hash cache algorithm name for a hash mode (default: configured mode)."""
+    return PHASH_ALGORITHM if (mode or get_hash_mode()) == 'compat' else FAST_PHASH_ALGORITHM
+
+def get_fingerprint_algorithms(mode: Optional[str] = None, pages: int = 1,
+                               strategy: str = 'even') -> Dict[str, str]:
+    """Return fingerprint kind -> hash cache algorithm name for a hash mode and page sampling.
+    
+    Multi-page fingerprints are cached under names carrying the sampling,
+    e.g. 'dhash_np:even3', so changing the sampling never mixes matrices.
+    """
+    if (mode or get_hash_mode()) == 'compat':
+        return FINGERPRINT_ALGORITHMS['compat']
+    algorithms = FINGERPRINT_ALGORITHMS['fast']
+    if pages <= 1:
+        return algorithms
+    return {kind: f"{name}:{strategy}{pages}" for kind, name in algorithms.items()}
+
+def area_resize(gray: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Downsample a 2-D raster to (height, width) by averaging the pixels of each cell.
+    
+    Args:
+        gray: Grayscale raster, at least ``height`` x ``width`` pixels
+        width: Number of output columns
+        height: Number of output rows
+        
+    Returns:
+        float32 array of shape (height, width)
+    """
+    if gray.shape[0] < height or gray.shape[1] < width:
+        raise ValueError(f"Raster {gray.shape} smaller than target {(height, width)}")
+    rows = np.linspace(0, gray.shape[0], height + 1).astype(np.intp)
+    cols = np.linspace(0, gray.shape[1], width + 1).astype(np.intp)
+    summed = np.add.reduceat(gray.astype(np.float32, copy=False), rows[:-1], axis=0)
+    summed = np.add.reduceat(summed, cols[:-1], axis=1)
+    counts = np.diff(rows)[:, None] * np.diff(cols)[None, :]
+    return summed / counts
+
+def render_page_gray(page: 'fitz.Page', width: int, height: int) -> np.ndarray:
+    """Render a page directly into a grayscale raster of roughly width x height pixels.
+    
+    The page is stretched to the requested size (aspect ratio is not kept,
+    like the Wand resize it replaces), so no larger intermediate is ever drawn.
+    
+    Returns:
+        uint8 array of shape (rows, columns)
+    """
+    rect = page.rect
+    mat = fitz.Matrix(width / rect.width, height / rect.height)
+    pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8)
+    return gray.reshape(pix.height, pix.stride)[:, :pix.width]
+
+@lru_cache(maxsize=8)
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so that ``D @ X @ D.T`` is the 2-D DCT of X."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+def fingerprint_raster_size(hash_size: int = 8) -> Tuple[int, int]:
+    """Return the (width, height) to render at so that every fingerprint grid fits."""
+    return ((hash_size + 1) * FAST_HASH_OVERSAMPLE,
+            max(hash_size * FAST_HASH_OVERSAMPLE, hash_size * PHASH_FACTOR))
+
+def compute_fingerprints(gray: np.ndarray, hash_size: int = 8) -> Dict[str, np.ndarray]:
+    """Calculate the average, difference and DCT perceptual hashes of one raster.
+    
+    Args:
+        gray: Small grayscale raster, at least ``fingerprint_raster_size(hash_size)``
+        hash_size: Size of the hashes; each has hash_size * hash_size bits
+        
+    Returns:
+        Dictionary with flat boolean arrays under 'ahash', 'dhash' and 'phash'
+    """
+    gray = gray.astype(np.float32, copy=False)
+    
+    mean_cells = area_resize(gray, hash_size, hash_size)
+    diff_cells = area_resize(gray, hash_size + 1, hash_size)
+    
+    n = hash_size * PHASH_FACTOR
+    dct = _dct_matrix(n)
+    coeffs = (dct @ area_resize(gray, n, n) @ dct.T)[:hash_size, :hash_size]
+    
+    return {
+        'ahash': (mean_cells > mean_cells.mean()).flatten(),
+        'dhash': (diff_cells[:, 1:] > diff_cells[:, :-1]).flatten(),
+        'phash': (coeffs > np.median(coeffs)).flatten(),
+    }
+
+def sample_page_indices(page_count: int, pages: int = 1, strategy: str = 'even') -> List[int]:
+    """Choose the pages a document fingerprint is computed over.
+    
+    Args:
+        page_count: Number of pages in the document
+        pages: Maximum number of pages to sample
+        strategy: 'first' (the first pages), 'ends' (first, last, then middle page)
+            or 'even' (evenly spaced from the first to the last page)
+        
+    Returns:
+        Sorted, unique zero-based page indices
+    """
+    pages = min(max(pages, 0), page_count)
+    if pages == 0:
+        return []
+    if strategy == 'first':
+        return list(range(pages))
+    if strategy == 'ends':
+        return sorted(set([0, page_count - 1, page_count // 2][:pages]))
+    return sorted(set(np.linspace(0, page_count - 1, pages).round().astype(int).tolist()))
+
+def get_page_sampling() -> Tuple[int, str]:
+    """Return the configured (pages, strategy) used for document fingerprints.
+    
+    Settings keys 'scan.fingerprint_pages' (default 3) and
+    'scan.fingerprint_sampling' (one of PAGE_SAMPLING_STRATEGIES, default 'even').
+    """
+    try:
+        pages = max(1, int(settings.get('scan.fingerprint_pages', 3)))
+    except (TypeError, ValueError):
+        pages = 3
+    strategy = str(settings.get('scan.fingerprint_sampling', 'even') or 'even').lower()
+    if strategy not in PAGE_SAMPLING_STRATEGIES:
+        strategy = 'even'
+    return pages, strategy
+
+def calculate_document_fingerprints(pdf_path: str, hash_size: int = 8, pages: int = 1,
+                                    strategy: str = 'even') -> Optional[Dict[str, np.ndarray]]:
+    """Calculate fingerprints over sampled pages in one document open ('fast' mode).
+    
+    Args:
+        pdf_path: Path to the PDF file
+        hash_size: Size of the perceptual hashes
+        pages: Maximum number of pages to sample
+        strategy: Page sampling strategy, see sample_page_indices
+        
+    Returns:
+        Dictionary with a boolean (sampled pages, hash_size * hash_size) matrix under
+        'ahash', 'dhash' and 'phash', or None if no page can be rendered
+    """
+    try:
+        with get_document_pool().open(pdf_path) as doc:
+            indices = sample_page_indices(doc.page_count, pages, strategy)
+            if not indices:
+                return None
+            width, height = fingerprint_raster_size(hash_size)
+            rows = [compute_fingerprints(render_page_gray(doc[i], width, height), hash_size)
+                    for i in indices]
+            return {kind: np.stack([row[kind] for row in rows]) for kind in rows[0]}
+    except Exception as e:
+        logger.debug(f"Direct page hashing failed for {pdf_path}: {e}")
+        return None
+
+def document_fingerprints(pdf_path: str, hash_size: int = 8, progress_callback: callable = None,
+                          mode: Optional[str] = None, pages: int = 1,
+                          strategy: str = 'even') -> Optional[Dict[str, np.ndarray]]:
+    """Calculate document fingerprints in the configured hash mode.
+    
+    'fast' mode yields 'ahash', 'dhash' and 'phash' matrices with one row per
+    sampled page; 'compat' mode (and the Wand fallback) yields only a
+    single-row 'dhash' of the first page.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        hash_size: Size of the perceptual hashes
+        progress_callback: Callback function for progress updates
+        mode: 'fast' or 'compat' (defaults to the 'pdf.hash_mode' setting)
+        pages: Maximum number of pages to sample ('fast' mode only)
+        strategy: Page sampling strategy, see sample_page_indices
+        
+    Returns:
+        Dictionary of boolean (rows, bits) matrices, or None if nothing can be rendered
+    """
+    mode = mode or get_hash_mode()
+    if mode != 'compat':
+        if progress_callback:
+            progress_callback("Hashing pages with PyMuPDF...")
+        fingerprints = calculate_document_fingerprints(pdf_path, hash_size, pages, strategy)
+        if fingerprints is not None or WandImage is None:
+            return fingerprints
+        logger.debug(f"Falling back to Wand hashing for {pdf_path}")
+    
+    image = extract_first_page_pdf(pdf_path, progress_callback)
+    if image is None:
+        return None
+    return {'dhash': calculate_hash(image, hash_size)[None, :]}
+
+def calculate_first_page_fingerprints(pdf_path: str, hash_size: int = 8) -> Optional[Dict[str, np.ndarray]]:
+    """Calculate all first-page fingerprints without going through Wand ('fast' mode).
+    
+    Returns:
+        Fingerprints as returned by compute_fingerprints, or None if the page cannot be rendered
+    """
+    fingerprints = calculate_document_fingerprints(pdf_path, hash_size, pages=1)
+    return {kind: bits[0] for kind, bits in fingerprints.items()} if fingerprints else None
+
+def first_page_fingerprints(pdf_path: str, hash_size: int = 8, progress_callback: callable = None,
+                            mode: Optional[str] = None) -> Optional[Dict[str, np.ndarray]]:
+    """Calculate the first-page fingerprints in the configured hash mode.
+    
+    Returns:
+        Dictionary of flat boolean hashes, or None if the first page cannot be rendered
+    """
+    fingerprints = document_fingerprints(pdf_path, hash_size, progress_callback, mode, pages=1)
+    return {kind: bits[0] for kind, bits in fingerprints.items()} if fingerprints else None
+
+def first_page_hash(pdf_path: str, hash_size: int = 8, progress_callback: callable = None,
+                    mode: Optional[str] = None) -> Optional[np.ndarray]:
+    """Calculate the first-page dHash in the configured hash mode.
+    
+    Returns:
+        Flat boolean hash, or None if the first page cannot be rendered
+    """
+    fingerprints = first_page_fingerprints(pdf_path, hash_size, progress_callback, mode)
+    return fingerprints['dhash'] if fingerprints else None
+
+def fingerprint_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Compare two fingerprint matrices in one vectorized operation.
+    
+    Rows are matched by sample position; rows only one side has (documents
+    with fewer pages than sampled) count as completely different.
+    
+    Args:
+        a: Boolean hash or (rows, bits) matrix
+        b: Boolean hash or (rows, bits) matrix with the same bit count
+        
+    Returns:
+        Fraction of agreeing bits (0.0 to 1.0)
+    """
+    a = np.atleast_2d(a)
+    b = np.atleast_2d(b)
+    shared = min(len(a), len(b))
+    if shared == 0 or a.shape[1] != b.shape[1]:
+        return 0.0
+    agreeing = np.count_nonzero(a[:shared] == b[:shared])
+    return agreeing / (max(len(a), len(b)) * a.shape[1])
+
+def fingerprints_match(fp1: Dict[str, np.ndarray], fp2: Dict[str, np.ndarray],
+                       threshold: float, confirm_threshold: Optional[float] = None) -> Tuple[bool, float]:
+    """Compare two sets of fingerprints: dHash finds candidates, pHash confirms them.
+    
+    Args:
+        fp1: Fingerprints of the first file (flat hashes or page matrices)
+        fp2: Fingerprints of the second file
+        threshold: Minimum dHash similarity (0-1) for a candidate
+        confirm_threshold: Minimum pHash similarity, defaults to ``threshold``;
+            skipped when either side has no pHash
+        
+    Returns:
+        Tuple of (match, dHash similarity)
+    """
+    similarity = fingerprint_similarity(fp1['dhash'], fp2['dhash'])
+    if similarity < threshold:
+        return False, similarity
+    phash1, phash2 = fp1.get('phash'), fp2.get('phash')
+    if phash1 is None or phash2 is None:
+        return True, similarity
+    if confirm_threshold is None:
+        confirm_threshold = threshold
+    return fingerprint_similarity(phash1, phash2) >= confirm_threshold, similarity
+
 def process_pdf_file(file_path: str, min_size: int, max_size: int, hash_size: int, 
-                    progress_callback: callable = None) -> Optional[Tuple[str, np.ndarray, Dict[str, Any]]]:
-    """Process a single PDF file with progress callbacks."""
+                    progress_callback: callable = None, md5: Optional[str] = None,
+                    fingerprints: Optional[Dict[str, np.ndarray]] = None,
+                    hash_mode: Optional[str] = None, pages: int = 1,
+                    strategy: str = 'even') -> Optional[Tuple[str, Tuple[Dict[str, np.ndarray], Dict[str, Any]]]]:
+    """Process a single PDF file with progress callbacks.
+    
+    Args:
+        file_path: Path to the PDF file
+        min_size: Minimum file size in bytes
+        max_size: Maximum file size in bytes
+        hash_size: Size of the perceptual hash
+        progress_callback: Callback function for progress updates
+        md5: Precomputed MD5 of the file, computed here when omitted
+        fingerprints: Cached perceptual hashes; when given the first page is not rendered
+        hash_mode: 'fast' or 'compat' (defaults to the 'pdf.hash_mode' setting)
+        pages: Maximum number of pages to fingerprint
+        strategy: Page sampling strategy, see sample_page_indices
+    """
     try:
         file_path = Path(file_path)
-        file_size = file_path.stat().st_size
+        file_stat = file_path.stat()
+        file_size = file_stat.st_size
         
         if not (min_size <= file_size <= max_size):
             return None
@@ -190,30 +530,67 @@ def process_pdf_file(file_path: str, min_size: int, max_size: int, hash_size: in
             progress_callback(f"Processing {file_path.name}...")
             
         # Compute file MD5 for exact duplicate detection (fast and reliable)
-        md5 = calculate_file_hash(str(file_path))
+        if not md5:
+            md5 = calculate_file_hash(str(file_path))
         
-        image = extract_first_page_pdf(str(file_path), progress_callback)
-        if image is None:
-            try:
-                size_kb = f"{file_size/1024:.1f} KB"
-            except Exception:
-                size_kb = "unknown"
-            logger.warning(f"First page extraction returned None, skipping file: {file_path} (size={size_kb}, md5={md5})")
-            return None
-            
-        phash = calculate_hash(image, hash_size)
+        if fingerprints is None:
+            fingerprints = document_fingerprints(str(file_path), hash_size, progress_callback,
+                                                 mode=hash_mode, pages=pages, strategy=strategy)
+            if fingerprints is None:
+                try:
+                    size_kb = f"{file_size/1024:.1f} KB"
+                except Exception:
+                    size_kb = "unknown"
+                logger.warning(f"First page extraction returned None, skipping file: {file_path} (size={size_kb}, md5={md5})")
+                return None
         
-        return (str(file_path), (phash, {
+        return (str(file_path), (fingerprints, {
             'path': str(file_path),
             'filename': file_path.name,
             'size': file_size,
-            'modified': file_path.stat().st_mtime,
+            'modified': file_stat.st_mtime,
             'md5': md5
         }))
     except Exception as e:
         logger.error(f"Error processing {file_path}: {e}")
         return None
 
+def _lookup_cached_phashes(pdf_files: List[Path], min_size: int, max_size: int, hash_size: int,
+                           hash_cache: HashCache, algorithms: Dict[str, str]
+                           ) -> Tuple[Dict[str, str], Dict[str, Dict[str, np.ndarray]]]:
+    """Hash file contents in parallel and fetch their cached perceptual hashes in batches.
+    
+    Args:
+        algorithms: Fingerprint kind -> hash cache algorithm name, as returned by
+            get_fingerprint_algorithms; only files with every kind cached count as hits
+    
+    Returns:
+        Tuple of (path -> MD5, MD5 -> cached fingerprints)
+    """
+    def file_md5(pdf_file: Path) -> Tuple[str, str]:
+        try:
+            if not (min_size <= pdf_file.stat().st_size <= max_size):
+                return str(pdf_file), ""
+        except OSError:
+            return str(pdf_file), ""
+        return str(pdf_file), calculate_file_hash(str(pdf_file))
+    
+    with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 2)) as executor:
+        md5_by_path = {path: md5 for path, md5 in executor.map(file_md5, pdf_files) if md5}
+    
+    cached: Dict[str, Dict[str, np.ndarray]] = {}
+    try:
+        for i, (kind, algorithm) in enumerate(algorithms.items()):
+            # Later kinds are only looked up for files that hit on every earlier one
+            keys = list(md5_by_path.values()) if i == 0 else list(cached)
+            hits = hash_cache.get_perceptual_hashes(keys, hash_size, algorithm)
+            cached = {md5: {**cached.get(md5, {}), kind: bits} for md5, bits in hits.items()}
+    except Exception as e:
+        logger.warning(f"Perceptual hash cache lookup failed: {e}")
+        cached = {}
+    logger.info(f"Perceptual hash cache: {len(cached)} of {len(md5_by_path)} files already hashed")
+    return md5_by_path, cached
+
 def find_duplicates(
     directory: str = '',
     recursive: bool = True,
@@ -222,10 +599,15 @@ def find_duplicates(
     hash_size: int = 8,
     threshold: float = 0.9,
     processed_files: List[Dict[str, Any]] = None,
-    progress_callback: Optional[callable] = None
+    progress_callback: Optional[callable] = None,
+    directories: Optional[List[str]] = None,
+    hash_cache: Optional[HashCache] = None
 ) -> List[List[Dict[str, Any]]]:
     """Find duplicate PDF files with progress tracking.
     
+    Files are fingerprinted over the pages selected by get_page_sampling(),
+    so documents that only share a cover page are not grouped together.
+    
     Args:
         directory: Directory to search for PDFs
         recursive: Whether to search subdirectories
@@ -235,6 +617,10 @@ def find_duplicates(
         threshold: Similarity threshold (0-1) to consider files as duplicates
         processed_files: Optional list of pre-processed files with 'path' and 'size' keys
         progress_callback: Callback function for progress updates (receives status message)
+        directories: Optional list of directories to scan together with ``directory``;
+            overlapping roots are walked once and every file info carries its 'root'
+        hash_cache: Cache used to persist perceptual hashes (defaults to the
+            cache configured in settings); unchanged files are never rendered again
         
     Returns:
         List of duplicate groups, where each group is a list of file info dicts
@@ -250,22 +636,20 @@ def find_duplicates(
         return True
     
     # Find all PDF files if not provided
+    file_roots: Dict[str, str] = {}
     if processed_files is None:
-        if not directory:
+        roots = ([directory] if directory else []) + list(directories or [])
+        if not roots:
             return []
             
         if not update_progress("Scanning for PDF files..."):
             return []
-            
-        path = Path(directory)
         
         try:
-            # Use case-insensitive suffix filtering to include .pdf, .PDF, etc.
-            if recursive:
-                iterator = path.rglob('*')
-            else:
-                iterator = path.glob('*')
-            pdf_files = [p for p in iterator if p.is_file() and p.suffix.lower() == '.pdf']
+            walker = FileWalker(roots, recursive=recursive)
+            discovered = walker.collect()
+            file_roots = {found.path: found.root for found in discovered}
+            pdf_files = [Path(found.path) for found in discovered]
             if not pdf_files:
                 update_progress("No PDF files found")
                 return []
@@ -279,6 +663,7 @@ def find_duplicates(
             return []
     else:
         pdf_files = [Path(f['path']) for f in processed_files]
+        file_roots = {str(Path(f['path'])): f['root'] for f in processed_files if f.get('root')}
     
     # Process files in parallel with better progress tracking
     file_hashes = {}
@@ -286,10 +671,29 @@ def find_duplicates(
     processed_count = 0
     skipped_count = 0
     
+    # Look up perceptual hashes of unchanged files before rendering anything
+    hash_mode = get_hash_mode()
+    pages, strategy = get_page_sampling()
+    algorithms = get_fingerprint_algorithms(hash_mode, pages, strategy)
+    if hash_cache is None:
+        hash_cache = get_default_hash_cache()
+    md5_by_path: Dict[str, str] = {}
+    cached_phashes: Dict[str, Dict[str, np.ndarray]] = {}
+    if hash_cache is not None:
+        if not update_progress("Checking perceptual hash cache..."):
+            return []
+        md5_by_path, cached_phashes = _lookup_cached_phashes(
+            pdf_files, min_file_size, max_file_size, hash_size, hash_cache, algorithms
+        )
+    new_fingerprints: Dict[str, Dict[str, np.ndarray]] = {}
+    
     def process_file_wrapper(file_path, min_size, max_size, h_size):
         """Wrapper to process a single file and track progress."""
         nonlocal processed_count
-        result = process_pdf_file(file_path, min_size, max_size, h_size)
+        md5 = md5_by_path.get(file_path)
+        result = process_pdf_file(file_path, min_size, max_size, h_size,
+                                  md5=md5, fingerprints=cached_phashes.get(md5) if md5 else None,
+                                  hash_mode=hash_mode, pages=pages, strategy=strategy)
         processed_count += 1
         
         # Update progress every 5 files or for the last file
@@ -321,8 +725,13 @@ def find_duplicates(
                 try:
                     result = future.result()
                     if result is not None:
-                        file_path, (phash, file_info) = result
-                        file_hashes[file_path] = (phash, file_info)
+                        file_path, (fingerprints, file_info) = result
+                        if file_path in file_roots:
+                            file_info['root'] = file_roots[file_path]
+                        file_hashes[file_path] = (fingerprints, file_info)
+                        md5 = file_info.get('md5')
+                        if hash_cache is not None and md5 and md5 not in cached_phashes:
+                            new_fingerprints[md5] = fingerprints
                     else:
                         skipped_count += 1
                 except Exception as e:
@@ -334,6 +743,23 @@ def find_duplicates(
                     return []
         
         logger.info(f"Discovery: {total_files} PDFs found. Processed OK: {len(file_hashes)}. Skipped/failed: {skipped_count}.")
+        
+        # Persist freshly computed perceptual hashes in one batch
+        if hash_cache is not None and new_fingerprints:
+            try:
+                by_algorithm: Dict[str, Dict[str, np.ndarray]] = {}
+                for md5, fps in new_fingerprints.items():
+                    # The Wand fallback of 'fast' mode yields a 'compat' dHash only
+                    file_algorithms = algorithms if fps.keys() == algorithms.keys() else \
+                        get_fingerprint_algorithms('compat')
+                    for kind, algorithm in file_algorithms.items():
+                        # calculate_hash returns all zeros when it fails; not worth keeping
+                        if kind in fps and fps[kind].any():
+                            by_algorithm.setdefault(algorithm, {})[md5] = fps[kind]
+                for algorithm, hashes in by_algorithm.items():
+                    hash_cache.store_perceptual_hashes(hashes, hash_size, algorithm)
+            except Exception as e:
+                logger.warning(f"Could not store perceptual hashes: {e}")
 
         # Update progress for duplicate detection phase
         if not update_progress("Analyzing file similarities..."):
@@ -349,7 +775,7 @@ def find_duplicates(
         
         # 1) Exact duplicate grouping by MD5
         md5_map: Dict[str, list[Dict[str, Any]]] = {}
-        for fpath, (phash, info) in file_hashes.items():
+        for fpath, (fingerprints, info) in file_hashes.items():
             md5 = info.get('md5')
             if md5:
                 md5_map.setdefault(md5, []).append(info)
@@ -359,7 +785,9 @@ def find_duplicates(
                 for fi in group:
                     processed.add(fi['path'])
         
-        # 2) Perceptual hash grouping for remaining files
+        # 2) Perceptual hash grouping for remaining files: dHash finds
+        #    candidates, the DCT pHash (when available) confirms them
+        confirm_threshold = settings.get('scan.phash_confirm_threshold', threshold)
         sorted_files = sorted(file_hashes.items(), key=lambda x: x[1][1]['size'])
         
         for i, (file1, (hash1, file_info1)) in enumerate(sorted_files):
@@ -380,9 +808,9 @@ def find_duplicates(
                     break
                 
                 # Compare perceptual hashes
-                similarity = float(np.mean(hash1 == hash2))
+                match, similarity = fingerprints_match(hash1, hash2, threshold, confirm_threshold)
                 
-                if similarity >= threshold:
+                if match:
                     duplicate_group.append(file_info2)
                     processed.add(file2)
         
@@ -404,7 +832,7 @@ def find_duplicates(
                 sample = sorted_files[:min(100, len(sorted_files))]
                 for i, (f1, (h1, info1)) in enumerate(sample):
                     for f2, (h2, info2) in sample[i+1:]:
-                        sim = float(np.mean(h1 == h2))
+                        sim = fingerprint_similarity(h1['dhash'], h2['dhash'])
                         top_pairs.append((sim, info1['path'], info2['path']))
                 top_pairs.sort(reverse=True, key=lambda x: x[0])
                 for sim, a, b in top_pairs[:5]:
@@ -449,7 +877,7 @@ def get_pdf_info(file_path: str) -> Dict[str, Any]:
         
         # Try to extract PDF metadata
         try:
-            with fitz.open(file_path) as doc:
+            with get_document_pool().open(file_path) as doc:
                 info['pages'] = len(doc)
                 
                 # Get document metadata
@@ -497,7 +925,7 @@ def calculate_file_hash(file_path: str, block_size: int = 65536) -> str:
 
 def calculate_image_hash(image_path: str, hash_size: int = 8) -> str:
     """
-    Calculate the perceptual hash of an image using Wand.
+    Calculate the average perceptual hash of an image file.
     
     Args:
         image_path: Path to the image file
@@ -507,20 +935,14 @@ def calculate_image_hash(image_path: str, hash_size: int = 8) -> str:
         Perceptual hash of the image
     """
     try:
-        with WandImage(filename=image_path) as img:
-            # Convert to grayscale and resize for consistent hashing
-            img.transform_colorspace('gray')
-            img.resize(hash_size, hash_size, 'lanczos')
-            
-            # Get pixel data as numpy array
-            img_data = np.array(img)
-            
-            # Calculate average pixel value
-            avg = np.mean(img_data)
-            
-            # Create hash string (1 if pixel > avg, 0 otherwise)
-            hash_str = ''.join(['1' if p > avg else '0' for p in img_data.flatten()])
-            return hash_str
+        pix = fitz.Pixmap(image_path)
+        if pix.alpha:
+            pix = fitz.Pixmap(pix, 0)  # drop the alpha channel
+        if pix.n != 1:
+            pix = fitz.Pixmap(fitz.csGRAY, pix)
+        gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+        ahash = compute_fingerprints(gray, hash_size)['ahash']
+        return ''.join('1' if bit else '0' for bit in ahash)
     except Exception as e:
         logger.error(f"Error calculating image hash for {image_path}: {e}")
         return ""
@@ -575,7 +997,10 @@ class PDFUtils:
     @staticmethod
     def is_pdf(file_path: str) -> bool:
         try:
-            return bool(file_path) and os.path.isfile(file_path) and file_path.lower().endswith(".pdf")
+            if not file_path or not os.path.isfile(file_path):
+                return False
+            # Fall back to the header for files with a missing or wrong extension
+            return file_path.lower().endswith(".pdf") or sniff_pdf_header(file_path)
         except Exception:
             return False
 
@@ -587,10 +1012,9 @@ class PDFUtils:
     def first_page_phash_str(file_path: str, progress_callback: callable = None) -> str:
         """Return a hashable perceptual hash string for the first page image."""
         try:
-            img = extract_first_page_pdf(file_path, progress_callback=progress_callback)
-            if img is None:
+            ph = first_page_hash(file_path, hash_size=8, progress_callback=progress_callback)
+            if ph is None:
                 return ""
-            ph = calculate_hash(img, hash_size=8)
             # Convert boolean array to compact string (e.g., '1010...')
             if isinstance(ph, np.ndarray):
                 return ''.join('1' if bool(x) else '0' for x in ph.flatten())
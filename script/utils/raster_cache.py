@@ -0,0 +1,225 @@
+"""
+Disk-backed cache of rendered PDF pages.
+
+Scanning, visual comparison and the viewer all rasterize pages, often the same
+pages at the same resolution. Rasters are stored here as compressed NumPy
+arrays, content-addressed by (file content hash, page, DPI, colorspace), so a
+page is rendered once no matter which component asks for it or under which
+path the file is found. The directory is kept below a size limit by evicting
+the least recently used rasters.
+
+Entries are written atomically, so several processes (e.g. page comparison
+workers) can share one cache directory.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Part of every key; bump when the stored format changes
+RASTER_CACHE_VERSION = 1
+
+DEFAULT_MAX_SIZE_MB = 512
+
+# Eviction trims the cache to this fraction of its limit so that it does not
+# run again on the next store
+EVICTION_TARGET = 0.9
+
+COLORSPACES = {'gray': fitz.csGRAY, 'rgb': fitz.csRGB}
+
+
+def render_raster(doc: 'fitz.Document', page_num: int, dpi: float, colorspace: str = 'rgb') -> np.ndarray:
+    """Render a page without caching.
+
+    Returns:
+        uint8 array of shape (H, W) for 'gray' or (H, W, 3) for 'rgb'
+    """
+    zoom = dpi / 72
+    pix = doc.load_page(page_num).get_pixmap(matrix=fitz.Matrix(zoom, zoom),
+                                             colorspace=COLORSPACES[colorspace], alpha=False)
+    raster = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    raster = raster[:, :pix.width * pix.n]
+    return raster if pix.n == 1 else raster.reshape(pix.height, pix.width, pix.n)
+
+
+class RasterCache:
+    """Content-addressed store of page rasters with size-based LRU eviction."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        """
+        Initialize the raster cache.
+
+        Args:
+            cache_dir: Directory holding the rasters (defaults to .data/rasters at project root)
+            max_size_mb: Size limit of the directory in megabytes
+        """
+        project_root = Path(__file__).parent.parent.parent
+        # Created on the first store
+        self.cache_dir = Path(cache_dir) if cache_dir else project_root / '.data' / 'rasters'
+        self.max_size_mb = max(0, int(max_size_mb))
+        self.max_bytes = self.max_size_mb * 1024 * 1024
+
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        # (path, size, mtime) -> content hash
+        self._content_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def content_hash(self, file_path: str) -> str:
+        """Return the MD5 of a file (as pdf_utils.calculate_file_hash), memoized by size and mtime."""
+        try:
+            stat = os.stat(file_path)
+            key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+            if key not in self._content_hashes:
+                hasher = hashlib.md5()
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(65536), b""):
+                        hasher.update(block)
+                self._content_hashes[key] = hasher.hexdigest()
+            return self._content_hashes[key]
+        except OSError as e:
+            logger.warning(f"content_hash: Could not hash {file_path}: {e}")
+            return ""
+
+    def _entry_path(self, content_hash: str, page_num: int, dpi: float, colorspace: str) -> Path:
+        key = f"v{RASTER_CACHE_VERSION}:{content_hash}:{page_num}:{round(dpi, 2):g}:{colorspace}"
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.npz"
+
+    def get(self, content_hash: str, page_num: int, dpi: float, colorspace: str) -> Optional[np.ndarray]:
+        """Return a cached raster, or None."""
+        path = self._entry_path(content_hash, page_num, dpi, colorspace)
+        try:
+            with np.load(path) as data:
+                raster = data['raster']
+            os.utime(path)  # mark as recently used
+            return raster
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"get: Discarding unreadable raster {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, content_hash: str, page_num: int, dpi: float, colorspace: str, raster: np.ndarray) -> None:
+        """Store a raster, evicting old ones when the size limit is exceeded."""
+        path = self._entry_path(content_hash, page_num, dpi, colorspace)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, raster=raster)
+            os.replace(tmp_name, path)
+            size = path.stat().st_size
+        except Exception as e:
+            logger.warning(f"put: Could not store raster {path.name}: {e}")
+            if 'tmp_name' in locals() and os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[0]
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_page(self, doc: 'fitz.Document', page_num: int, dpi: float, colorspace: str = 'rgb',
+                 content_hash: Optional[str] = None) -> np.ndarray:
+        """Return a page raster, rendering and storing it on a cache miss.
+
+        Args:
+            doc: Open document
+            page_num: Zero-based page number
+            dpi: Resolution
+            colorspace: 'gray' or 'rgb'
+            content_hash: Content hash of the document file; without it the
+                page is rendered but not cached
+
+        Returns:
+            See render_raster
+        """
+        if content_hash:
+            raster = self.get(content_hash, page_num, dpi, colorspace)
+            if raster is not None:
+                return raster
+        raster = render_raster(doc, page_num, dpi, colorspace)
+        if content_hash:
+            self.put(content_hash, page_num, dpi, colorspace, raster)
+        return raster
+
+    def _scan(self) -> Tuple[int, list]:
+        """Return the total size and the (mtime, size, path) of every entry."""
+        total, entries = 0, []
+        for path in self.cache_dir.glob('*/*.npz'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            total += stat.st_size
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return total, entries
+
+    def _evict(self) -> None:
+        """Delete the least recently used rasters until below the target size."""
+        total, entries = self._scan()
+        target = self.max_bytes * EVICTION_TARGET
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        logger.debug(f"_evict: Removed {removed} rasters, {total} bytes left")
+
+    def clear(self) -> bool:
+        """Delete every cached raster."""
+        with self._lock:
+            try:
+                for _, _, path in self._scan()[1]:
+                    path.unlink(missing_ok=True)
+                self._size = 0
+                return True
+            except Exception as e:
+                logger.error(f"clear: Error clearing raster cache: {e}")
+                return False
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of rasters and their total size."""
+        total, entries = self._scan()
+        return {'rasters': len(entries), 'size_bytes': total, 'max_bytes': self.max_bytes}
+
+
+_default_raster_cache: Optional[RasterCache] = None
+
+
+def get_raster_cache() -> Optional[RasterCache]:
+    """Return the shared raster cache configured in settings, or None if disabled."""
+    global _default_raster_cache
+    if not settings.get('raster_cache.enabled', True):
+        return None
+    if _default_raster_cache is None:
+        try:
+            cache_dir = settings.get('cache_dir', None)
+            _default_raster_cache = RasterCache(
+                cache_dir=str(Path(cache_dir) / 'rasters') if cache_dir else None,
+                max_size_mb=settings.get('raster_cache.max_size_mb', DEFAULT_MAX_SIZE_MB))
+        except Exception as e:
+            logger.warning(f"Raster cache unavailable, pages will not be cached: {e}")
+            return None
+    return _default_raster_cache
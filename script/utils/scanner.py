@@ -4,18 +4,34 @@ PDF Scanner Module - Enhanced with Hash Caching
 This module provides the PDFScanner class for scanning directories for duplicate PDF files.
 It includes improved error handling, logging, and hash caching for performance optimization.
 """
+import copy
 import os
 import logging
 import traceback
 from typing import Dict, Any, List, Optional, Callable
+
+import numpy as np
 from PyQt6.QtCore import pyqtSignal, QObject
 
 from .hash_cache import HashCache
+from .file_walker import FileWalker, SniffCache
+from .filters import FilterRules
+from .page_index import PageOverlap, build_page_index
+from .pdf_utils import calculate_file_hash
+from .similarity_graph import DEFAULT_GRAPH_FLOOR, GRAPH_FILE, SimilarityGraph
 from .text_processor import TextProcessor
+from .text_signature import TextSignature
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Default minimum fraction of a document's pages found in another for a page overlap
+DEFAULT_OVERLAP_RATIO = 0.5
+
+# Without the cache, files are compared when their page counts are equal or
+# their sizes differ by at most this fraction
+SIZE_TOLERANCE = 0.1
+
 class PDFScanner(QObject):
     """
     A class to handle scanning of PDF files and finding duplicates.
@@ -29,6 +45,8 @@ class PDFScanner(QObject):
     progress_updated = pyqtSignal(int, int, str)  # current, total, current_file
     duplicates_found = pyqtSignal(list)  # list of duplicate groups
     finished = pyqtSignal(list)  # list of duplicate groups (emitted when scan is complete)
+    similarity_graph_ready = pyqtSignal(object)  # SimilarityGraph of the scan, emitted before finished
+    page_overlaps_found = pyqtSignal(list)  # PageOverlap of documents sharing pages, emitted before finished
     
     def __init__(self, threshold: float = 0.8, dpi: int = 150, 
                  enable_hash_cache: bool = True, cache_dir: Optional[str] = None,
@@ -49,6 +67,17 @@ class PDFScanner(QObject):
         self.scan_parameters: Dict[str, Any] = {}
         self._stop_requested = False
         
+        # Roots of the current scan and the root each discovered file came from
+        self.scan_roots: List[str] = []
+        self.file_roots: Dict[str, str] = {}
+        self._sniff_cache: Optional[SniffCache] = None
+        
+        # Candidate pairs of the last scan, regrouped when the threshold changes
+        self.similarity_graph: Optional[SimilarityGraph] = None
+        
+        # Documents of the last scan sharing pages without being duplicates
+        self.page_overlaps: List[PageOverlap] = []
+        
         # Initialize hash cache if enabled
         self.hash_cache = None
         if enable_hash_cache:
@@ -101,38 +130,51 @@ class PDFScanner(QObject):
         """Start the scan operation.
         
         This method is called when the scan thread starts. It retrieves scan parameters
-        from the scan_parameters dictionary and calls scan_directory with those parameters.
+        from the scan_parameters dictionary and calls scan_directories with those parameters.
+        Either a list of roots under 'directories' or a single 'directory' is accepted.
         """
         try:
             logger.debug("start_scan: Starting scan process...")
             
             # Get scan parameters with defaults
             logger.debug("start_scan: Retrieving scan parameters")
-            scan_dir = self.scan_parameters.get('directory', '')
+            scan_dirs = list(self.scan_parameters.get('directories') or [])
+            if not scan_dirs and self.scan_parameters.get('directory'):
+                scan_dirs = [self.scan_parameters['directory']]
             recursive = self.scan_parameters.get('recursive', True)
             min_size = self.scan_parameters.get('min_file_size', 1024)  # 1KB
             max_size = self.scan_parameters.get('max_file_size', 1024 * 1024 * 1024)  # 1GB
             min_similarity = self.scan_parameters.get('min_similarity', 0.8)
+            similarity_floor = self.scan_parameters.get('similarity_floor', DEFAULT_GRAPH_FLOOR)
             enable_text_compare = self.scan_parameters.get('enable_text_compare', True)
+            sniff_content = self.scan_parameters.get('sniff_content', False)
+            detect_page_overlaps = self.scan_parameters.get('detect_page_overlaps', False)
+            page_overlap_ratio = self.scan_parameters.get('page_overlap_ratio', DEFAULT_OVERLAP_RATIO)
+            rules = self.scan_parameters.get('filter_rules')
+            exclude_dirs = self.scan_parameters.get('exclude_dirs') or []
+            if exclude_dirs:
+                # Copied so the caller's rules do not collect prunes across scans
+                rules = copy.deepcopy(rules) if rules else FilterRules()
+                for pattern in exclude_dirs:
+                    rules.add_prune(pattern)
             
-            logger.debug(f"start_scan: Parameters - Directory: {scan_dir}, Recursive: {recursive}, "
+            logger.debug(f"start_scan: Parameters - Directories: {scan_dirs}, Recursive: {recursive}, "
                         f"Min size: {min_size}, Max size: {max_size}, "
                         f"Min similarity: {min_similarity}, Text compare: {enable_text_compare}")
             
-            # Validate scan directory
-            logger.debug("start_scan: Validating scan directory")
-            if not scan_dir or not os.path.isdir(scan_dir):
-                error_msg = f"Invalid or non-existent scan directory: {scan_dir}"
-                logger.error(f"start_scan: {error_msg}")
-                self.status_updated.emit(
-                    self.tr("scanner.error", f"Error: {error_msg}"), 
-                    0, 0
-                )
-                self.finished.emit([])
-                return
-                
-            if not os.access(scan_dir, os.R_OK):
-                error_msg = f"No read permissions for directory: {scan_dir}"
+            # Validate scan directories, skipping unusable ones as long as one remains
+            logger.debug("start_scan: Validating scan directories")
+            valid_dirs = []
+            for scan_dir in scan_dirs:
+                if not scan_dir or not os.path.isdir(scan_dir):
+                    logger.error(f"start_scan: Invalid or non-existent scan directory: {scan_dir}")
+                elif not os.access(scan_dir, os.R_OK):
+                    logger.error(f"start_scan: No read permissions for directory: {scan_dir}")
+                else:
+                    valid_dirs.append(scan_dir)
+            
+            if not valid_dirs:
+                error_msg = f"Invalid or non-existent scan directory: {', '.join(map(str, scan_dirs))}"
                 logger.error(f"start_scan: {error_msg}")
                 self.status_updated.emit(
                     self.tr("scanner.error", f"Error: {error_msg}"), 
@@ -141,7 +183,7 @@ class PDFScanner(QObject):
                 self.finished.emit([])
                 return
             
-            logger.info(f"start_scan: Starting PDF scan in directory: {scan_dir}")
+            logger.info(f"start_scan: Starting PDF scan in directories: {valid_dirs}")
             self.status_updated.emit(
                 self.tr("scanner.scan_started", "Starting scan..."),
                 0, 0
@@ -152,14 +194,19 @@ class PDFScanner(QObject):
             self._reset_scan_state()
             
             # Start the scan with all parameters
-            logger.debug("start_scan: Calling scan_directory")
-            self.scan_directory(
-                directory=scan_dir, 
+            logger.debug("start_scan: Calling scan_directories")
+            self.scan_directories(
+                directories=valid_dirs, 
                 recursive=recursive,
                 min_file_size=min_size,
                 max_file_size=max_size,
                 min_similarity=min_similarity,
-                enable_text_compare=enable_text_compare
+                enable_text_compare=enable_text_compare,
+                rules=rules,
+                sniff_content=sniff_content,
+                similarity_floor=similarity_floor,
+                detect_page_overlaps=detect_page_overlaps,
+                page_overlap_ratio=page_overlap_ratio
             )
             
             logger.info("start_scan: PDF scan completed successfully")
@@ -176,6 +223,10 @@ class PDFScanner(QObject):
     def _reset_scan_state(self) -> None:
         """Reset the scanner state before starting a new scan."""
         self._stop_requested = False
+        self.scan_roots = []
+        self.file_roots = {}
+        self.similarity_graph = None
+        self.page_overlaps = []
         # Add any other state that needs to be reset here
     
     def scan_directory(self, directory: str, recursive: bool = True, 
@@ -183,8 +234,7 @@ class PDFScanner(QObject):
                       min_similarity: float = 0.8, enable_text_compare: bool = True) -> None:
         """Scan a directory for PDF files and find duplicates.
         
-        This method walks through the directory, processes PDF files, and identifies duplicates
-        based on content similarity. Uses hash caching for improved performance.
+        Convenience wrapper around scan_directories for a single root.
         
         Args:
             directory: Path to the directory to scan
@@ -194,57 +244,88 @@ class PDFScanner(QObject):
             min_similarity: Minimum similarity threshold (0.0 to 1.0) to consider files as duplicates
             enable_text_compare: Whether to enable text-based comparison
         """
+        self.scan_directories(
+            directories=[directory],
+            recursive=recursive,
+            min_file_size=min_file_size,
+            max_file_size=max_file_size,
+            min_similarity=min_similarity,
+            enable_text_compare=enable_text_compare
+        )
+    
+    def scan_directories(self, directories: List[str], recursive: bool = True, 
+                        min_file_size: int = 1024, max_file_size: int = 1024*1024*1024,
+                        min_similarity: float = 0.8, enable_text_compare: bool = True,
+                        rules: Optional[FilterRules] = None,
+                        sniff_content: bool = False,
+                        similarity_floor: float = DEFAULT_GRAPH_FLOOR,
+                        detect_page_overlaps: bool = False,
+                        page_overlap_ratio: float = DEFAULT_OVERLAP_RATIO) -> None:
+        """Scan one or more directories for PDF files and find duplicates.
+        
+        Overlapping roots are normalized so every file is processed once, and all
+        files go into a single shared duplicate index. When more than one root is
+        scanned, each reported file carries the root it was found under.
+        Uses hash caching for improved performance.
+        
+        Args:
+            directories: Paths of the directories to scan
+            recursive: Whether to scan subdirectories recursively
+            min_file_size: Minimum file size in bytes to include in the scan
+            max_file_size: Maximum file size in bytes to include in the scan
+            min_similarity: Minimum similarity threshold (0.0 to 1.0) to consider files as duplicates
+            enable_text_compare: Whether to enable text-based comparison
+            rules: Optional compiled filter rules evaluated during the walk
+            sniff_content: Also detect PDFs without a .pdf extension by their header
+            similarity_floor: Lowest similarity kept in the similarity graph, i.e. the
+                lowest threshold the results can be regrouped at without rescanning
+            detect_page_overlaps: Also report documents that contain each other's
+                pages (merged packets, excerpts), see find_page_overlaps
+            page_overlap_ratio: Minimum fraction of one document's pages found in
+                the other for a page overlap
+        """
         try:
-            logger.info(f"scan_directory: Starting PDF scan in directory: {directory}")
+            logger.info(f"scan_directories: Starting PDF scan in directories: {directories}")
             
-            # Validate directory exists
-            if not os.path.exists(directory):
-                logger.error(f"scan_directory: Directory does not exist: {directory}")
-                self.status_updated.emit(
-                    self.tr("scanner.error", "Error: Directory does not exist: {dir}").format(dir=directory),
-                    0, 0
-                )
-                self.finished.emit([])
-                return
-            
-            if not os.path.isdir(directory):
-                logger.error(f"scan_directory: Path is not a directory: {directory}")
-                self.status_updated.emit(
-                    self.tr("scanner.error", "Error: Path is not a directory: {dir}").format(dir=directory),
-                    0, 0
-                )
-                self.finished.emit([])
-                return
+            # Validate directories exist
+            for directory in directories:
+                if not os.path.exists(directory):
+                    logger.error(f"scan_directories: Directory does not exist: {directory}")
+                    self.status_updated.emit(
+                        self.tr("scanner.error", "Error: Directory does not exist: {dir}").format(dir=directory),
+                        0, 0
+                    )
+                    self.finished.emit([])
+                    return
+                
+                if not os.path.isdir(directory):
+                    logger.error(f"scan_directories: Path is not a directory: {directory}")
+                    self.status_updated.emit(
+                        self.tr("scanner.error", "Error: Path is not a directory: {dir}").format(dir=directory),
+                        0, 0
+                    )
+                    self.finished.emit([])
+                    return
             
             # Find all PDF files
-            logger.debug("scan_directory: Finding all PDF files")
-            pdf_files = []
+            logger.debug("scan_directories: Finding all PDF files")
             try:
-                if recursive:
-                    logger.debug("scan_directory: Scanning recursively")
-                    for root, _, files in os.walk(directory):
-                        for file in files:
-                            if file.lower().endswith('.pdf'):
-                                file_path = os.path.join(root, file)
-                                try:
-                                    file_size = os.path.getsize(file_path)
-                                    if min_file_size <= file_size <= max_file_size:
-                                        pdf_files.append(os.path.normpath(file_path))
-                                except (OSError, Exception) as e:
-                                    logger.warning(f"scan_directory: Error accessing {file_path}: {e}")
-                else:
-                    logger.debug("scan_directory: Scanning non-recursively")
-                    for file in os.listdir(directory):
-                        if file.lower().endswith('.pdf'):
-                            file_path = os.path.join(directory, file)
-                            try:
-                                file_size = os.path.getsize(file_path)
-                                if min_file_size <= file_size <= max_file_size:
-                                    pdf_files.append(os.path.normpath(file_path))
-                            except (OSError, Exception) as e:
-                                logger.warning(f"scan_directory: Error accessing {file_path}: {e}")
+                walker = FileWalker(
+                    directories,
+                    recursive=recursive,
+                    min_file_size=min_file_size,
+                    max_file_size=max_file_size,
+                    should_stop=lambda: self._stop_requested,
+                    rules=rules,
+                    sniff_content=sniff_content,
+                    sniff_cache=self._get_sniff_cache()
+                )
+                self.scan_roots = walker.roots
+                discovered = walker.collect()
+                self.file_roots = {found.path: found.root for found in discovered}
+                pdf_files = [found.path for found in discovered]
             except Exception as e:
-                logger.error(f"scan_directory: Error finding PDF files: {e}", exc_info=True)
+                logger.error(f"scan_directories: Error finding PDF files: {e}", exc_info=True)
                 self.status_updated.emit(
                     self.tr("scanner.error", "Error finding PDF files: {error}").format(error=str(e)),
                     0, 0
@@ -253,10 +334,10 @@ class PDFScanner(QObject):
                 return
             
             total_files = len(pdf_files)
-            logger.info(f"scan_directory: Found {total_files} PDF files to process")
+            logger.info(f"scan_directories: Found {total_files} PDF files to process in {len(self.scan_roots)} root(s)")
             
             if total_files == 0:
-                logger.info("scan_directory: No PDF files found in the specified directory")
+                logger.info("scan_directories: No PDF files found in the specified directories")
                 self.status_updated.emit(
                     self.tr("scanner.no_files", "No PDF files found in the specified directory"),
                     0, 0
@@ -264,24 +345,26 @@ class PDFScanner(QObject):
                 self.finished.emit([])
                 return
                 
-            logger.info(f"scan_directory: Found {total_files} PDF files to process")
+            logger.info(f"scan_directories: Found {total_files} PDF files to process")
             
             # Use hash cache if available for faster duplicate detection
-            logger.debug("scan_directory: Checking hash cache availability")
-            logger.debug(f"scan_directory: enable_hash_cache={self.enable_hash_cache}, hash_cache={self.hash_cache is not None}")
+            logger.debug("scan_directories: Checking hash cache availability")
+            logger.debug(f"scan_directories: enable_hash_cache={self.enable_hash_cache}, hash_cache={self.hash_cache is not None}")
             if self.hash_cache:
-                logger.debug(f"scan_directory: hash_cache.is_available()={self.hash_cache.is_available()}")
+                logger.debug(f"scan_directories: hash_cache.is_available()={self.hash_cache.is_available()}")
             
             try:
                 if self.enable_hash_cache and self.hash_cache and self.hash_cache.is_available():
-                    logger.info("scan_directory: Using hash cache for duplicate detection")
-                    duplicates = self._find_duplicates_with_cache(pdf_files, min_similarity, enable_text_compare)
+                    logger.info("scan_directories: Using hash cache for duplicate detection")
+                    duplicates = self._find_duplicates_with_cache(pdf_files, min_similarity, enable_text_compare,
+                                                                  similarity_floor)
                 else:
-                    logger.info("scan_directory: Hash cache not available, using traditional scanning")
-                    logger.debug(f"scan_directory: Cache status - enabled: {self.enable_hash_cache}, cache_exists: {self.hash_cache is not None}, available: {self.hash_cache.is_available() if self.hash_cache else False}")
-                    duplicates = self._find_duplicates_traditional(pdf_files, min_similarity, enable_text_compare)
+                    logger.info("scan_directories: Hash cache not available, using traditional scanning")
+                    logger.debug(f"scan_directories: Cache status - enabled: {self.enable_hash_cache}, cache_exists: {self.hash_cache is not None}, available: {self.hash_cache.is_available() if self.hash_cache else False}")
+                    duplicates = self._find_duplicates_traditional(pdf_files, min_similarity, enable_text_compare,
+                                                                   similarity_floor)
             except Exception as e:
-                logger.error(f"scan_directory: Error during duplicate detection: {e}", exc_info=True)
+                logger.error(f"scan_directories: Error during duplicate detection: {e}", exc_info=True)
                 self.status_updated.emit(
                     self.tr("scanner.error", "Error during duplicate detection: {error}").format(error=str(e)),
                     0, 0
@@ -289,23 +372,40 @@ class PDFScanner(QObject):
                 self.finished.emit([])
                 return
             
+            if detect_page_overlaps and not self._stop_requested:
+                self.status_updated.emit(
+                    self.tr("scanner.indexing_pages", "Looking for shared pages..."),
+                    total_files, total_files
+                )
+                try:
+                    self.page_overlaps = self.find_page_overlaps(pdf_files, page_overlap_ratio, duplicates)
+                except Exception as e:
+                    logger.error(f"scan_directories: Error finding page overlaps: {e}", exc_info=True)
+            
             if not self._stop_requested:
-                logger.info(f"scan_directory: Scan complete. Found {len(duplicates)} groups of duplicate files")
+                logger.info(f"scan_directories: Scan complete. Found {len(duplicates)} groups of duplicate files")
                 self.status_updated.emit(
                     self.tr("scanner.complete", "Scan complete. Found {count} groups of duplicates").format(
                         count=len(duplicates)
                     ),
                     total_files, total_files
                 )
+                if len(self.scan_roots) > 1:
+                    duplicates = self._annotate_roots(duplicates)
+                if self.similarity_graph is not None:
+                    self._save_similarity_graph()
+                    self.similarity_graph_ready.emit(self.similarity_graph)
+                if detect_page_overlaps:
+                    self.page_overlaps_found.emit(self.page_overlaps)
                 self.duplicates_found.emit(duplicates)
                 self.finished.emit(duplicates)
             else:
-                logger.info("scan_directory: Scan was stopped by user")
+                logger.info("scan_directories: Scan was stopped by user")
                 self.finished.emit([])
                 
         except Exception as e:
             error_msg = f"Error scanning directory: {str(e)}"
-            logger.error(f"scan_directory: {error_msg}", exc_info=True)
+            logger.error(f"scan_directories: {error_msg}", exc_info=True)
             self.status_updated.emit(
                 self.tr("scanner.error", "Error: {error}").format(error=error_msg), 
                 0, 0
@@ -313,9 +413,17 @@ class PDFScanner(QObject):
             self.finished.emit([])
     
     def _find_duplicates_with_cache(self, pdf_files: List[str], min_similarity: float, 
-                                   enable_text_compare: bool) -> List[List[str]]:
-        """Find duplicates using hash cache for improved performance."""
+                                   enable_text_compare: bool,
+                                   similarity_floor: float = DEFAULT_GRAPH_FLOOR) -> List[List[str]]:
+        """Find duplicates using hash cache for improved performance.
+        
+        Every pair scored at or above the similarity floor is kept in
+        self.similarity_graph; the returned groups are its groups at min_similarity.
+        """
         duplicates = []
+        graph = SimilarityGraph(floor=min(similarity_floor, min_similarity))
+        for file_path in pdf_files:
+            graph.add_node(file_path)
         
         # Emit initial progress
         self.progress_updated.emit(0, len(pdf_files), "")
@@ -325,8 +433,36 @@ class PDFScanner(QObject):
         )
         
         if enable_text_compare:
+            # Exact file hash tier first: byte-identical copies are grouped
+            # without opening them, only one file per group goes on
+            file_hashes = self.hash_cache.get_file_hashes(pdf_files)
+            identical_groups = list(self.hash_cache.find_identical_files(pdf_files, file_hashes).values())
+            for group in identical_groups:
+                graph.add_group(group)
+            grouped = {file_path for group in identical_groups for file_path in group[1:]}
+            if grouped:
+                logger.info(f"_find_duplicates_with_cache: {len(grouped)} files matched by file hash, "
+                            f"skipping their structure and text comparison")
+                pdf_files = [file_path for file_path in pdf_files if file_path not in grouped]
+            
+            # Exact structural tier next: re-saved copies are grouped without
+            # extracting their text, only one file per group goes on to the text tier
+            self.status_updated.emit(
+                self.tr("scanner.structure_tier", "Comparing document structure..."),
+                0, len(pdf_files)
+            )
+            structure_groups = list(self.hash_cache.find_duplicates_by_structure(pdf_files, file_hashes).values())
+            for group in structure_groups:
+                graph.add_group(group)
+            grouped = {file_path for group in structure_groups for file_path in group[1:]}
+            if grouped:
+                logger.info(f"_find_duplicates_with_cache: {len(grouped)} files matched by structure, "
+                            f"skipping their text extraction")
+                pdf_files = [file_path for file_path in pdf_files if file_path not in grouped]
+            
             # Use content-based duplicate detection with cache
-            # Process files in smaller batches to provide progress updates
+            # Warm the cache in smaller batches to provide progress updates, then
+            # group all files together so duplicates across batches and roots are found
             batch_size = max(1, len(pdf_files) // 20)  # Update progress every ~5%
             for i in range(0, len(pdf_files), batch_size):
                 if self._stop_requested:
@@ -345,16 +481,41 @@ class PDFScanner(QObject):
                 )
                 
                 # Process this batch
-                content_groups = self.hash_cache.find_duplicates_by_content(batch_files, min_similarity)
-                duplicates.extend(list(content_groups.values()))
+                for file_path in batch_files:
+                    try:
+                        self.hash_cache.cache_file(file_path)
+                    except Exception as e:
+                        logger.error(f"_find_duplicates_with_cache: Error caching {file_path}: {e}")
                 
                 # Process events to keep UI responsive
                 if hasattr(self, 'thread') and self.thread():
                     self.thread().msleep(1)  # Small delay to allow UI updates
+            
+            if not self._stop_requested:
+                # Exact text tier: same processed text (or same bytes when there is
+                # no text) is grouped by one query, only representatives go on to
+                # the pairwise similarity tier
+                text_groups = list(self.hash_cache.find_exact_duplicates(pdf_files).values())
+                for group in text_groups:
+                    graph.add_group(group)
+                grouped = {file_path for group in text_groups for file_path in group[1:]}
+                if grouped:
+                    logger.info(f"_find_duplicates_with_cache: {len(grouped)} files matched by text or file hash, "
+                                f"skipping their similarity comparison")
+                    pdf_files = [file_path for file_path in pdf_files if file_path not in grouped]
+                
+                # Similarity tier: every pair above the floor is kept, so the
+                # results can be regrouped at another threshold without rescanning
+                for file1, file2, similarity in self.hash_cache.find_similarity_edges(pdf_files, graph.floor):
+                    graph.add_edge(file1, file2, similarity)
+                self.similarity_graph = graph
+                duplicates = graph.groups(min_similarity)
         else:
             # Use hash-based duplicate detection
-            hash_groups = self.hash_cache.find_duplicates_by_hash(pdf_files)
-            duplicates = list(hash_groups.values())
+            for group in self.hash_cache.find_duplicates_by_hash(pdf_files).values():
+                graph.add_group(group)
+            self.similarity_graph = graph
+            duplicates = graph.groups(min_similarity)
             
             # Emit final progress for hash-based method
             self.progress_updated.emit(len(pdf_files), len(pdf_files), "")
@@ -366,77 +527,46 @@ class PDFScanner(QObject):
         return duplicates
     
     def _find_duplicates_traditional(self, pdf_files: List[str], min_similarity: float, 
-                                    enable_text_compare: bool) -> List[List[str]]:
-        """Find duplicates using traditional method without cache."""
+                                    enable_text_compare: bool,
+                                    similarity_floor: float = DEFAULT_GRAPH_FLOOR) -> List[List[str]]:
+        """Find duplicates using traditional method without cache.
+        
+        The text of every file is read once into a signature. Signatures are
+        only compared between files with the same page count or sizes within
+        SIZE_TOLERANCE of each other. Files without text are only grouped
+        with byte-identical copies. Compared pairs are kept in
+        self.similarity_graph like in the cached scan.
+        """
         logger.debug(f"_find_duplicates_traditional: Starting with {len(pdf_files)} files")
-        duplicates = []
+        graph = SimilarityGraph(floor=min(similarity_floor, min_similarity))
+        for file_path in pdf_files:
+            graph.add_node(file_path)
         
         try:
-            for i, file_path in enumerate(pdf_files, 1):
-                if self._stop_requested:
-                    logger.info("_find_duplicates_traditional: Scan stopped by user")
-                    self.status_updated.emit(
-                        self.tr("scanner.stopped", "Scan stopped"), 
-                        i, len(pdf_files)
-                    )
-                    break
-                    
-                # Update progress
-                self.progress_updated.emit(i, len(pdf_files), file_path)
-                self.status_updated.emit(
-                    self.tr("scanner.processing", "Processing {current} of {total}: {file}").format(
-                        current=i, total=len(pdf_files), file=os.path.basename(file_path)
-                    ),
-                    i, len(pdf_files)
-                )
-                
+            sizes = np.zeros(len(pdf_files), dtype=np.int64)
+            for n, file_path in enumerate(pdf_files):
                 try:
-                    # Check if this file is a duplicate of any processed file
-                    is_duplicate = False
-                    for group in duplicates:
-                        if enable_text_compare:
-                            # Compare text content
-                            try:
-                                logger.debug(f"_find_duplicates_traditional: Comparing text content for {file_path}")
-                                text1 = self.text_processor.extract_text(file_path)
-                                text2 = self.text_processor.extract_text(group[0])
-                                similarity = self.text_processor.compare_texts(text1, text2)
-                                
-                                if similarity >= min_similarity:
-                                    logger.debug(f"_find_duplicates_traditional: Found duplicate with similarity {similarity}")
-                                    group.append(file_path)
-                                    is_duplicate = True
-                                    break
-                            except Exception as e:
-                                logger.warning(f"_find_duplicates_traditional: Error comparing text content: {e}")
-                                # Fall back to file size comparison
-                                try:
-                                    if os.path.getsize(file_path) == os.path.getsize(group[0]):
-                                        group.append(file_path)
-                                        is_duplicate = True
-                                        break
-                                except Exception as size_error:
-                                    logger.warning(f"_find_duplicates_traditional: Error comparing file sizes: {size_error}")
-                        else:
-                            # Simple file size comparison
-                            try:
-                                if os.path.getsize(file_path) == os.path.getsize(group[0]):
-                                    group.append(file_path)
-                                    is_duplicate = True
-                                    break
-                            except Exception as size_error:
-                                logger.warning(f"_find_duplicates_traditional: Error getting file size: {size_error}")
-                    
-                    if not is_duplicate:
-                        # Start a new duplicate group
-                        logger.debug(f"_find_duplicates_traditional: Starting new group for {file_path}")
-                        duplicates.append([file_path])
-                        
-                except Exception as e:
-                    logger.error(f"_find_duplicates_traditional: Error processing {file_path}: {e}", exc_info=True)
+                    sizes[n] = os.path.getsize(file_path)
+                except OSError as e:
+                    logger.warning(f"_find_duplicates_traditional: Error getting file size: {e}")
+                    sizes[n] = -1
+            
+            if not enable_text_compare:
+                # Simple file size comparison
+                by_size: Dict[int, List[str]] = {}
+                for file_path, size in zip(pdf_files, sizes.tolist()):
+                    if size >= 0:
+                        by_size.setdefault(size, []).append(file_path)
+                for group in by_size.values():
+                    graph.add_group(group)
+            else:
+                signatures = self._read_signatures(pdf_files)
+                if self._stop_requested:
+                    return []
+                self._add_signature_edges(graph, pdf_files, sizes, signatures)
             
-            # Filter out groups with only one file (no duplicates)
-            duplicates = [group for group in duplicates if len(group) > 1]
+            self.similarity_graph = graph
+            duplicates = graph.groups(min_similarity)
             logger.debug(f"_find_duplicates_traditional: Found {len(duplicates)} duplicate groups")
             
         except Exception as e:
@@ -446,6 +576,154 @@ class PDFScanner(QObject):
         
         return duplicates
     
+    def _read_signatures(self, pdf_files: List[str]) -> List[Optional[TextSignature]]:
+        """Read the text signature of every file, None where there is no text."""
+        signatures: List[Optional[TextSignature]] = []
+        for i, file_path in enumerate(pdf_files, 1):
+            if self._stop_requested:
+                logger.info("_find_duplicates_traditional: Scan stopped by user")
+                self.status_updated.emit(
+                    self.tr("scanner.stopped", "Scan stopped"), 
+                    i, len(pdf_files)
+                )
+                break
+            
+            # Update progress
+            self.progress_updated.emit(i, len(pdf_files), file_path)
+            self.status_updated.emit(
+                self.tr("scanner.processing", "Processing {current} of {total}: {file}").format(
+                    current=i, total=len(pdf_files), file=os.path.basename(file_path)
+                ),
+                i, len(pdf_files)
+            )
+            
+            signature = self.text_processor.extract_signature(file_path)
+            signatures.append(signature if signature is not None and not signature.is_empty else None)
+        return signatures
+    
+    @staticmethod
+    def _add_signature_edges(graph: SimilarityGraph, pdf_files: List[str], sizes: np.ndarray,
+                             signatures: List[Optional[TextSignature]]) -> None:
+        """Score the pairs of files with the same page count or similar sizes."""
+        with_text = [n for n, signature in enumerate(signatures) if signature is not None]
+        
+        # Files without text are only grouped with copies of the same bytes
+        by_size: Dict[int, List[str]] = {}
+        for n, signature in enumerate(signatures):
+            if signature is None and sizes[n] >= 0:
+                by_size.setdefault(int(sizes[n]), []).append(pdf_files[n])
+        for same_size in by_size.values():
+            if len(same_size) > 1:
+                by_hash: Dict[str, List[str]] = {}
+                for file_path in same_size:
+                    file_hash = calculate_file_hash(file_path)
+                    if file_hash:
+                        by_hash.setdefault(file_hash, []).append(file_path)
+                for group in by_hash.values():
+                    graph.add_group(group)
+        
+        if len(with_text) < 2:
+            return
+        indices = np.asarray(with_text)
+        minhashes = np.stack([signatures[n].minhash for n in with_text])
+        pages = np.asarray([signatures[n].page_count for n in with_text])
+        text_sizes = sizes[indices].astype(np.float64)
+        
+        # Candidates: same page count, or a size within the tolerance
+        by_pages: Dict[int, np.ndarray] = {}
+        for page_count in np.unique(pages):
+            by_pages[int(page_count)] = np.flatnonzero(pages == page_count)
+        order = np.argsort(text_sizes, kind='stable')
+        sorted_sizes = text_sizes[order]
+        
+        compared = 0
+        for i in range(len(with_text)):
+            low = np.searchsorted(sorted_sizes, text_sizes[i] * (1 - SIZE_TOLERANCE), side='left')
+            high = np.searchsorted(sorted_sizes, text_sizes[i] * (1 + SIZE_TOLERANCE), side='right')
+            candidates = np.union1d(order[low:high], by_pages[int(pages[i])])
+            candidates = candidates[candidates > i]
+            if not len(candidates):
+                continue
+            compared += len(candidates)
+            # MinHash Jaccard estimates of file i against all its candidates at once
+            similarities = (minhashes[candidates] == minhashes[i]).mean(axis=1)
+            for j in np.flatnonzero(similarities >= graph.floor):
+                graph.add_edge(pdf_files[indices[i]], pdf_files[indices[candidates[j]]], float(similarities[j]))
+        
+        logger.debug(f"_find_duplicates_traditional: Compared {compared} candidate pairs of {len(with_text)} files")
+    
+    def _save_similarity_graph(self) -> None:
+        """Save the similarity graph of the scan next to the hash cache."""
+        if len(self.scan_roots) > 1:
+            self.similarity_graph.roots = {path: self.file_roots.get(path, '') for path in self.similarity_graph.paths}
+        if not (self.enable_hash_cache and self.hash_cache and self.hash_cache.is_available()):
+            return
+        try:
+            self.similarity_graph.save(os.path.join(self.hash_cache.cache_dir, GRAPH_FILE))
+        except Exception as e:
+            logger.warning(f"_save_similarity_graph: Could not save the similarity graph: {e}")
+    
+    def _get_sniff_cache(self) -> SniffCache:
+        """Return the header sniffing cache, persisted in the hash cache when available."""
+        if self._sniff_cache is None:
+            backend = None
+            if self.enable_hash_cache and self.hash_cache and self.hash_cache.is_available():
+                backend = self.hash_cache
+            self._sniff_cache = SniffCache(backend)
+        return self._sniff_cache
+    
+    def _annotate_roots(self, duplicates: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        """Attach the originating scan root to every file of every duplicate group."""
+        return self.annotate_roots(duplicates, self.file_roots)
+    
+    @staticmethod
+    def annotate_roots(duplicates: List[List[str]], file_roots: Dict[str, str]) -> List[List[Dict[str, Any]]]:
+        """Attach the scan root of every file, as found in file_roots, to every duplicate group."""
+        annotated = []
+        for group in duplicates:
+            entries = []
+            for file_path in group:
+                try:
+                    stat = os.stat(file_path)
+                    size, modified = stat.st_size, stat.st_mtime
+                except OSError:
+                    size, modified = 0, 0
+                entries.append({
+                    'path': file_path,
+                    'size': size,
+                    'modified': modified,
+                    'root': file_roots.get(file_path, '')
+                })
+            annotated.append(entries)
+        return annotated
+    
+    def find_page_overlaps(self, pdf_files: List[str], min_ratio: float = DEFAULT_OVERLAP_RATIO,
+                           duplicates: Optional[List[List[str]]] = None) -> List[PageOverlap]:
+        """Find documents that contain each other's pages, such as merged packets and excerpts.
+        
+        Args:
+            pdf_files: Paths of the PDF files to check
+            min_ratio: Minimum fraction of one document's pages found in the other
+            duplicates: Duplicate groups already found; pairs within a group
+                are not reported again
+            
+        Returns:
+            Page overlaps with their containment relation and ratios
+        """
+        hash_cache = self.hash_cache if self.enable_hash_cache and self.hash_cache and self.hash_cache.is_available() else None
+        index = build_page_index(
+            pdf_files,
+            hash_cache=hash_cache,
+            progress_callback=lambda message: not self._stop_requested
+        )
+        overlaps = index.overlaps(min_ratio=min_ratio)
+        if duplicates:
+            group_of = {file_path: n for n, group in enumerate(duplicates) for file_path in group}
+            overlaps = [overlap for overlap in overlaps
+                        if group_of.get(overlap.doc_a, -1) != group_of.get(overlap.doc_b, -2)]
+        logger.info(f"find_page_overlaps: {len(overlaps)} document pairs share pages")
+        return overlaps
+    
     def get_cache_stats(self) -> Optional[Dict[str, Any]]:
         """Get cache statistics if hash cache is enabled."""
         if self.enable_hash_cache and self.hash_cache and self.hash_cache.is_available():
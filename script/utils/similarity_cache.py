@@ -0,0 +1,138 @@
+"""
+Cache of pairwise similarity scores.
+
+Verifying that two files are duplicates (text similarity, page-by-page visual
+comparison) is the most expensive step of a scan, and the same pairs are
+verified again on every scan and whenever a group is reopened. Scores are
+therefore stored in the hash cache, keyed by the content hashes of the two
+files, the comparison method and its parameters. A pair is only compared again
+when one of the files changes or the comparison parameters do.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from .hash_cache import HashCache
+
+logger = logging.getLogger(__name__)
+
+# (score, optional JSON-serializable information about the comparison)
+PairScore = Tuple[float, Optional[Dict[str, Any]]]
+
+# Pending scores are written once this many have accumulated
+FLUSH_BATCH = 1000
+
+
+def _pair_key(hash1: str, hash2: str) -> Tuple[str, str]:
+    return (hash1, hash2) if hash1 <= hash2 else (hash2, hash1)
+
+
+class SimilarityCache:
+    """Scores of one comparison method and parameter set, backed by the hash cache.
+
+    Scores are kept in memory and written to the hash cache in batches, at
+    the latest by flush(); without a hash cache they only live as long as
+    this object.
+    """
+
+    def __init__(self, hash_cache: Optional[HashCache], method: str, params: Dict[str, Any]):
+        """
+        Initialize the cache.
+
+        Args:
+            hash_cache: Persistent store (optional)
+            method: Name of the comparison, e.g. 'text_jaccard'
+            params: Every parameter the score depends on, including a version
+                of the comparison code
+        """
+        self.hash_cache = hash_cache if hash_cache is not None and hash_cache.is_available() else None
+        self.method = method
+        self.params = json.dumps(params, sort_keys=True)
+
+        self._lock = threading.Lock()
+        self._scores: Dict[Tuple[str, str], PairScore] = {}
+        self._pending: Dict[Tuple[str, str], PairScore] = {}
+        # Hashes whose stored pairs with each other have all been prefetched
+        self._loaded: Set[str] = set()
+        # (path, size, mtime) -> file hash
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def file_hash(self, file_path: str) -> str:
+        """Return the SHA-256 of a file (as HashCache), memoized by size and mtime."""
+        try:
+            stat = os.stat(file_path)
+            key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+            if key not in self._file_hashes:
+                hasher = hashlib.sha256()
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b""):
+                        hasher.update(block)
+                self._file_hashes[key] = hasher.hexdigest()
+            return self._file_hashes[key]
+        except OSError as e:
+            logger.warning(f"file_hash: Could not hash {file_path}: {e}")
+            return ""
+
+    def _load(self, hashes: Set[str]) -> bool:
+        """Load the stored scores between any two of the hashes; False if the lookup failed."""
+        if self.hash_cache is None:
+            return True
+        try:
+            stored = self.hash_cache.get_pair_similarities(sorted(hashes), self.method, self.params)
+        except Exception as e:
+            logger.warning(f"_load: Pair score lookup failed: {e}")
+            return False
+        with self._lock:
+            for key, score in stored.items():
+                self._scores.setdefault(key, score)
+        return True
+
+    def prefetch(self, file_paths: Iterable[str]) -> None:
+        """Load every stored score between two of the files with one query."""
+        hashes = {h for h in (self.file_hash(path) for path in file_paths) if h}
+        if hashes - self._loaded:
+            # Pairs with the files of earlier prefetches are included
+            hashes |= self._loaded
+            if self._load(hashes):
+                self._loaded = hashes
+
+    def get(self, file1: str, file2: str) -> Optional[PairScore]:
+        """Return the stored score of two files, or None."""
+        hash1, hash2 = self.file_hash(file1), self.file_hash(file2)
+        if not hash1 or not hash2:
+            return None
+        key = _pair_key(hash1, hash2)
+        with self._lock:
+            if key in self._scores:
+                return self._scores[key]
+        if hash1 in self._loaded and hash2 in self._loaded:
+            return None
+        self._load({hash1, hash2})
+        with self._lock:
+            return self._scores.get(key)
+
+    def put(self, file1: str, file2: str, score: float, info: Optional[Dict[str, Any]] = None) -> None:
+        """Remember the score of two files until the next flush()."""
+        hash1, hash2 = self.file_hash(file1), self.file_hash(file2)
+        if not hash1 or not hash2:
+            return
+        key = _pair_key(hash1, hash2)
+        with self._lock:
+            self._scores[key] = self._pending[key] = (score, info)
+            full = len(self._pending) >= FLUSH_BATCH
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the scores added since the last flush to the hash cache."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if self.hash_cache is None or not pending:
+            return
+        try:
+            self.hash_cache.store_pair_similarities(pending, self.method, self.params)
+        except Exception as e:
+            logger.warning(f"flush: Could not store {len(pending)} pair scores: {e}")
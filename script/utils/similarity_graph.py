@@ -0,0 +1,180 @@
+"""
+Sparse graph of candidate duplicate pairs.
+
+A scan scores every candidate pair whose similarity reaches a low floor and
+keeps those scores as the edges of a graph over the scanned files. Duplicate
+groups are built at the chosen threshold around representatives: every file
+of a group is similar to its first file, never only through a chain of other
+files. A different threshold (down to the floor) therefore regroups the files
+in memory instead of rescanning them. Exact copies found by the hash tiers
+are kept with the file they copy. The graph of the last scan is saved next
+to the hash cache.
+"""
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Lowest similarity kept as an edge, i.e. the lowest threshold a scan can be regrouped at
+DEFAULT_GRAPH_FLOOR = 0.5
+
+# File name of the saved graph in the cache directory
+GRAPH_FILE = 'similarity_graph.npz'
+
+
+class SimilarityGraph:
+    """Files of a scan and the similarity scores between candidate duplicates."""
+
+    def __init__(self, floor: float = DEFAULT_GRAPH_FLOOR):
+        """
+        Initialize an empty graph.
+
+        Args:
+            floor: Scores below this are not kept
+        """
+        self.floor = floor
+        self.paths: List[str] = []
+        # Scan root of every file, only filled for multi-root scans
+        self.roots: Dict[str, str] = {}
+        self._index: Dict[str, int] = {}
+        # Index of the file each file is an exact copy of, -1 for none
+        self._copy_of: List[int] = []
+        self._a: List[int] = []
+        self._b: List[int] = []
+        self._scores: List[float] = []
+        self._arrays: Optional[tuple] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._scores)
+
+    def add_node(self, file_path: str) -> int:
+        """Add a file (once) and return its index; groups are ordered by it."""
+        index = self._index.get(file_path)
+        if index is None:
+            index = self._index[file_path] = len(self.paths)
+            self.paths.append(file_path)
+            self._copy_of.append(-1)
+        return index
+
+    def add_edge(self, file1: str, file2: str, score: float) -> None:
+        """Record the similarity of two files if it reaches the floor."""
+        if score < self.floor or file1 == file2:
+            return
+        self._a.append(self.add_node(file1))
+        self._b.append(self.add_node(file2))
+        self._scores.append(score)
+        self._arrays = None
+
+    def add_group(self, file_paths: Iterable[str]) -> None:
+        """Record files that are exact copies of the first one.
+
+        Copies are always grouped with that file and take part in no other
+        comparison.
+        """
+        file_paths = list(file_paths)
+        if not file_paths:
+            return
+        original = self._original(self.add_node(file_paths[0]))
+        for file_path in file_paths[1:]:
+            index = self._original(self.add_node(file_path))
+            if index != original:
+                self._copy_of[index] = original
+
+    def _original(self, index: int) -> int:
+        while self._copy_of[index] >= 0:
+            index = self._copy_of[index]
+        return index
+
+    def _edge_arrays(self) -> tuple:
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._a, dtype=np.int64), np.asarray(self._b, dtype=np.int64),
+                            np.asarray(self._scores, dtype=np.float32))
+        return self._arrays
+
+    def groups(self, threshold: float) -> List[List[str]]:
+        """
+        Group the files at a threshold.
+
+        Files are visited in graph order; each file not grouped yet starts a
+        group and takes every ungrouped file whose score with it reaches the
+        threshold. Exact copies follow the file they copy.
+
+        Args:
+            threshold: Minimum similarity score (0.0-1.0); values below the
+                floor group as if they were the floor
+
+        Returns:
+            Groups of two or more files, ordered by the position of their
+            first file in the graph
+        """
+        a, b, scores = self._edge_arrays()
+        # Scores are stored as float32, compare against the threshold at the same precision
+        keep = scores >= np.float32(threshold)
+        originals = [self._original(n) for n in range(len(self.paths))]
+
+        neighbours: Dict[int, List[int]] = {}
+        for x, y in zip(a[keep].tolist(), b[keep].tolist()):
+            x, y = originals[x], originals[y]
+            if x != y:
+                neighbours.setdefault(x, []).append(y)
+                neighbours.setdefault(y, []).append(x)
+
+        copies: Dict[int, List[int]] = {}
+        for node, original in enumerate(originals):
+            if original != node:
+                copies.setdefault(original, []).append(node)
+
+        grouped = set()
+        groups = []
+        for node, original in enumerate(originals):
+            if original != node or node in grouped:
+                continue
+            members = [node] + sorted(set(n for n in neighbours.get(node, ()) if n not in grouped))
+            grouped.update(members)
+            group = []
+            for member in members:
+                group.append(self.paths[member])
+                group.extend(self.paths[copy] for copy in copies.get(member, ()))
+            if len(group) > 1:
+                groups.append(group)
+        return groups
+
+    def save(self, file_path: str) -> None:
+        """Write the graph to an .npz file."""
+        a, b, scores = self._edge_arrays()
+        tmp_path = f"{file_path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            floor=np.float32(self.floor),
+            paths=np.asarray(self.paths, dtype=str),
+            roots=np.asarray([self.roots.get(path, '') for path in self.paths], dtype=str),
+            copy_of=np.asarray(self._copy_of, dtype=np.int32),
+            a=a.astype(np.int32), b=b.astype(np.int32), scores=scores
+        )
+        os.replace(tmp_path, file_path)
+        logger.debug(f"save: {len(self.paths)} files and {len(scores)} edges written to {file_path}")
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional['SimilarityGraph']:
+        """Read a graph written by save(), or None if it is missing or unreadable."""
+        try:
+            with np.load(file_path, allow_pickle=False) as data:
+                graph = cls(float(data['floor']))
+                graph.paths = data['paths'].tolist()
+                graph.roots = {path: root for path, root in zip(graph.paths, data['roots'].tolist()) if root}
+                graph._copy_of = data['copy_of'].tolist()
+                graph._a = data['a'].tolist()
+                graph._b = data['b'].tolist()
+                graph._scores = data['scores'].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            logger.debug(f"load: No usable similarity graph at {file_path}: {e}")
+            return None
+        graph._index = {path: n for n, path in enumerate(graph.paths)}
+        return graph
@@ -0,0 +1,109 @@
+"""
+Normalized structural hash of PDF documents.
+
+Re-saving a PDF rewrites its trailer /ID, its Info and XMP dates and usually
+the object numbering and order, so byte-level hashes no longer match although
+the document is unchanged. The structural hash is computed from what is drawn
+instead: the decompressed page content streams, the fonts, the image and form
+XObjects and the page geometry, all walked in page order through PyMuPDF xref
+access. Document metadata and object numbers never enter the digest.
+"""
+import hashlib
+import logging
+import re
+from typing import Dict
+
+import fitz  # PyMuPDF
+
+from .document_pool import get_document_pool
+
+logger = logging.getLogger(__name__)
+
+# Part of every digest; bump when the canonical form below changes
+STRUCTURE_HASH_VERSION = 2
+
+# Prefix of the hashes of the current version, so cached hashes of older versions are recomputed
+STRUCTURE_HASH_PREFIX = f"v{STRUCTURE_HASH_VERSION}:"
+
+_REFERENCE = re.compile(r'(\d+)\s+\d+\s+R')
+
+
+def calculate_structure_hash(pdf_path: str) -> str:
+    """
+    Calculate the structural hash of a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Hex SHA-256 digest after STRUCTURE_HASH_PREFIX, or an empty string if
+        the document cannot be read
+    """
+    try:
+        with get_document_pool().open(pdf_path) as doc:
+            if doc.needs_pass:
+                return ""
+            return STRUCTURE_HASH_PREFIX + _digest_document(doc)
+    except Exception as e:
+        logger.debug(f"calculate_structure_hash: Could not hash {pdf_path}: {e}")
+        return ""
+
+
+def _font_file_xref(doc: 'fitz.Document', xref: int) -> int:
+    """Return the xref of the embedded program of a font, or 0 if it is not embedded."""
+    kind, value = doc.xref_get_key(xref, "DescendantFonts")
+    if kind == 'xref':
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+        kind = 'array'
+    if kind == 'array':
+        # Type0 fonts keep their program in the (single) descendant CIDFont
+        match = _REFERENCE.search(value)
+        if not match:
+            return 0
+        xref = int(match.group(1))
+    for key in ("FontFile", "FontFile2", "FontFile3"):
+        kind, value = doc.xref_get_key(xref, f"FontDescriptor/{key}")
+        if kind == 'xref':
+            return int(value.split()[0])
+    return 0
+
+
+def _digest_document(doc: 'fitz.Document') -> str:
+    """Digest a document's pages, memoizing shared resources by xref."""
+    resources: Dict[int, bytes] = {}
+
+    def stream_digest(xref: int) -> bytes:
+        if xref not in resources:
+            resources[xref] = hashlib.sha256(doc.xref_stream(xref) or b"").digest()
+        return resources[xref]
+
+    def font_digest(xref: int) -> bytes:
+        # Font programs are hashed straight from their streams, like images,
+        # instead of being extracted and copied
+        try:
+            font_file = _font_file_xref(doc, xref)
+        except Exception:
+            font_file = 0
+        return stream_digest(font_file) if font_file else b""
+
+    digest = hashlib.sha256(f"pdf-structure-v{STRUCTURE_HASH_VERSION}:{doc.page_count}".encode())
+    for page in doc:
+        box = page.mediabox
+        digest.update(f"page:{box.x0:.2f},{box.y0:.2f},{box.x1:.2f},{box.y1:.2f}:{page.rotation}".encode())
+        digest.update(hashlib.sha256(page.read_contents()).digest())
+
+        # Resources in name order, since content streams refer to them by name
+        for xref, ext, font_type, basefont, name, *_ in sorted(page.get_fonts(full=True), key=lambda f: f[4]):
+            digest.update(f"font:{name}:{basefont}:{font_type}:{ext}".encode())
+            if xref:
+                digest.update(font_digest(xref))
+        for xref, smask, width, height, bpc, colorspace, _, name, *_ in sorted(
+                page.get_images(full=True), key=lambda i: i[7]):
+            digest.update(f"image:{name}:{width}x{height}:{bpc}:{colorspace}".encode())
+            digest.update(stream_digest(xref))
+            if smask:
+                digest.update(stream_digest(smask))
+        for xref, name, *_ in sorted(page.get_xobjects(), key=lambda x: x[1]):
+            digest.update(f"form:{name}".encode())
+            digest.update(stream_digest(xref))
+    return digest.hexdigest()
@@ -1,80 +1,130 @@
 """Text processing for PDF comparison."""
-import re
 import logging
-import threading
 import signal
 from typing import Dict, List, Optional
 from dataclasses import dataclass
-import fitz  # PyMuPDF
+
+from .extraction_worker import ExtractionFailure, TextDigest, get_extraction_pool
+from .settings import settings
+from .text_signature import DEFAULT_MAX_TOKENS, DEFAULT_NUM_PERM, TextSignature
+from .tokenizer import Tokenizer
 
 logger = logging.getLogger(__name__)
 
 @dataclass
 class TextExtractionOptions:
-    """Options for text extraction."""
+    """Options for text extraction.
+    
+    The signature options only apply to extract_signature, which streams the
+    text page by page instead of returning it whole.
+    """
     remove_punctuation: bool = True
     convert_to_lowercase: bool = True
     min_word_length: int = 3
+    num_perm: int = DEFAULT_NUM_PERM
+    sample_pages: int = 0  # 0 reads every page
+    max_tokens: int = DEFAULT_MAX_TOKENS  # 0 for no limit
+    
+    @classmethod
+    def from_settings(cls) -> 'TextExtractionOptions':
+        """Create options with the signature settings of the application."""
+        return cls(
+            num_perm=settings.get('text_signature.num_perm', DEFAULT_NUM_PERM),
+            sample_pages=settings.get('text_signature.sample_pages', 0),
+            max_tokens=settings.get('text_signature.max_tokens', DEFAULT_MAX_TOKENS),
+        )
 
 class TextProcessor:
     """Handles text extraction and comparison."""
     
     def __init__(self, options: Optional[TextExtractionOptions] = None):
-        self.options = options or TextExtractionOptions()
+        self.options = options or TextExtractionOptions.from_settings()
+        self.tokenizer = Tokenizer(min_word_length=self.options.min_word_length,
+                                   lowercase=self.options.convert_to_lowercase)
     
-    def extract_text(self, file_path: str) -> str:
-        """Extract and process text from PDF with timeout protection."""
+    def extract_signature(self, file_path: str, raise_failures: bool = False,
+                          timeout: float = 30.0) -> Optional[TextSignature]:
+        """Stream the text of a PDF page by page into a MinHash/SimHash signature.
+        
+        The full text is never held in memory, and only the sampled pages and
+        the token budget of the options are read.
+        
+        Args:
+            file_path: Path to the PDF file
+            raise_failures: Let ExtractionFailure propagate instead of returning None
+            timeout: Seconds the extraction worker may take
+        
+        Returns:
+            The signature, or None if the text could not be read
+        """
         try:
-            # Use timeout mechanism to prevent hanging
-            result = self._extract_text_with_timeout(file_path, timeout=30.0)  # 30 second timeout
-            return self._process_text(result)
+            return get_extraction_pool().text_signature(
+                file_path, timeout=timeout,
+                num_perm=self.options.num_perm,
+                sample_pages=self.options.sample_pages,
+                max_tokens=self.options.max_tokens,
+                min_word_length=self.options.min_word_length,
+            )
         except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {e}")
-            return ""
+            if raise_failures and isinstance(e, ExtractionFailure):
+                raise
+            logger.error(f"Error extracting text signature from {file_path}: {e}")
+            return None
     
-    def _extract_text_with_timeout(self, file_path: str, timeout: float = 30.0) -> str:
-        """Extract text from PDF with timeout protection."""
-        result_container = {'text': "", 'error': None}
-        
-        def extract_worker():
-            try:
-                doc = fitz.open(file_path)
-                text = ""
-                for page in doc:
-                    text += page.get_text("text") + "\n"
-                doc.close()
-                result_container['text'] = text
-            except Exception as e:
-                result_container['error'] = e
-        
-        # Start extraction thread
-        extract_thread = threading.Thread(target=extract_worker)
-        extract_thread.daemon = True
-        extract_thread.start()
+    def extract_text_digest(self, file_path: str, raise_failures: bool = False,
+                            timeout: float = 30.0) -> Optional[TextDigest]:
+        """Stream the processed text of a PDF page by page into its hash and word set.
         
-        # Wait for completion with timeout
-        extract_thread.join(timeout=timeout)
+        The hash equals the hash of the whole text processed by _process_text,
+        but neither the raw nor the processed text is ever held whole.
         
-        if extract_thread.is_alive():
-            # Thread is still running, timeout occurred
-            logger.warning(f"Text extraction timed out for {file_path} after {timeout} seconds")
-            raise TimeoutError(f"Text extraction timed out for {file_path}")
+        Args:
+            file_path: Path to the PDF file
+            raise_failures: Let ExtractionFailure propagate instead of returning None
+            timeout: Seconds the extraction worker may take
         
-        if result_container['error']:
-            raise result_container['error']
+        Returns:
+            The digest, or None if the text could not be read
+        """
+        try:
+            return self._extract_digest_with_timeout(file_path, timeout=timeout)
+        except Exception as e:
+            if raise_failures and isinstance(e, ExtractionFailure):
+                raise
+            logger.error(f"Error extracting text digest from {file_path}: {e}")
+            return None
+    
+    def _extract_digest_with_timeout(self, file_path: str, timeout: float = 30.0) -> TextDigest:
+        """Digest the text of a PDF in a sandboxed worker process with timeout protection.
         
-        return result_container['text']
+        Raises:
+            ExtractionFailure: If the worker timed out, crashed or ran out of memory
+        """
+        return get_extraction_pool().text_digest(
+            file_path, timeout=timeout,
+            remove_punctuation=self.options.remove_punctuation,
+            lowercase=self.options.convert_to_lowercase,
+            min_word_length=self.options.min_word_length,
+        )
     
     def _process_text(self, text: str) -> str:
         """Clean and process extracted text."""
+        if self.options.remove_punctuation:
+            # Words, or character shingles of CJK and RTL text
+            return " ".join(self.tokenizer.tokens(text))
         if self.options.convert_to_lowercase:
             text = text.lower()
-        if self.options.remove_punctuation:
-            text = re.sub(r'[^\w\s]', ' ', text)
         # Keep only words of minimum length
         words = [w for w in text.split() if len(w) >= self.options.min_word_length]
         return " ".join(words)
     
+    @staticmethod
+    def compare_signatures(sig1: Optional[TextSignature], sig2: Optional[TextSignature]) -> float:
+        """Estimate the compare_texts similarity of two documents from their signatures."""
+        if sig1 is None or sig2 is None:
+            return 0.0
+        return sig1.jaccard(sig2)
+    
     @staticmethod
     def compare_texts(text1: str, text2: str) -> float:
         """Compare two texts and return similarity score (0.0 to 1.0)."""
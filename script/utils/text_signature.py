@@ -0,0 +1,166 @@
+"""
+Compact text signatures of PDF documents.
+
+Comparing documents by the Jaccard similarity of their word sets needs the
+whole text of both in memory. A signature summarizes the token set in a fixed
+size instead: a MinHash, whose agreement estimates the Jaccard similarity, and
+a 64-bit SimHash, in which near-duplicate texts differ in few bits.
+
+Tokens are fed to the SignatureBuilder page by page, so memory stays flat no
+matter how long the document is. Optionally only a sample of the pages is read
+and tokenization stops at a token budget.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+# The MinHash estimate of a Jaccard similarity J has a standard error of
+# sqrt(J * (1 - J) / num_perm): about 0.025 at J = 0.8 with 256 permutations,
+# small enough to decide duplicates from the estimate alone
+DEFAULT_NUM_PERM = 256
+DEFAULT_MAX_TOKENS = 200_000
+
+# Fixed seed: signatures computed in different processes must be comparable
+_PERMUTATION_SEED = 0x5EED
+
+# Token hashes permuted per numpy batch; bounds the (num_perm, batch) temporary
+_BATCH_TOKENS = 4096
+
+_SHIFTS = np.arange(64, dtype=np.uint64)
+
+
+def sample_page_numbers(page_count: int, sample_pages: int = 0) -> List[int]:
+    """Return the pages to read: all of them, or ``sample_pages`` evenly spaced ones.
+
+    The first and last pages are always part of a sample.
+    """
+    if sample_pages <= 0 or page_count <= sample_pages:
+        return list(range(page_count))
+    return sorted({int(p) for p in np.linspace(0, page_count - 1, sample_pages).round()})
+
+
+@dataclass(frozen=True, eq=False)
+class TextSignature:
+    """Fixed-size summary of a document's token set.
+
+    Attributes:
+        minhash: Minimum permuted hash per permutation (uint32)
+        simhash: 64-bit SimHash of the token stream
+        token_count: Tokens fed to the signature
+        pages_read: Pages tokenized
+        page_count: Pages in the document
+        truncated: True if pages were sampled or the token budget was hit
+    """
+    minhash: np.ndarray
+    simhash: int
+    token_count: int
+    pages_read: int
+    page_count: int
+    truncated: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return self.token_count == 0
+
+    def jaccard(self, other: 'TextSignature') -> float:
+        """Estimate the Jaccard similarity of the two token sets (0.0 if either is empty)."""
+        if self.is_empty or other.is_empty or len(self.minhash) != len(other.minhash):
+            return 0.0
+        return float(np.count_nonzero(self.minhash == other.minhash)) / len(self.minhash)
+
+    def simhash_distance(self, other: 'TextSignature') -> int:
+        """Return the number of differing SimHash bits."""
+        return bin(self.simhash ^ other.simhash).count('1')
+
+
+class SignatureBuilder:
+    """Accumulates token hashes into a MinHash and a SimHash."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, max_tokens: int = 0,
+                 tokenizer: Optional[Tokenizer] = None):
+        """
+        Initialize an empty signature.
+
+        Args:
+            num_perm: Number of MinHash permutations
+            max_tokens: Stop accepting tokens after this many (0 for no limit)
+            tokenizer: Tokenizer of update_page (default settings if None)
+        """
+        self.tokenizer = tokenizer or Tokenizer()
+        rng = np.random.default_rng(_PERMUTATION_SEED)
+        # Multiply-shift hashing: odd multipliers, top 32 bits of the product
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._mins = np.full(num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        self._ones = np.zeros(64, dtype=np.int64)
+        self.max_tokens = max(0, int(max_tokens))
+        self.token_count = 0
+        self.pages_read = 0
+
+    @property
+    def full(self) -> bool:
+        """True once the token budget is exhausted."""
+        return bool(self.max_tokens) and self.token_count >= self.max_tokens
+
+    def update(self, hashes: Iterable[int]) -> bool:
+        """Add token hashes.
+
+        Returns:
+            False once the token budget is exhausted
+        """
+        hashes = np.fromiter(hashes, dtype=np.uint64)
+        if self.max_tokens:
+            hashes = hashes[:max(0, self.max_tokens - self.token_count)]
+        for start in range(0, len(hashes), _BATCH_TOKENS):
+            batch = hashes[start:start + _BATCH_TOKENS]
+            permuted = (self._a[:, None] * batch[None, :] + self._b[:, None]) >> np.uint64(32)
+            np.minimum(self._mins, permuted.min(axis=1).astype(np.uint32), out=self._mins)
+            self._ones += ((batch[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0, dtype=np.int64)
+        self.token_count += len(hashes)
+        return not self.full
+
+    def update_page(self, text: str) -> bool:
+        """Tokenize one page of text and add its token hashes. See update."""
+        self.pages_read += 1
+        return self.update(self.tokenizer.hashes(text))
+
+    def build(self, page_count: int = 0, sampled: bool = False) -> TextSignature:
+        """Return the signature of everything added so far."""
+        simhash = 0
+        for bit in np.flatnonzero(self._ones * 2 > self.token_count):
+            simhash |= 1 << int(bit)
+        return TextSignature(minhash=self._mins.copy(), simhash=simhash, token_count=self.token_count,
+                             pages_read=self.pages_read, page_count=page_count,
+                             truncated=sampled or self.full)
+
+
+def build_text_signature(doc: 'fitz.Document', num_perm: int = DEFAULT_NUM_PERM, sample_pages: int = 0,
+                         max_tokens: int = DEFAULT_MAX_TOKENS, min_word_length: int = 3) -> TextSignature:
+    """Stream the text of a document page by page into a signature.
+
+    Only one page of text is held at a time.
+
+    Args:
+        doc: Open document
+        num_perm: Number of MinHash permutations
+        sample_pages: Read only this many evenly spaced pages (0 for all)
+        max_tokens: Token budget of the document (0 for no limit)
+        min_word_length: Shorter words are ignored
+
+    Returns:
+        The document's TextSignature
+    """
+    builder = SignatureBuilder(num_perm=num_perm, max_tokens=max_tokens,
+                               tokenizer=Tokenizer(min_word_length=min_word_length))
+    pages = sample_page_numbers(doc.page_count, sample_pages)
+    for page_num in pages:
+        if not builder.update_page(doc.load_page(page_num).get_text("text")):
+            break
+    return builder.build(page_count=doc.page_count, sampled=len(pages) < doc.page_count)
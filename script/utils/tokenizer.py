@@ -0,0 +1,102 @@
+"""
+Streaming tokenizer for text comparison.
+
+Words are matched with precompiled patterns, one page of text at a time,
+instead of substituting punctuation in and splitting a copy of the whole text.
+
+Whitespace-separated words are a poor unit for some scripts:
+
+- Chinese and Japanese are written without spaces, so a "word" is a whole
+  clause. Runs of CJK characters are cut into overlapping character n-grams
+  (shingles) instead.
+- Arabic and Hebrew attach articles, prepositions and pronouns to words, so
+  the same word appears in many forms. RTL words are cut into character
+  n-grams too, which still overlap between the forms.
+
+Everything else is tokenized into words of a minimum length, as
+TextProcessor has always done.
+"""
+import hashlib
+import re
+from typing import Iterator
+
+# Han, kana, Hangul and CJK compatibility ideographs
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+# Hebrew, Arabic, Syriac, Thaana and the Arabic presentation forms
+_RTL_RANGES = '\u0590-\u07bf\u08a0-\u08ff\ufb1d-\ufdff\ufe70-\ufefc'
+
+_WORD = re.compile(r'\w+')
+_CJK = re.compile(f'[{_CJK_RANGES}]')
+_RTL = re.compile(f'[{_RTL_RANGES}]')
+# CJK runs (group 1) or runs of other word characters (group 2)
+_MIXED_WORD = re.compile(f'([{_CJK_RANGES}]+)|([^\\W{_CJK_RANGES}]+)')
+
+DEFAULT_CJK_NGRAM = 2
+DEFAULT_RTL_NGRAM = 3
+
+
+def token_hash(token: str) -> int:
+    """Return a stable 64-bit hash of a token (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def shingles(run: str, n: int) -> Iterator[str]:
+    """Yield the overlapping character n-grams of a run, or the run itself if shorter."""
+    if len(run) <= n:
+        yield run
+        return
+    for i in range(len(run) - n + 1):
+        yield run[i:i + n]
+
+
+class Tokenizer:
+    """Splits text into word tokens or character shingles depending on the script."""
+
+    def __init__(self, min_word_length: int = 3, lowercase: bool = True,
+                 cjk_ngram: int = DEFAULT_CJK_NGRAM, rtl_ngram: int = DEFAULT_RTL_NGRAM):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            min_word_length: Shorter words are dropped (CJK shingles are always kept)
+            lowercase: Lower-case tokens
+            cjk_ngram: Shingle length of Chinese, Japanese and Korean runs
+            rtl_ngram: Shingle length of Arabic and Hebrew words
+        """
+        self.min_word_length = min_word_length
+        # Words of at least min_word_length characters, found without a
+        # filtering pass in Python
+        self._long_word = re.compile(rf'\w{{{max(1, min_word_length)},}}')
+        self.lowercase = lowercase
+        self.cjk_ngram = cjk_ngram
+        self.rtl_ngram = rtl_ngram
+
+    def tokens(self, text: str) -> Iterator[str]:
+        """Yield the tokens of a text, typically one page."""
+        has_cjk = _CJK.search(text) is not None
+        has_rtl = _RTL.search(text) is not None
+        min_length = self.min_word_length
+
+        if not has_cjk and not has_rtl:
+            # Latin, Cyrillic, Greek...: plain words
+            yield from self._long_word.findall(text.lower() if self.lowercase else text)
+            return
+
+        for match in (_MIXED_WORD if has_cjk else _WORD).finditer(text):
+            if has_cjk and match.group(1):
+                yield from shingles(match.group(1), self.cjk_ngram)
+                continue
+            word = match.group()
+            if len(word) < min_length:
+                continue
+            if self.lowercase:
+                word = word.lower()
+            if has_rtl and _RTL.search(word):
+                yield from shingles(word, self.rtl_ngram)
+            else:
+                yield word
+
+    def hashes(self, text: str) -> Iterator[int]:
+        """Yield the 64-bit hashes of the tokens of a text, for MinHash/SimHash builders."""
+        for token in self.tokens(text):
+            yield token_hash(token)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the pool of open PDF documents.
+"""
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.document_pool import DocumentPool
+
+
+def _make_pdf(path: Path, pages: int) -> str:
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_text((72, 144), f"Page {n}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_reuse_and_invalidation():
+    """Test that idle handles are reused until the file changes."""
+    print("Testing document reuse...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _make_pdf(Path(tmp) / "a.pdf", 2)
+        pool = DocumentPool(max_documents=4)
+
+        with pool.open(path) as first:
+            with pool.open(path) as second:
+                assert first is not second
+                print("✓ Concurrent leases get separate handles")
+        with pool.open(path) as again:
+            assert again in (first, second) and len(pool) == 1
+        print("✓ Idle handle reused")
+
+        _make_pdf(Path(tmp) / "a.pdf", 3)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with pool.open(path) as changed:
+            assert changed is not again and len(changed) == 3
+        assert first.is_closed and second.is_closed
+        print("✓ Handles of a modified file discarded")
+
+
+def test_limits_and_threads():
+    """Test the LRU count limit and exclusive leases across threads."""
+    print("Testing pool limits...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [_make_pdf(Path(tmp) / f"{n}.pdf", 1) for n in range(3)]
+        pool = DocumentPool(max_documents=2)
+        docs = []
+        for path in paths:
+            with pool.open(path) as doc:
+                docs.append(doc)
+        assert len(pool) == 2 and docs[0].is_closed and not docs[2].is_closed
+        print("✓ Least recently used handle closed")
+
+        leased = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(20):
+                with pool.open(paths[0]) as doc:
+                    with lock:
+                        assert id(doc) not in leased
+                        leased.append(id(doc))
+                    len(doc.load_page(0).get_text())
+                    with lock:
+                        leased.remove(id(doc))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(pool) <= 2
+        pool.discard(paths[0])
+        assert all(key[0] != os.path.abspath(paths[0]) for key, _ in pool._idle.values())
+        print("✓ Handles of a file discarded before deletion")
+        pool.clear()
+        assert len(pool) == 0
+        print("✓ A handle is never leased twice at once")
+
+
+if __name__ == "__main__":
+    test_reuse_and_invalidation()
+    test_limits_and_threads()
+    print("✓ All document pool tests passed!")
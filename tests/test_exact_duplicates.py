@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the exact text and file hash tier of the hash cache.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.scanner import PDFScanner
+
+
+def _make_pdf(path: Path, text: str = "", fontsize: int = 11) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    if text:
+        page.insert_text((72, 144), text, fontsize=fontsize)
+    else:
+        page.draw_rect(fitz.Rect(100, 100, 200, 200), fill=(0.2, 0.2, 0.2))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_exact_duplicates():
+    """Test that same-text and same-byte files are grouped by query."""
+    print("Testing exact text tier...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cache = HashCache(cache_dir=str(root / "cache"))
+        report = _make_pdf(root / "report.pdf", "Quarterly report on duplicate detection")
+        # Same text, different layout and bytes
+        restyled = _make_pdf(root / "restyled.pdf", "Quarterly report on duplicate detection", fontsize=14)
+        other = _make_pdf(root / "other.pdf", "Minutes of the annual meeting")
+        scan = _make_pdf(root / "scan.pdf")
+        scan_copy = str(root / "scan_copy.pdf")
+        shutil.copy(scan, scan_copy)
+        blank = _make_pdf(root / "blank.pdf")
+        Path(blank).write_bytes(Path(blank).read_bytes() + b"\n% padding\n")
+        unscanned = _make_pdf(root / "unscanned.pdf", "Quarterly report on duplicate detection")
+
+        files = [report, other, scan, restyled, scan_copy, blank]
+        for file_path in files + [unscanned]:
+            cache.cache_file(file_path)
+
+        groups = cache.find_exact_duplicates(files)
+        assert sorted(groups.values()) == [[report, restyled], [scan, scan_copy]], groups
+        assert {key.split(':')[0] for key in groups} == {'text', 'file'}
+        print("✓ Same text and same bytes grouped, other scanned paths ignored")
+
+        assert list(cache.find_duplicates_by_hash(files).values()) == [[scan, scan_copy]]
+        print("✓ File hash groups")
+
+        # Only representatives reach the similarity tier, the graph restores the rest
+        scanner = PDFScanner(enable_hash_cache=False)
+        scanner.hash_cache, scanner.enable_hash_cache = cache, True
+        duplicates = scanner._find_duplicates_with_cache(files, 0.99, True)
+        # The padded blank page has the structure of the scans
+        assert sorted(map(sorted, duplicates)) == sorted([sorted([report, restyled]), sorted([blank, scan, scan_copy])])
+        assert scanner.similarity_graph.groups(scanner.similarity_graph.floor) == duplicates
+        print("✓ Exact groups kept in the scan graph")
+
+
+if __name__ == "__main__":
+    test_exact_duplicates()
+    print("✓ All exact tier tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script to verify text extraction in sandboxed worker processes.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.extraction_worker import ExtractionFailure, ExtractionPool, resource
+
+
+def _make_pdf(path: Path, pages: int) -> str:
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_text((72, 144), f"Page number {n}")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def _expect_failure(pool: ExtractionPool, *args) -> str:
+    try:
+        pool.run(*args)
+    except ExtractionFailure as e:
+        return e.reason
+    raise AssertionError("Extraction should have failed")
+
+
+def test_worker_extraction_and_recovery():
+    """Test extraction results, timeouts, crashes and worker recycling."""
+    print("Testing sandboxed extraction workers...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _make_pdf(Path(tmp) / "a.pdf", 3)
+        pool = ExtractionPool(workers=1, max_tasks=2)
+        try:
+            digest = pool.text_digest(path)
+            assert digest.page_count == 3 and digest.words.split() == ["page", "number"]
+            assert pool.text_signature(path).page_count == 3
+            print("✓ Text digest and signature extracted in a worker")
+
+            worker = pool._workers[0]
+            first = worker.process.pid
+            assert pool.text_digest(path).page_count == 3 and worker.process.pid != first
+            print("✓ Worker recycled after max_tasks")
+
+            assert _expect_failure(pool, 'digest', path, 0) == 'timeout'
+            assert worker.process is None
+            assert pool.text_digest(path).page_count == 3
+            print("✓ Timed out worker killed and replaced")
+
+            worker.process.kill()
+            worker.process.join()
+            assert pool.text_digest(path).page_count == 3
+            print("✓ Dead worker restarted")
+
+            assert _expect_failure(pool, 'digest', str(Path(tmp) / "missing.pdf"), 30) == 'error'
+            print("✓ Extraction errors reported")
+
+            damaged = Path(tmp) / "realloc_notes.pdf"
+            damaged.write_bytes(b"not a pdf")
+            assert _expect_failure(pool, 'digest', str(damaged), 30) == 'error'
+            print("✓ Allocation words in the file name not taken for memory errors")
+        finally:
+            pool.close()
+
+
+def test_memory_limit():
+    """Test that allocation failures under the memory limit are reported as memory."""
+    print("Testing worker memory limit...")
+
+    if resource is None:
+        print("✓ No memory limit on this platform")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "large.pdf")
+        doc = fitz.open()
+        for n in range(50):
+            page = doc.new_page()
+            # Dense pages: text is digested one page at a time
+            page.insert_textbox(page.rect, f"word{n} " * 8000, fontsize=1.5)
+        doc.save(path)
+        doc.close()
+
+        # A limit this tight makes MuPDF's own allocations fail, not Python's
+        pool = ExtractionPool(workers=1, memory_limit_mb=1)
+        try:
+            assert _expect_failure(pool, 'digest', path, 30) == 'memory'
+            assert pool._workers[0].process is None
+        finally:
+            pool.close()
+        print("✓ MuPDF allocation failures reported as memory, worker replaced")
+
+
+if __name__ == "__main__":
+    test_worker_extraction_and_recovery()
+    test_memory_limit()
+    print("✓ All extraction worker tests passed!")
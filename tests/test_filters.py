@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the compiled filter rules and their use inside the file walker.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.filters import FileFilter, FilterBuilder
+from script.utils.file_walker import FileWalker, SniffCache, normalize_roots
+from script.utils.scanner import PDFScanner
+
+
+def _touch(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"%PDF-1.4\n" + b"0" * size)
+
+
+def test_filter_rules():
+    """Test size, glob, regex and exclude rules."""
+    print("Testing compiled filter rules...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        small = Path(tmp) / "report_small.pdf"
+        large = Path(tmp) / "report_large.pdf"
+        other = Path(tmp) / "invoice.pdf"
+        _touch(small, 10)
+        _touch(large, 5000)
+        _touch(other, 5000)
+
+        rules = FilterBuilder().with_size(min_size=1000).with_glob("report*").build()
+        assert not rules(str(small))
+        assert rules(str(large))
+        assert not rules(str(other))
+        print("✓ Size and glob rules applied")
+
+        rules = FilterBuilder().with_name_pattern("REPORT").excluding("*large*").build()
+        assert rules(str(small))
+        assert not rules(str(large))
+        print("✓ Case-insensitive regex and exclude rules applied")
+
+        assert FileFilter(name_pattern="invoice").matches(str(other))
+        assert not FileFilter(name_pattern="(").matches(str(other))
+        print("✓ FileFilter keeps its previous behaviour, invalid patterns match nothing")
+
+
+def test_walker_prunes_directories():
+    """Test that excluded subtrees are never descended into and roots are de-duplicated."""
+    print("Testing directory pruning in the walker...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _touch(root / "keep" / "a.pdf", 10)
+        _touch(root / ".git" / "objects" / "b.pdf", 10)
+        _touch(root / "Backup_2020" / "c.pdf", 10)
+        _touch(root / "keep" / "notes.txt", 10)
+
+        rules = FilterBuilder().excluding_dirs(".git", "backup*").build()
+        found = [os.path.basename(f.path) for f in FileWalker([str(root)], rules=rules).collect()]
+        assert found == ["a.pdf"], found
+        print("✓ Excluded directories pruned")
+
+        roots = normalize_roots([str(root), str(root / "keep"), str(root / "keep" / "..")])
+        assert roots == [os.path.realpath(str(root))], roots
+        found = FileWalker([str(root), str(root / "keep")]).collect()
+        assert len(found) == 3, found
+        print("✓ Nested roots walked once")
+
+        # Stat results without a device number (Windows scandir) fall back to the root's
+        walker = FileWalker([str(root)])
+        entry = SimpleNamespace(inode=lambda: 42)
+        stat = SimpleNamespace(st_dev=0, st_ino=42)
+        assert walker._claim(entry, stat, 1) and not walker._claim(entry, stat, 1)
+        assert walker._claim(entry, stat, 2)
+        print("✓ Same inode on another device not mistaken for the same file")
+
+        # Excluded directories of a scan are added to a copy of the caller's rules
+        rules = FilterBuilder().excluding_dirs(".git").build()
+        scanner = PDFScanner(cache_dir=str(root / "cache"))
+        scanner.scan_parameters = {'directories': [str(root)], 'min_file_size': 0,
+                                   'enable_text_compare': False, 'filter_rules': rules,
+                                   'exclude_dirs': ["backup*"]}
+        for _ in range(2):
+            scanner.start_scan()
+        assert len(rules.prune_patterns) == 1, rules.prune_patterns
+        print("✓ Scan parameters' filter rules left unchanged")
+
+
+def test_walker_sniffs_headers():
+    """Test magic-byte detection of PDFs without a .pdf extension."""
+    print("Testing PDF header sniffing...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _touch(root / "scan0001", 10)
+        _touch(root / "mail.bin", 10)
+        (root / "readme.txt").write_text("not a pdf")
+
+        assert [f.path for f in FileWalker([str(root)]).collect()] == []
+        print("✓ Sniffing is off by default")
+
+        cache = SniffCache()
+        found = sorted(os.path.basename(f.path) for f in
+                       FileWalker([str(root)], sniff_content=True, sniff_cache=cache).collect())
+        assert found == ["mail.bin", "scan0001"], found
+        print("✓ Header detected without extension")
+
+        (root / "readme.txt").unlink()
+        (root / "scan0001").unlink()
+        cached = cache.lookup(list(cache._results))
+        assert sorted(cached.values()) == [False, True, True]
+        print("✓ Results cached by (device, inode, mtime)")
+
+
+if __name__ == "__main__":
+    test_filter_rules()
+    test_walker_prunes_directories()
+    test_walker_sniffs_headers()
+    print("✓ All filter tests passed!")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the page-level fingerprint index.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.page_index import PageIndex, build_page_index, image_stream_digests
+from script.utils.pdf_comparison import PDFComparator
+from script.utils.raster_cache import RasterCache
+from script.utils.scanner import PDFScanner
+
+PAGES = [f"Section {n}: " + "lorem ipsum dolor sit amet " * (n + 2) for n in range(6)]
+
+
+def _make_pdf(path: Path, texts) -> str:
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page().insert_textbox(fitz.Rect(72, 72, 540, 720), text, fontsize=14)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_page_index_relations():
+    """Test containment relations computed from the inverted index."""
+    print("Testing page index relations...")
+
+    index = PageIndex()
+    index.add_document("packet", [(0, ["a"]), (1, ["b"]), (2, ["c"]), (3, [])])
+    index.add_document("excerpt", [(0, ["b"]), (1, ["c"])])
+    index.add_document("other", [(0, ["c"]), (1, ["z"])])
+    overlaps = {(o.doc_a, o.doc_b): o for o in index.overlaps()}
+
+    excerpt = overlaps[("excerpt", "packet")]
+    assert excerpt.relation == 'subset' and excerpt.ratio_b == 2 / 3
+    assert overlaps[("other", "packet")].relation == 'overlap'
+    assert overlaps[("other", "packet")].ratio_a == 0.5
+    print("✓ Subset and partial overlap reported with ratios")
+
+    index.remove_document("packet")
+    assert index.documents_with("a") == set()
+    assert [(o.doc_a, o.doc_b) for o in index.overlaps()] == [("excerpt", "other")]
+    print("✓ Documents can be removed")
+
+
+def test_build_page_index():
+    """Test fingerprinting PDFs, caching the fingerprints and finding merged packets."""
+    print("Testing page index over PDFs...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        first = _make_pdf(root / "first.pdf", PAGES[:3])
+        second = _make_pdf(root / "second.pdf", PAGES[3:])
+        packet = _make_pdf(root / "packet.pdf", PAGES)
+        unrelated = _make_pdf(root / "unrelated.pdf", ["Nothing in common with the others, really."])
+
+        cache = HashCache(cache_dir=str(root / "cache"))
+        files = [first, second, packet, unrelated]
+        overlaps = build_page_index(files, hash_cache=cache).overlaps()
+        relations = {(Path(o.doc_a).name, Path(o.doc_b).name): o.relation for o in overlaps}
+        assert relations == {("first.pdf", "packet.pdf"): 'subset',
+                             ("packet.pdf", "second.pdf"): 'superset'}, relations
+        print("✓ Merged packet found as superset of its parts")
+
+        assert cache.get_cache_stats()['page_index_documents'] == 4
+        again = build_page_index(files, hash_cache=cache).overlaps()
+        assert [(o.doc_a, o.doc_b, o.relation) for o in again] == \
+               [(o.doc_a, o.doc_b, o.relation) for o in overlaps]
+        print("✓ Page fingerprints reused from the cache")
+
+
+def test_scan_page_overlaps():
+    """Test that a scan reports shared pages of documents that are not duplicates."""
+    print("Testing page overlaps in scan results...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        docs = root / "docs"
+        docs.mkdir()
+        # Pages with words of their own, so the documents differ as a whole
+        pages = [f"Section {n}: " + " ".join(f"term{n}x{k}" for k in range(40)) for n in range(6)]
+        first = _make_pdf(docs / "first.pdf", pages[:2])
+        packet = _make_pdf(docs / "packet.pdf", pages)
+        packet_copy = str(docs / "packet_copy.pdf")
+        shutil.copy(packet, packet_copy)
+
+        scanner = PDFScanner(cache_dir=str(root / "cache"))
+        found = []
+        scanner.finished.connect(lambda duplicates: found.append(duplicates))
+        scanner.page_overlaps_found.connect(lambda overlaps: found.append(overlaps))
+        scanner.scan_directories([str(docs)], min_file_size=0, detect_page_overlaps=True)
+        overlaps, duplicates = found
+        assert duplicates == [[packet, packet_copy]], duplicates
+        assert overlaps == scanner.page_overlaps
+        assert sorted((o.doc_a, o.doc_b, o.relation) for o in overlaps) == [
+            (first, packet, 'subset'), (first, packet_copy, 'subset')]
+        print("✓ Shared pages reported, duplicate pairs left out")
+
+
+def _make_scan(seed: int) -> bytes:
+    pix = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 600, 800), False)
+    pix.clear_with(200 + seed)
+    pix.set_rect(fitz.IRect(50 * seed, 100, 50 * seed + 200, 300), (seed * 10,))
+    return pix.tobytes("jpeg")
+
+
+def _make_scanned_pdf(path: Path, scans) -> str:
+    doc = fitz.open()
+    for scan in scans:
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=scan)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_image_stream_digests():
+    """Test that shared scans are found by their raw streams, without rendering."""
+    print("Testing embedded image stream digests...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        scans = [_make_scan(n) for n in range(1, 4)]
+        packet = _make_scanned_pdf(root / "packet.pdf", scans)
+        rescanned = _make_scanned_pdf(root / "rescanned.pdf", scans)
+        excerpt = _make_scanned_pdf(root / "excerpt.pdf", scans[1:2] + [_make_scan(5)])
+
+        digests = image_stream_digests(packet)
+        assert len(digests) == 3 and all(len(page) == 1 for page in digests)
+        assert digests[0][0].endswith(":600x800")
+        print("✓ One digest per embedded scan")
+
+        index = PageIndex()
+        for path in (packet, excerpt):
+            index.add_document(path, [(n, [f"x:{d}" for d in page]) for n, page in enumerate(image_stream_digests(path))])
+        (overlap,) = index.overlaps()
+        assert overlap.shared_a == overlap.shared_b == 1 and overlap.relation == 'overlap'
+        print("✓ Partially shared scans found through the index")
+
+        comparator = PDFComparator(raster_cache=RasterCache(cache_dir=str(Path(tmp) / "rasters")),
+                                   hash_cache=HashCache(cache_dir=str(Path(tmp) / "cache")))
+        result = comparator.compare_pdfs(packet, rescanned)
+        assert result["match"] and result["method"] == "image_stream", result
+        assert comparator.compare_pdfs(packet, excerpt)["method"] == "signature"
+        print("✓ Identical scans match without rasterizing")
+
+
+if __name__ == "__main__":
+    test_page_index_relations()
+    test_build_page_index()
+    test_scan_page_overlaps()
+    test_image_stream_digests()
+    print("✓ All page index tests passed!")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the image-based PDF comparison.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import fitz
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.pdf_comparison import PDFComparator, PDFType, document_signature, render_gray, ssim
+from script.utils.raster_cache import RasterCache
+
+
+def _make_pdf(path: Path, pages: int, text: str) -> str:
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_textbox(fitz.Rect(50, 50, 550, 800), f"Page {n} " + text * 40, fontsize=11)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_coarse_to_fine_comparison():
+    """Test thumbnail comparison, refinement and the global early exit."""
+    print("Testing coarse-to-fine image comparison...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        original = _make_pdf(root / "original.pdf", 6, "lorem ipsum dolor sit amet ")
+        copy = _make_pdf(root / "copy.pdf", 6, "lorem ipsum dolor sit amet ")
+        other = _make_pdf(root / "other.pdf", 6, "something else entirely ")
+
+        cache = RasterCache(cache_dir=str(root / "rasters"))
+        hash_cache = HashCache(cache_dir=str(root / "cache"))
+        comparator = PDFComparator(threshold=0.95, raster_cache=cache, hash_cache=hash_cache)
+        result = comparator._compare_pdfs_as_images(original, copy)
+        assert result["match"] and len(result["details"]["page_similarities"]) == 6
+        assert result["details"]["refined_pages"] == []
+        print("✓ Identical documents settled on thumbnails")
+
+        result = comparator._compare_pdfs_as_images(original, other)
+        assert not result["match"] and result["details"]["early_exit"]
+        assert len(result["details"]["page_similarities"]) < 6
+        print("✓ Different documents stop early")
+
+        comparator = PDFComparator(threshold=result["details"]["page_similarities"][0], borderline_margin=0.01,
+                                   raster_cache=cache, hash_cache=hash_cache)
+        result = comparator._compare_pdfs_as_images(original, other)
+        assert 0 in result["details"]["refined_pages"]
+        print("✓ Borderline pages compared again at full resolution")
+
+
+def test_parallel_page_comparison():
+    """Test that worker processes produce the same per-page results, in page order."""
+    print("Testing parallel page comparison...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        original = _make_pdf(root / "original.pdf", 9, "lorem ipsum dolor sit amet ")
+        other = _make_pdf(root / "other.pdf", 9, "lorem ipsum dolor sit amen ")
+
+        cache = RasterCache(cache_dir=str(root / "rasters"))
+        hash_cache = HashCache(cache_dir=str(root / "cache"))
+        serial = PDFComparator(threshold=0.5, workers=1, raster_cache=RasterCache(cache_dir=str(root / "serial")),
+                               hash_cache=hash_cache)._compare_pdfs_as_images(original, other)
+        with PDFComparator(threshold=0.5, workers=2, raster_cache=cache, hash_cache=hash_cache) as comparator:
+            parallel = comparator._compare_pdfs_as_images(original, other)
+            assert comparator._pool is not None
+        assert parallel["details"] == serial["details"]
+        assert len(parallel["details"]["page_similarities"]) == 9
+        print("✓ Parallel results match the serial ones")
+
+        assert cache.get_stats()['rasters'] == 18
+        print("✓ Worker renders stored in the shared raster cache")
+
+
+def _reference_ssim(img1, img2):
+    """Straightforward double precision SSIM with the 11x11 Gaussian window."""
+    x, y = img1.astype(np.float64) / 255, img2.astype(np.float64) / 255
+    blur = lambda img: cv2.GaussianBlur(img, (11, 11), 1.5)
+    mu_x, mu_y = blur(x), blur(y)
+    var_x, var_y = blur(x * x) - mu_x ** 2, blur(y * y) - mu_y ** 2
+    cov = blur(x * y) - mu_x * mu_y
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    return float((((2 * mu_x * mu_y + c1) * (2 * cov + c2)) /
+                  ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))).mean())
+
+
+def test_fused_ssim():
+    """Test the single precision SSIM kernel and its window variants."""
+    print("Testing fused SSIM kernel...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        with fitz.open(_make_pdf(root / "a.pdf", 1, "lorem ipsum ")) as doc_a, \
+                fitz.open(_make_pdf(root / "b.pdf", 1, "dolor sit amet ")) as doc_b:
+            img1, img2 = render_gray(doc_a, 0, 72), render_gray(doc_b, 0, 72)
+    assert img1.dtype == np.uint8 and img1.shape == (842, 595)
+    print("✓ Pages rendered straight to gray")
+
+    assert abs(ssim(img1, img2) - _reference_ssim(img1, img2)) < 1e-4
+    print("✓ Gaussian window matches the reference SSIM")
+
+    assert ssim(img1, img2, strip_rows=50) == ssim(img1, img2, strip_rows=10000)
+    print("✓ Strip-wise evaluation equals a whole-page pass")
+
+    for window in ("box", "integral"):
+        assert abs(ssim(img1, img1, window) - 1.0) < 1e-6
+        assert abs(ssim(img1, img2, window) - ssim(img1, img2)) < 0.05
+    print("✓ Box and integral-image windows agree")
+
+
+def test_signature_fast_reject():
+    """Test that mismatched page geometry is rejected before rendering."""
+    print("Testing geometric signature fast reject...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = {}
+        for name, sizes in (("a", [(595, 842)] * 3), ("b", [(595, 842)] * 2), ("c", [(595, 842), (842, 595), (595, 842)])):
+            doc = fitz.open()
+            for width, height in sizes:
+                doc.new_page(width=width, height=height).draw_rect(fitz.Rect(50, 50, 300, 300), fill=(0, 0, 0))
+            paths[name] = str(root / f"{name}.pdf")
+            doc.save(paths[name])
+            doc.close()
+
+        signature = document_signature(paths["c"])
+        assert signature.page_count == 3 and signature.pages[1] == (842.0, 595.0, 0)
+        assert signature.pdf_type == PDFType.UNKNOWN and document_signature(paths["c"]) is signature
+        print("✓ Signature computed once per file version")
+
+        comparator = PDFComparator(raster_cache=RasterCache(cache_dir=str(root / "rasters")),
+                                   hash_cache=HashCache(cache_dir=str(root / "cache")))
+        comparator._compare_pdfs_as_images = None  # any rendering would fail
+        for other, message in (("b", "Page counts differ"), ("c", "Page shapes differ")):
+            result = comparator.compare_pdfs(paths["a"], paths[other])
+            assert result["method"] == "signature" and result["message"] == message and not result["match"]
+        print("✓ Mismatched documents rejected without rendering")
+
+
+if __name__ == "__main__":
+    test_coarse_to_fine_comparison()
+    test_parallel_page_comparison()
+    test_fused_ssim()
+    test_signature_fast_reject()
+    print("✓ All PDF comparison tests passed!")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the NumPy perceptual hashing of rendered PDF pages.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils import pdf_utils
+from script.utils.hash_cache import HashCache
+
+
+def _make_pdf(path: Path, text: str) -> None:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 144), text, fontsize=36)
+    page.draw_rect(fitz.Rect(72, 300, 400, 500), color=(0, 0, 0), fill=(0.2, 0.2, 0.2))
+    doc.save(str(path))
+    doc.close()
+
+
+def test_area_resize():
+    """Test that area resizing averages whole cells."""
+    print("Testing area resize...")
+    gray = (np.arange(64 * 72) % 251).astype(np.uint8).reshape(64, 72)
+    cells = pdf_utils.area_resize(gray, 9, 8)
+    assert cells.shape == (8, 9)
+    assert np.allclose(cells, gray.reshape(8, 8, 9, 8).mean(axis=(1, 3)))
+    print("✓ Cells are pixel means")
+
+
+def test_fast_first_page_hash():
+    """Test the direct PyMuPDF -> NumPy dHash."""
+    print("Testing direct first page hashing...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a = Path(tmp) / "a.pdf"
+        b = Path(tmp) / "b.pdf"
+        _make_pdf(a, "Quarterly report")
+        _make_pdf(b, "Quarterly report")
+
+        hash_a = pdf_utils.first_page_hash(str(a), hash_size=8, mode='fast')
+        hash_b = pdf_utils.first_page_hash(str(b), hash_size=8, mode='fast')
+        assert hash_a is not None and hash_a.shape == (64,) and hash_a.dtype == bool
+        assert np.array_equal(hash_a, hash_b)
+        assert hash_a.any()
+        print("✓ Identical pages hash identically")
+
+        assert pdf_utils.get_phash_algorithm('fast') != pdf_utils.get_phash_algorithm('compat')
+        print("✓ Fast and compatibility hashes are cached separately")
+
+
+def test_fingerprints():
+    """Test that aHash, dHash and pHash come from one raster and pHash confirms dHash."""
+    print("Testing multi-algorithm fingerprints...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        a = Path(tmp) / "a.pdf"
+        b = Path(tmp) / "b.pdf"
+        _make_pdf(a, "Quarterly report")
+        _make_pdf(b, "Minutes of the board")
+
+        fp_a = pdf_utils.calculate_first_page_fingerprints(str(a))
+        fp_b = pdf_utils.calculate_first_page_fingerprints(str(b))
+        assert set(fp_a) == {'ahash', 'dhash', 'phash'}
+        assert all(bits.shape == (64,) and bits.dtype == bool for bits in fp_a.values())
+        assert np.array_equal(fp_a['dhash'], pdf_utils.first_page_hash(str(a), mode='fast'))
+        print("✓ Three 64-bit hashes per page")
+
+        assert pdf_utils.fingerprints_match(fp_a, fp_a, 0.9) == (True, 1.0)
+        assert not pdf_utils.fingerprints_match(fp_a, fp_b, 0.0, confirm_threshold=1.0)[0]
+        assert pdf_utils.fingerprints_match({'dhash': fp_a['dhash']}, fp_b, 0.0, 1.0)[0]
+        print("✓ pHash confirms dHash candidates when both sides have one")
+
+
+def test_multi_page_fingerprints():
+    """Test that sampled pages tell apart documents sharing a cover page."""
+    print("Testing multi-page fingerprints...")
+
+    assert pdf_utils.sample_page_indices(10, 3, 'even') == [0, 4, 9]
+    assert pdf_utils.sample_page_indices(10, 2, 'ends') == [0, 9]
+    assert pdf_utils.sample_page_indices(10, 3, 'first') == [0, 1, 2]
+    assert pdf_utils.sample_page_indices(2, 5, 'even') == [0, 1]
+    print("✓ Page sampling strategies")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, body in (("a.pdf", fitz.Rect(72, 72, 540, 300)), ("b.pdf", fitz.Rect(72, 500, 300, 760))):
+            doc = fitz.open()
+            doc.new_page().insert_text((72, 144), "Annual report", fontsize=36)
+            for _ in range(2):
+                doc.new_page().draw_rect(body, color=(0, 0, 0), fill=(0, 0, 0))
+            path = Path(tmp) / name
+            doc.save(str(path))
+            doc.close()
+            paths.append(str(path))
+
+        cover_a, cover_b = (pdf_utils.calculate_first_page_fingerprints(p) for p in paths)
+        assert pdf_utils.fingerprint_similarity(cover_a['phash'], cover_b['phash']) == 1.0
+
+        doc_a, doc_b = (pdf_utils.calculate_document_fingerprints(p, pages=3) for p in paths)
+        assert doc_a['phash'].shape == (3, 64)
+        assert pdf_utils.fingerprint_similarity(doc_a['phash'], doc_a['phash']) == 1.0
+        assert pdf_utils.fingerprint_similarity(doc_a['phash'], doc_b['phash']) < 0.9
+        assert pdf_utils.fingerprint_similarity(doc_a['phash'], cover_a['phash']) == 1 / 3
+        print("✓ Identical covers no longer collide")
+
+
+
+def test_fallback_hashes_cached_as_compat():
+    """Test that Wand fallback hashes of 'fast' mode are cached under the 'compat' algorithm.
+
+    Failed hashes (all zeros) are not cached at all.
+    """
+    print("Testing caching of fallback hashes...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            path = Path(tmp) / name
+            _make_pdf(path, name)
+            paths.append(str(path))
+        fallback, failed = paths[1], paths[2]
+        compat_hash = np.zeros((1, 64), dtype=bool)
+        compat_hash[0, ::3] = True
+
+        document_fingerprints = pdf_utils.document_fingerprints
+
+        def fingerprints(pdf_path, *args, **kwargs):
+            if pdf_path == fallback:
+                return {'dhash': compat_hash}
+            if pdf_path == failed:
+                return {'dhash': np.zeros((1, 64), dtype=bool)}
+            return document_fingerprints(pdf_path, *args, **kwargs)
+
+        cache = HashCache(cache_dir=str(Path(tmp) / "cache"))
+        pdf_utils.document_fingerprints = fingerprints
+        try:
+            pdf_utils.find_duplicates(processed_files=[{'path': p, 'size': 1} for p in paths],
+                                      min_file_size=0, hash_cache=cache)
+        finally:
+            pdf_utils.document_fingerprints = document_fingerprints
+
+        md5s = [pdf_utils.calculate_file_hash(p) for p in paths]
+        pages, strategy = pdf_utils.get_page_sampling()
+        fast = pdf_utils.get_fingerprint_algorithms('fast', pages, strategy)['dhash']
+        compat = pdf_utils.get_fingerprint_algorithms('compat')['dhash']
+        assert list(cache.get_perceptual_hashes(md5s, 8, fast)) == [md5s[0]]
+        assert list(cache.get_perceptual_hashes(md5s, 8, compat)) == [md5s[1]]
+        print("✓ Fallback dHash not mistaken for a fast-mode hash, failed hash not cached")
+
+
+if __name__ == "__main__":
+    test_area_resize()
+    test_fast_first_page_hash()
+    test_fingerprints()
+    test_multi_page_fingerprints()
+    test_fallback_hashes_cached_as_compat()
+    print("✓ All perceptual hash tests passed!")
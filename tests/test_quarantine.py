@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the quarantine of PDFs whose extraction fails.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.extraction_worker import ExtractionFailure, TextDigest
+from script.utils.hash_cache import HashCache
+
+
+def _make_pdf(path: Path, text: str) -> str:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 144), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_quarantine():
+    """Test that failing files are quarantined, skipped and released."""
+    print("Testing extraction quarantine...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HashCache(cache_dir=tmp)
+        bad = _make_pdf(Path(tmp) / "bad.pdf", "A document that makes the extractor hang")
+        copy = str(Path(tmp) / "copy.pdf")
+        shutil.copy2(bad, copy)
+
+        attempts = []
+
+        def hang(file_path, timeout=30.0):
+            attempts.append(file_path)
+            raise ExtractionFailure('timeout', f"Extraction of {file_path} timed out")
+
+        cache.text_processor._extract_digest_with_timeout = hang
+        entry = cache.cache_file(bad)
+        assert attempts == [bad] and entry.text_hash == "" and entry.file_hash
+        records = cache.list_quarantine()
+        assert len(records) == 1 and records[0]['reason'] == 'timeout' and records[0]['failure_count'] == 1
+        print("✓ Timed out file quarantined")
+
+        # A byte-identical copy with the same mtime is skipped without extraction
+        cache.cache_file(copy)
+        cache.cache_file(bad, force_reprocess=True)
+        assert attempts == [bad]
+        assert cache.is_quarantined(copy)
+        assert cache.get_cache_stats()['quarantined_files'] == 1
+        print("✓ Quarantined files skipped on later scans")
+
+        groups = cache.find_duplicates_by_structure([bad, copy])
+        assert sorted(next(iter(groups.values()))) == sorted([bad, copy])
+        print("✓ Quarantined copies grouped by file hash")
+
+        stat = os.stat(bad)
+        assert cache.get_quarantined([entry.file_hash, "0" * 64]) == {
+            entry.file_hash: [(stat.st_size, stat.st_mtime)]}
+        print("✓ Quarantine records looked up in bulk")
+
+        # Editing the file gives it a new key
+        os.utime(bad, (0, 0))
+        assert not cache.is_quarantined(bad)
+        assert cache.find_duplicates_by_structure([bad, copy]) == {}
+        print("✓ Changed file leaves quarantine")
+
+        assert cache.release_from_quarantine() == 1
+        assert cache.list_quarantine() == []
+        cache.text_processor._extract_digest_with_timeout = lambda file_path, timeout=30.0: TextDigest(
+            text_hash="released", words="released text", page_count=1)
+        assert cache.cache_file(copy).text_hash
+        print("✓ Released files are extracted again")
+
+        for reason in ('error', 'unavailable'):
+            def fail(file_path, timeout=30.0):
+                raise ExtractionFailure(reason, f"Extraction of {file_path} failed")
+
+            cache.text_processor._extract_digest_with_timeout = fail
+            try:
+                cache.cache_file(bad, force_reprocess=True)
+            except ExtractionFailure as e:
+                assert e.reason == 'unavailable'
+            assert cache.list_quarantine() == []
+        print("✓ Ordinary errors and worker start failures not quarantined")
+
+        fresh = _make_pdf(Path(tmp) / "fresh.pdf", "A document read while the worker is down")
+        try:
+            cache.cache_file(fresh)
+            assert False, "worker start failure not raised"
+        except ExtractionFailure:
+            pass
+        assert cache.get_cached_entry(fresh) is None
+        print("✓ Files not cached when the worker cannot start")
+
+
+if __name__ == "__main__":
+    test_quarantine()
+    print("✓ All quarantine tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the disk-backed raster cache of rendered pages.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils import raster_cache as raster_cache_module
+from script.utils.raster_cache import RasterCache, render_raster
+
+
+def _make_pdf(path: Path, pages: int = 2) -> str:
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_text((72, 144), f"Page {n}", fontsize=36)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_cache_hits_by_content():
+    """Test that a page is rendered once per (content, page, DPI, colorspace)."""
+    print("Testing raster cache hits...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        original = _make_pdf(root / "original.pdf")
+        copy = root / "copy.pdf"
+        shutil.copy(original, copy)
+        cache = RasterCache(cache_dir=str(root / "rasters"))
+
+        with fitz.open(original) as doc:
+            first = cache.get_page(doc, 0, 50, 'rgb', cache.content_hash(original))
+            assert first.shape[2] == 3 and np.array_equal(first, render_raster(doc, 0, 50, 'rgb'))
+            gray = cache.get_page(doc, 0, 50, 'gray', cache.content_hash(original))
+            assert gray.ndim == 2
+        assert cache.get_stats()['rasters'] == 2
+        print("✓ Colorspaces cached separately")
+
+        calls = []
+        original_render = raster_cache_module.render_raster
+        raster_cache_module.render_raster = lambda *args: calls.append(args) or original_render(*args)
+        try:
+            with fitz.open(str(copy)) as doc:
+                again = cache.get_page(doc, 0, 50, 'rgb', cache.content_hash(str(copy)))
+                cache.get_page(doc, 0, 72, 'rgb', cache.content_hash(str(copy)))
+        finally:
+            raster_cache_module.render_raster = original_render
+        assert np.array_equal(first, again)
+        assert len(calls) == 1 and calls[0][2] == 72
+        print("✓ Copies under another path hit the cache, other DPIs do not")
+
+
+def test_eviction():
+    """Test that the oldest rasters are evicted beyond the size limit."""
+    print("Testing raster cache eviction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RasterCache(cache_dir=tmp, max_size_mb=1)
+        rng = np.random.default_rng(0)
+        for page in range(8):
+            cache.put("content", page, 100, 'gray', rng.integers(0, 256, (400, 400), dtype=np.uint8))
+        stats = cache.get_stats()
+        assert stats['size_bytes'] <= stats['max_bytes'], stats
+        assert cache.get("content", 7, 100, 'gray') is not None
+        assert cache.get("content", 0, 100, 'gray') is None
+        print("✓ Least recently used rasters evicted")
+
+        assert cache.clear() and cache.get_stats()['rasters'] == 0
+        print("✓ Cache cleared")
+
+
+if __name__ == "__main__":
+    test_cache_hits_by_content()
+    test_eviction()
+    print("✓ All raster cache tests passed!")
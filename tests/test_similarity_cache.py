@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the persistent cache of pairwise similarity scores.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.pdf_comparator import PDFComparator as TextComparator
+from script.utils.pdf_comparison import PDFComparator
+from script.utils.raster_cache import RasterCache
+from script.utils.similarity_cache import SimilarityCache
+
+
+def _make_pdf(path: Path, text: str) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 144), text)
+    page.draw_rect(fitz.Rect(100, 300, 300, 500), fill=(0.3, 0.3, 0.3))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_similarity_cache():
+    """Test that scores are stored by content hash and reused by new instances."""
+    print("Testing pair score storage...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cache = HashCache(cache_dir=str(root / "cache"))
+        a = _make_pdf(root / "a.pdf", "First document")
+        b = _make_pdf(root / "b.pdf", "Second document")
+        c = _make_pdf(root / "c.pdf", "Third document")
+        a_copy = str(root / "a_copy.pdf")
+        shutil.copy(a, a_copy)
+
+        scores = SimilarityCache(cache, 'test', {'version': 1})
+        scores.put(a, b, 0.5, {'pages': 2})
+        assert scores.get(b, a) == (0.5, {'pages': 2})
+        scores.flush()
+        assert cache.get_cache_stats()['pair_similarities'] == 1
+        print("✓ Scores stored once per unordered pair")
+
+        fresh = SimilarityCache(cache, 'test', {'version': 1})
+        fresh.prefetch([a_copy, b, c])
+        assert fresh.get(a_copy, b) == (0.5, {'pages': 2})
+        assert fresh.get(a, c) is None
+        print("✓ Scores found by content hash, whatever the path")
+
+        assert SimilarityCache(cache, 'test', {'version': 2}).get(a, b) is None
+        assert SimilarityCache(cache, 'other', {'version': 1}).get(a, b) is None
+        print("✓ Other methods and parameters miss")
+
+        cache.clear_cache()
+        assert SimilarityCache(cache, 'test', {'version': 1}).get(a, b) is None
+        print("✓ Scores cleared with the cache")
+
+
+def test_cached_comparisons():
+    """Test that both comparators reuse verified pairs instead of comparing again."""
+    print("Testing cached comparisons...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cache = HashCache(cache_dir=str(root / "cache"))
+        rasters = RasterCache(cache_dir=str(root / "rasters"))
+        a = _make_pdf(root / "a.pdf", "Visual document")
+        b = _make_pdf(root / "b.pdf", "Visual document")
+
+        first = PDFComparator(raster_cache=rasters, hash_cache=cache).compare_pdfs(a, b)
+        assert first["match"] and not first["details"].get("cached")
+
+        comparator = PDFComparator(raster_cache=rasters, hash_cache=cache)
+        comparator._compare_pdfs_as_images = None  # any rendering would fail
+        second = comparator.compare_pdfs(a, b)
+        assert second["details"]["cached"] and second["similarity"] == first["similarity"]
+        assert second["method"] == first["method"] and second["match"]
+        print("✓ Visual comparison served from the cache")
+
+        assert PDFComparator(dpi=100, raster_cache=rasters, hash_cache=cache).similarity_cache.get(a, b) is None
+        print("✓ Different render settings compare again")
+
+        texts = TextComparator(hash_cache=cache)
+        score = texts.compare_files(a, b).text_similarity
+        texts = TextComparator(hash_cache=cache)
+        texts.text_processor.extract_signature = None  # any extraction would fail
+        assert texts.find_duplicates([a, b], similarity_threshold=0.9) == [(a, b, texts.compare_files(a, b).similarity)]
+        assert texts.compare_files(a, b).text_similarity == score
+        print("✓ Text similarity served from the cache")
+
+
+def test_failed_comparisons_not_cached():
+    """Test that comparisons whose text could not be read are not stored."""
+    print("Testing failed comparisons...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cache = HashCache(cache_dir=str(root / "cache"))
+        files = []
+        for name in ("a", "b"):
+            doc = fitz.open()
+            doc.new_page().insert_text((72, 144), "Searchable document " * 20)
+            doc.save(str(root / f"{name}.pdf"))
+            doc.close()
+            files.append(str(root / f"{name}.pdf"))
+
+        comparator = PDFComparator(raster_cache=RasterCache(cache_dir=str(root / "rasters")), hash_cache=cache)
+        comparator._extract_text_from_pdf = lambda file_path: ""
+        result = comparator.compare_pdfs(*files)
+        assert result["failed"] and result["similarity"] == 0.0
+        assert comparator.similarity_cache.get(*files) is None
+        print("✓ Unreadable text compared again next time")
+
+        texts = TextComparator(hash_cache=cache)
+        texts.signature = lambda file_path: None
+        assert texts.text_similarity(*files) == 0.0
+        texts.similarity_cache.flush()
+        assert cache.get_cache_stats()['pair_similarities'] == 0
+        print("✓ Missing text signatures not stored")
+
+        texts = TextComparator(hash_cache=cache)
+        texts.compare_files(*files, flush=False)
+        assert cache.get_cache_stats()['pair_similarities'] == 0
+        texts.similarity_cache.flush()
+        assert cache.get_cache_stats()['pair_similarities'] == 1
+        print("✓ Batch comparisons flushed by the caller")
+
+
+if __name__ == "__main__":
+    test_similarity_cache()
+    test_cached_comparisons()
+    test_failed_comparisons_not_cached()
+    print("✓ All similarity cache tests passed!")
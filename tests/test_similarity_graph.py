@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the similarity graph and regrouping at other thresholds.
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.similarity_graph import SimilarityGraph
+from script.utils.text_processor import TextProcessor
+
+
+def _make_pdf(path: Path, words: list) -> str:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(words), fontsize=9)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_regrouping():
+    """Test that one graph yields the groups of every threshold above its floor."""
+    print("Testing regrouping...")
+
+    graph = SimilarityGraph(floor=0.5)
+    for file_path in "abcdef":
+        graph.add_node(file_path)
+    graph.add_edge("a", "b", 0.95)
+    graph.add_edge("b", "c", 0.7)
+    graph.add_edge("d", "e", 0.6)
+    graph.add_edge("e", "f", 0.3)
+    assert graph.edge_count == 3
+    graph.add_edge("a", "c", 0.6)
+    assert graph.groups(0.9) == [["a", "b"]]
+    assert graph.groups(0.6) == [["a", "b", "c"], ["d", "e"]]
+    print("✓ Lower thresholds join more files, scores below the floor are dropped")
+
+    # c is similar to b but not to a: it never joins a's group through b
+    assert graph.groups(0.7) == [["a", "b"]]
+    chain = SimilarityGraph(floor=0.5)
+    chain.add_edge("x", "y", 0.9)
+    chain.add_edge("y", "z", 0.9)
+    chain.add_edge("x", "z", 0.55)
+    assert chain.groups(0.8) == [["x", "y"]]
+    assert chain.groups(0.5) == [["x", "y", "z"]]
+    print("✓ Chains of similar files not grouped beyond the representative")
+
+    copies = SimilarityGraph(floor=0.5)
+    for file_path in ("r", "s", "s2", "t"):
+        copies.add_node(file_path)
+    copies.add_group(["s", "s2"])
+    copies.add_edge("r", "s", 0.9)
+    copies.add_edge("s2", "t", 0.9)
+    assert copies.groups(0.8) == [["r", "s", "s2"]]
+    print("✓ Exact copies follow the file they copy")
+
+    graph.roots = {"a": "/root1", "d": "/root2"}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "graph.npz")
+        graph.save(path)
+        loaded = SimilarityGraph.load(path)
+        assert SimilarityGraph.load(str(Path(tmp) / "missing.npz")) is None
+    assert loaded.floor == 0.5 and loaded.paths == graph.paths and loaded.roots == graph.roots
+    for threshold in (0.9, 0.7, 0.5):
+        assert loaded.groups(threshold) == graph.groups(threshold)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "copies.npz")
+        copies.save(path)
+        assert SimilarityGraph.load(path).groups(0.8) == copies.groups(0.8)
+    print("✓ Saved graph regroups the same")
+
+    rng = random.Random(7)
+    large = SimilarityGraph(floor=0.5)
+    for n in range(100_000):
+        large.add_node(f"file{n}.pdf")
+    for _ in range(200_000):
+        large.add_edge(f"file{rng.randrange(100_000)}.pdf", f"file{rng.randrange(100_000)}.pdf", rng.random())
+    large.groups(0.9)
+    start = time.perf_counter()
+    groups = large.groups(0.8)
+    elapsed = time.perf_counter() - start
+    assert sum(map(len, groups)) <= 100_000
+    print(f"✓ 100k files and {large.edge_count} edges regrouped in {elapsed:.2f}s")
+
+
+def test_similarity_edges():
+    """Test that the pruned pair search finds the same pairs as compare_texts."""
+    print("Testing similarity edges...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        cache = HashCache(cache_dir=str(root / "cache"))
+        rng = random.Random(3)
+        vocabulary = [f"word{n:03d}" for n in range(300)]
+        base = rng.sample(vocabulary, 80)
+        files = [_make_pdf(root / "base.pdf", base)]
+        for n in range(8):
+            words = base[:80 - 8 * n] + rng.sample(vocabulary, 5 * n)
+            files.append(_make_pdf(root / f"variant{n}.pdf", words))
+
+        edges = {(a, b): score for a, b, score in cache.find_similarity_edges(files, 0.4)}
+        texts = [cache.cache_file(file_path).text_content for file_path in files]
+        expected = {}
+        for i in range(len(files)):
+            for j in range(i + 1, len(files)):
+                score = TextProcessor.compare_texts(texts[i], texts[j])
+                if score >= 0.4:
+                    expected[(files[i], files[j])] = score
+        assert edges.keys() == expected.keys() and len(edges) > 1
+        assert all(abs(edges[key] - expected[key]) < 1e-9 for key in edges)
+        print(f"✓ {len(edges)} pairs above the floor, scores match compare_texts")
+
+        groups = cache.find_duplicates_by_content(files, 0.9)
+        assert list(groups.values()) == [[file_path for file_path in files if
+                                          edges.get((files[0], file_path), 0) >= 0.9 or file_path == files[0]]]
+        print("✓ Content groups built from the edges")
+
+
+if __name__ == "__main__":
+    test_regrouping()
+    test_similarity_edges()
+    print("✓ All similarity graph tests passed!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the normalized structural hash and its exact tier.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.hash_cache import HashCache
+from script.utils.similarity_graph import SimilarityGraph
+from script.utils.structure_hash import _font_file_xref, calculate_structure_hash
+
+
+def _make_documents(root: Path):
+    original = root / "original.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Structural hash test", fontsize=20)
+    page.insert_font(fontname="F1", fontbuffer=fitz.Font("tiro").buffer)
+    page.insert_text((72, 240), "Embedded font", fontname="F1")
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pix.clear_with(90)
+    page.insert_image(fitz.Rect(100, 100, 200, 200), pixmap=pix)
+    doc.set_metadata({"title": "Report", "creationDate": "D:20200101000000"})
+    doc.save(str(original))
+    doc.close()
+
+    # Same document re-saved with new metadata, a new /ID and renumbered objects
+    resaved = root / "resaved.pdf"
+    doc = fitz.open(str(original))
+    doc.set_metadata({"title": "Report", "modDate": "D:20250101000000"})
+    doc.save(str(resaved), garbage=4, deflate=True)
+    doc.close()
+
+    edited = root / "edited.pdf"
+    doc = fitz.open(str(original))
+    doc[0].insert_text((72, 300), "An added line")
+    doc.save(str(edited))
+    doc.close()
+    return str(original), str(resaved), str(edited)
+
+
+def test_structure_hash():
+    """Test that re-saving keeps the structural hash and edits change it."""
+    print("Testing structural hash...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        original, resaved, edited = _make_documents(Path(tmp))
+        assert Path(original).read_bytes() != Path(resaved).read_bytes()
+        assert calculate_structure_hash(original) == calculate_structure_hash(resaved)
+        assert calculate_structure_hash(original) != calculate_structure_hash(edited)
+        assert calculate_structure_hash(str(Path(tmp) / "missing.pdf")) == ""
+        print("✓ Volatile metadata ignored, content changes detected")
+
+        with fitz.open(resaved) as doc:
+            fonts = {font[4]: _font_file_xref(doc, font[0]) for font in doc[0].get_fonts(full=True)}
+            assert fonts["helv"] == 0 and doc.xref_stream(fonts["F1"])
+        print("✓ Embedded font programs hashed from their streams")
+
+        cache = HashCache(cache_dir=str(Path(tmp) / "cache"))
+        groups = list(cache.find_duplicates_by_structure([original, resaved, edited]).values())
+        assert groups == [[original, resaved]], groups
+        edited_hash = cache._calculate_file_hash(edited)
+        assert len(cache.get_structure_hashes([edited_hash])) == 1
+        print("✓ Structural tier groups re-saved copies and caches the hashes")
+
+        cache.store_structure_hashes({edited_hash: "0" * 64})
+        assert cache.get_structure_hashes([edited_hash]) == {}
+        print("✓ Hashes of an older canonical form recomputed")
+
+        copy = str(Path(tmp) / "copy.pdf")
+        shutil.copy(original, copy)
+        files = [original, resaved, copy, edited]
+        file_hashes = cache.get_file_hashes(files)
+        assert list(cache.find_identical_files(files, file_hashes).values()) == [[original, copy]]
+        print("✓ Byte-identical copies grouped without opening them")
+
+
+def test_tier_groups_joined():
+    """Test that exact-tier groups join the similarity groups of their representatives."""
+    print("Testing tier merging...")
+
+    graph = SimilarityGraph(floor=0.5)
+    for file_path in ("b", "a", "a2", "c", "c2", "d"):
+        graph.add_node(file_path)
+    graph.add_group(["a", "a2"])
+    graph.add_group(["c", "c2"])
+    graph.add_edge("b", "a", 0.9)
+    assert graph.groups(0.8) == [["b", "a", "a2"], ["c", "c2"]], graph.groups(0.8)
+    print("✓ Exact groups expanded inside similarity groups")
+
+
+if __name__ == "__main__":
+    test_structure_hash()
+    test_tier_groups_joined()
+    print("✓ All structural hash tests passed!")
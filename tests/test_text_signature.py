@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streamed text signatures.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+import fitz
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.advanced_scanner import AdvancedPDFScanner
+from script.utils.extraction_worker import ExtractionPool
+from script.utils.hash_cache import HashCache
+from script.utils.text_processor import TextProcessor
+from script.utils.text_signature import SignatureBuilder, build_text_signature, sample_page_numbers
+from script.utils.tokenizer import token_hash
+
+
+def _words(start: int, count: int) -> list:
+    return [f"word{n:05d}" for n in range(start, start + count)]
+
+
+def _make_pdf(path: Path, pages: list) -> str:
+    doc = fitz.open()
+    for words in pages:
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), " ".join(words), fontsize=6)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def _signature(words: list):
+    builder = SignatureBuilder(num_perm=256)
+    builder.update(token_hash(word) for word in words)
+    return builder.build()
+
+
+def test_signature_estimates():
+    """Test that signatures approximate the Jaccard similarity of compare_texts."""
+    print("Testing text signature estimates...")
+
+    a, b = _words(0, 600), _words(200, 600)
+    exact = TextProcessor.compare_texts(" ".join(a), " ".join(b))
+    estimate = _signature(a).jaccard(_signature(b))
+    assert abs(exact - estimate) < 0.1, (exact, estimate)
+    assert _signature(a).jaccard(_signature(list(reversed(a)))) == 1.0
+    assert _signature(a).simhash_distance(_signature(a + a[:5])) <= 4
+    assert _signature(a).simhash_distance(_signature(_words(5000, 600))) > 16
+    assert _signature([]).jaccard(_signature(a)) == 0.0
+    print(f"✓ MinHash estimate {estimate:.3f} close to Jaccard {exact:.3f}, SimHash separates texts")
+
+    assert sample_page_numbers(5, 0) == [0, 1, 2, 3, 4]
+    assert sample_page_numbers(101, 3) == [0, 50, 100]
+    print("✓ Page samples")
+
+
+def test_streamed_document_signature():
+    """Test page sampling, the token budget and extraction in a worker."""
+    print("Testing streamed document signatures...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = [_words(n * 100, 100) for n in range(12)]
+        path = _make_pdf(Path(tmp) / "long.pdf", pages)
+
+        with fitz.open(path) as doc:
+            full = build_text_signature(doc, max_tokens=0)
+            sampled = build_text_signature(doc, sample_pages=4, max_tokens=0)
+            budget = build_text_signature(doc, max_tokens=250)
+        assert full.token_count == 1200 and full.pages_read == 12 and not full.truncated
+        assert sampled.pages_read == 4 and sampled.truncated
+        assert budget.token_count == 250 and budget.pages_read == 3 and budget.truncated
+        print("✓ Pages sampled and token budget enforced")
+
+        pool = ExtractionPool(workers=1)
+        try:
+            remote = pool.text_signature(path, max_tokens=0)
+        finally:
+            pool.close()
+        assert remote.jaccard(full) == 1.0 and remote.simhash == full.simhash
+        print("✓ Signature computed in an extraction worker matches")
+
+        # Repeated pages: the cached word list does not grow with them
+        path = _make_pdf(Path(tmp) / "repeated.pdf", pages + pages)
+        cache = HashCache(cache_dir=str(Path(tmp) / "cache"))
+        entry = cache.cache_file(path)
+        with fitz.open(path) as doc:
+            text = TextProcessor()._process_text("".join(page.get_text("text") + "\n" for page in doc))
+        assert entry.text_hash == cache._calculate_text_hash(text) and entry.page_count == 24
+        assert entry.text_content.split() == list(dict.fromkeys(text.split()))
+        print("✓ Cached text hash and words streamed page by page")
+
+
+def test_signature_comparisons():
+    """Test that the advanced scan extracts each file once and scores pairs by signature."""
+    print("Testing signature-based comparisons...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        files = [
+            _make_pdf(root / "a.pdf", [_words(0, 300)]),
+            _make_pdf(root / "b.pdf", [_words(0, 300)]),
+            _make_pdf(root / "c.pdf", [_words(1000, 300)]),
+            _make_pdf(root / "d.pdf", [_words(0, 300)]),
+        ]
+        scanner = AdvancedPDFScanner(comparison_threshold=0.9, hash_cache=HashCache(cache_dir=str(root / "cache")))
+        extracted = []
+        extract_signature = scanner.text_processor.extract_signature
+
+        def counting(file_path, **kwargs):
+            extracted.append(file_path)
+            return extract_signature(file_path, **kwargs)
+
+        scanner.text_processor.extract_signature = counting
+        duplicates = scanner.find_duplicates(files)
+        assert [(a, b) for a, b, _ in duplicates] == [(files[0], files[1]), (files[0], files[3]), (files[1], files[3])]
+        assert all(similarity > 0.9 for _, _, similarity in duplicates)
+        assert sorted(extracted) == sorted(files)
+        print("✓ One extraction per file, pairs scored on signatures")
+
+
+if __name__ == "__main__":
+    test_signature_estimates()
+    test_streamed_document_signature()
+    test_signature_comparisons()
+    print("✓ All text signature tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the script-aware streaming tokenizer.
+"""
+import re
+import sys
+from pathlib import Path
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.text_processor import TextProcessor
+from script.utils.text_signature import SignatureBuilder
+from script.utils.tokenizer import Tokenizer
+
+
+def _legacy_process_text(text: str, min_word_length: int = 3) -> str:
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return " ".join(w for w in text.split() if len(w) >= min_word_length)
+
+
+def test_word_tokens():
+    """Test that alphabetic text is tokenized exactly as before."""
+    print("Testing word tokens...")
+
+    text = "The quick-brown FOX, über_alles!\nJumps over 42 lazy dogs (again)... Ça va? Привет мир"
+    assert " ".join(Tokenizer().tokens(text)) == _legacy_process_text(text)
+    assert TextProcessor()._process_text(text) == _legacy_process_text(text)
+    assert list(Tokenizer(lowercase=False).tokens("Big Red dog")) == ["Big", "Red", "dog"]
+    print("✓ Word tokens match the previous text processing")
+
+
+def test_shingles():
+    """Test character shingles for CJK and RTL scripts."""
+    print("Testing CJK and RTL shingles...")
+
+    tokenizer = Tokenizer()
+    assert list(tokenizer.tokens("重複ファイル")) == ["重複", "複フ", "ファ", "ァイ", "イル"]
+    assert list(tokenizer.tokens("PDF文書 report")) == ["pdf", "文書", "report"]
+    assert list(tokenizer.tokens("الكتاب")) == ["الك", "لكت", "كتا", "تاب"]
+    assert list(tokenizer.tokens("ספר")) == ["ספר"]
+    print("✓ CJK runs and RTL words cut into shingles")
+
+    # Japanese text without spaces still yields comparable token sets
+    a = "本書は重複したPDFファイルを検索して削除するためのツールです。"
+    b = "本書は重複したPDFファイルを検索して整理するためのツールです。"
+    c = "今日はとても良い天気なので公園へ散歩に行きました。"
+    sig = {}
+    for name, text in (('a', a), ('b', b), ('c', c)):
+        builder = SignatureBuilder(num_perm=128)
+        builder.update_page(text)
+        sig[name] = builder.build()
+    assert sig['a'].jaccard(sig['b']) > 0.6
+    assert sig['a'].jaccard(sig['c']) < 0.2
+    assert TextProcessor.compare_texts(TextProcessor()._process_text(a), TextProcessor()._process_text(b)) > 0.7
+    print("✓ Similar Japanese documents have similar signatures")
+
+
+if __name__ == "__main__":
+    test_word_tokens()
+    test_shingles()
+    print("✓ All tokenizer tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the scan without the hash cache.
+"""
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+import numpy as np
+
+# Add the project root to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from script.utils.scanner import PDFScanner
+from script.utils.similarity_graph import SimilarityGraph
+from script.utils.text_signature import SignatureBuilder, TextSignature
+from script.utils.tokenizer import token_hash
+
+
+def _make_pdf(path: Path, pages: list, fontsize: int = 8) -> str:
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        if text:
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=fontsize)
+        else:
+            page.draw_rect(fitz.Rect(100, 100, 300, 300), fill=(0.2, 0.2, 0.2))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_traditional_scan():
+    """Test that every file is read once and only compatible files are compared."""
+    print("Testing scan without cache...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        text = " ".join(f"word{n}" for n in range(300))
+        report = _make_pdf(root / "report.pdf", [text])
+        restyled = _make_pdf(root / "restyled.pdf", [text], fontsize=7)
+        other = _make_pdf(root / "other.pdf", [" ".join(f"term{n}" for n in range(300))])
+        # Same words spread over more pages: different page count and size
+        split = _make_pdf(root / "split.pdf", [text] + [""] * 4)
+        scan = _make_pdf(root / "scan.pdf", [""])
+        scan_copy = str(root / "scan_copy.pdf")
+        shutil.copy(scan, scan_copy)
+        files = [report, other, scan, restyled, split, scan_copy]
+
+        scanner = PDFScanner(enable_hash_cache=False)
+        extracted = []
+        extract_signature = scanner.text_processor.extract_signature
+
+        def counting(file_path, **kwargs):
+            extracted.append(file_path)
+            return extract_signature(file_path, **kwargs)
+
+        scanner.text_processor.extract_signature = counting
+        duplicates = scanner._find_duplicates_traditional(files, 0.8, True)
+        assert duplicates == [[report, restyled], [scan, scan_copy]], duplicates
+        assert sorted(extracted) == sorted(files)
+        print("✓ One extraction per file, textless copies grouped by bytes")
+
+        assert scanner.similarity_graph.groups(scanner.similarity_graph.floor) == duplicates
+        print("✓ Pairs outside the page count and size buckets not compared")
+
+        assert scanner._find_duplicates_traditional(files, 0.8, False) == [[scan, scan_copy]]
+        print("✓ Size comparison without text")
+
+
+def _signature(tokens: list, pages: int) -> TextSignature:
+    builder = SignatureBuilder()
+    builder.update(token_hash(token) for token in tokens)
+    return builder.build(page_count=pages)
+
+
+def test_bucketed_comparison_scale():
+    """Test signature comparison on thousands of files."""
+    print("Testing bucketed comparison on many files...")
+
+    rng = np.random.default_rng(5)
+    count = 3000
+    files = [f"file{n}.pdf" for n in range(count)]
+    bases = [_signature([f"doc{n}-{t}" for t in range(40)], pages=1 + n % 20) for n in range(count // 2)]
+    signatures = bases + bases
+    sizes = rng.integers(10_000, 10_000_000, count)
+    sizes[count // 2:] = sizes[:count // 2]
+
+    graph = SimilarityGraph(floor=0.5)
+    for file_path in files:
+        graph.add_node(file_path)
+    start = time.perf_counter()
+    PDFScanner._add_signature_edges(graph, files, sizes, signatures)
+    elapsed = time.perf_counter() - start
+    groups = graph.groups(0.9)
+    assert len(groups) == count // 2 and all(len(group) == 2 for group in groups)
+    print(f"✓ {count} files compared in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    test_traditional_scan()
+    test_bucketed_comparison_scale()
+    print("✓ All traditional scan tests passed!")